@@ -1,60 +1,339 @@
 # -*- coding: utf-8 -*-
 import cv2
+import threading
+import functools
+import time
+import weakref
 import numpy as np
 import gradio as gr
-import os
-from ultralytics import YOLO
-from PIL import ImageFont, ImageDraw, Image
-
-# 한글 텍스트 출력 함수
-def put_korean_text(img, text, position, font_size=30, color=(0, 255, 0)):
-    img_pil = Image.fromarray(img)
-    draw = ImageDraw.Draw(img_pil)
-    
-    # 폰트 파일 경로 (프로젝트 폴더에 폰트 파일 추가 필요)
-    font_path = "./assets/font/NanumGothic.ttf"  # 또는 다른 한글 폰트 파일
-    
-    if not os.path.exists(font_path):
-        print(f"경고: 폰트 파일을 찾을 수 없습니다: {font_path}")
-        print("영문으로 표시합니다.")
-        # 영문으로 대체
-        cv2.putText(img, text, position, cv2.FONT_HERSHEY_SIMPLEX, font_size/30, color, 2)
-        return img
-    
-    font = ImageFont.truetype(font_path, font_size)
-    draw.text(position, text, font=font, fill=color)
-    return np.array(img_pil)
-
-# 모델 로드 - YOLO v11 사용
-model = YOLO("models/best4.pt")
-print("모델 로드 완료")
-
-# 컴퓨터 손 이미지 미리 로드 (성능 향상)
+from collections import OrderedDict
+from concurrent.futures import Future
+from detector import draw_detections, empty_detections, CONF, CLS
+from postprocess import move_table, classify, NO_HAND, MULTIPLE_HANDS
+from registry import ModelRegistry
+from motion import MotionGate, MotionStats
+from tracking import RoiTracker
+from gesture import GestureStateMachine, COMMITTED
+from pipeline import NULL_TIMER, AllocationStats, FrameBuffers
+from text_overlay import put_korean_text, preload_texts
+from hand_assets import HandAssetCache
+from frame_encoder import FrameEncoder, EncoderStats
+from telemetry import MetricsRegistry, HistogramTimer, NULL_METRIC, start_http_server
+
+# 모델 설정 - YOLO v11 사용 (내보낸 ONNX/OpenVINO 모델이 있으면 더 빠른 CPU 백엔드 사용)
+MODEL_PATH = "models/best4.pt"
+MODEL_CONF = 0.5
+MODEL_IOU = 0.45
+
+# 시작 설정 - 모델 / 이미지는 처음 필요할 때 한 번만 로드하고, 백그라운드에서 더미 프레임으로 워밍업
+WARMUP_ENABLED = True
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+
+# 모델 관리 UI (모델 교체 / 되돌리기) 표시 여부 - 외부에 공개하는 서버에서는 끄는 것을 권장
+MODEL_ADMIN_ENABLED = False
+
+# 모델 레지스트리 - 실행 중 모델을 백그라운드에서 로드하여 교체 (교체 중에도 기존 모델로 계속 추론)
+registry = ModelRegistry(conf=MODEL_CONF, iou=MODEL_IOU, warmup=WARMUP_ENABLED)
+
+_init_lock = threading.Lock()
+_assets_loaded = False
+_warmup_thread = None
+_warmup_error = None
+ready = threading.Event()  # 모델 로드 + 워밍업이 끝나면 설정됨 (UI에서 확인)
+
+# 현재 검출기 반환 - 처음 호출할 때 한 번만 로드 (여러 스레드에서 동시에 호출해도 안전)
+def get_detector():
+    if registry.current is None:
+        with _init_lock:
+            if registry.current is None:
+                registry.load(MODEL_PATH, background=False)
+    return registry.current
+
+# 배치 추론 설정
+BATCH_MAX_SIZE = 8       # 한 번에 추론할 최대 프레임 수
+BATCH_WINDOW_MS = 15     # 첫 프레임 도착 후 배치를 모으는 최대 대기 시간 (ms, 살아 있는 세션이 모두 요청하면 바로 추론)
+QUEUE_CONCURRENCY = 16   # 동시에 처리할 스트림 요청 수 (그라디오 큐)
+
+# 세션별 추론 제한 - 한 세션이 높은 FPS로 보내도 다른 세션의 추론 몫을 빼앗지 않도록
+SESSION_INFERENCE_FPS = 10   # 세션별 최대 추론 FPS (그 사이 프레임은 마지막 검출 결과 재사용, None이면 제한 없음)
+MAX_FRAME_AGE_MS = 300       # 이보다 오래 기다린 프레임은 추론하지 않고 버림 (서버 과부하 시 지연 상한)
+
+# 추론하지 않고 버린 프레임 (서버 과부하로 너무 오래 기다림)
+class FrameDropped(Exception):
+    pass
+
+# 여러 세션의 프레임을 모아 한 번에 추론하는 마이크로 배치 서비스
+# 배치는 먼저 요청한 세션 순서대로 한 장씩 채움 (그라디오는 한 세션의 이벤트를 하나씩 처리하므로 세션당 대기 프레임은 1장 이하)
+# detector에는 검출기 또는 검출기를 반환하는 함수(지연 로드)를 넘길 수 있음
+# active_sessions는 살아 있는 세션 수를 반환하는 함수 - 그만큼 프레임이 모이면 시간 창을 기다리지 않음 (세션이 하나면 대기 없음)
+class BatchInferenceService:
+    def __init__(self, detector, max_batch_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS,
+                 max_frame_age_ms=MAX_FRAME_AGE_MS, active_sessions=None, **predict_kwargs):
+        self._detector = detector
+        self.active_sessions = active_sessions
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.window = window_ms / 1000.0
+        self.max_frame_age = max_frame_age_ms / 1000.0 if max_frame_age_ms else None
+        self.predict_kwargs = predict_kwargs
+        # {세션 키: (frame, imgsz, future, 요청 시각)} - 먼저 요청한 세션부터
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+        # 통계 (평균 배치 크기 / 버린 프레임 확인용)
+        self.batches = 0
+        self.frames = 0
+        self.expired = 0
+
+    @property
+    def detector(self):
+        return self._detector() if callable(self._detector) else self._detector
+
+    @property
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+                self._thread.start()
+
+    def submit(self, frame, imgsz=None, session=None):
+        """
+        프레임을 추론 대기열에 넣고 결과를 받을 Future 반환 (imgsz가 None이면 검출기 기본 크기)
+
+        호출자(process_webcam)는 결과를 받을 때까지 기다리고, 그라디오는 한 세션의 스트림 이벤트를
+        동시에 처리하지 않으므로 같은 session의 프레임이 두 장 이상 대기하는 일은 없습니다.
+        """
+        self._ensure_worker()
+        future = Future()
+        key = session if session is not None else object()
+        with self._cond:
+            self._pending[key] = (frame, imgsz, future, time.perf_counter())
+            self._cond.notify()
+        return future
+
+    def predict(self, frame, imgsz=None, timeout=None, session=None):
+        """프레임 하나를 추론하여 (N, 6) 검출 배열 반환 - 다른 세션의 프레임과 함께 배치 처리됨"""
+        return self.submit(frame, imgsz, session).result(timeout)
+
+    def _collect_batch(self):
+        # 첫 요청은 올 때까지 대기, 이후 시간 창 안에서 최대 배치 크기(또는 살아 있는 세션 수)까지 모일 때까지 대기
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            target = self.max_batch_size
+            if self.active_sessions is not None:
+                target = min(target, max(self.active_sessions(), 1))
+            deadline = time.perf_counter() + self.window
+            while len(self._pending) < target:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # 대기열 앞쪽 세션부터 (세션당 1장이므로 배치가 모든 세션에 고르게 돌아감)
+            batch, expired = [], []
+            now = time.perf_counter()
+            while self._pending and len(batch) < self.max_batch_size:
+                _, (frame, imgsz, future, submitted) = self._pending.popitem(last=False)
+                if self.max_frame_age is not None and now - submitted > self.max_frame_age:
+                    expired.append(future)
+                else:
+                    batch.append((frame, imgsz, future))
+            self.expired += len(expired)
+
+        # 과부하로 너무 오래 기다린 프레임은 추론하지 않음 (세션은 마지막 결과를 재사용)
+        for future in expired:
+            future.set_exception(FrameDropped("대기 시간 초과"))
+        return batch
+
+    def _run_group(self, imgsz, group):
+        frames = [frame for frame, _ in group]
+        start = time.perf_counter()
+        try:
+            results = self.detector.predict_batch(frames, imgsz=imgsz, **self.predict_kwargs)
+        except Exception as e:
+            for _, future in group:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.frames += len(group)
+        stage_timer.record("inference", time.perf_counter() - start)
+        batch_sizes.observe(len(group))
+        for (_, future), result in zip(group, results):
+            future.set_result(result)
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            # 입력 크기(전체 프레임 / 추적 영역)별로 나누어 배치 추론
+            groups = {}
+            for frame, imgsz, future in batch:
+                groups.setdefault(imgsz, []).append((frame, future))
+            for imgsz, group in groups.items():
+                self._run_group(imgsz, group)
+
+inference_service = BatchInferenceService(get_detector, active_sessions=lambda: len(_sessions))
+
+# 움직임 감지 설정 - 화면이 정지해 있으면 YOLO 추론을 생략하고 마지막 검출 결과 재사용
+MOTION_GATE_ENABLED = True
+MOTION_THRESHOLD = 5.0       # 썸네일 픽셀당 평균 차이 (0~255)
+MOTION_MAX_STALENESS = 1.0   # 정지 상태에서도 이 시간(초)마다 다시 추론
+
+# ROI 추적 모드 - 손이 하나 검출되면 이전 박스 주변만 작은 입력 크기로 추론 (선택 사항)
+TRACKING_ENABLED = False
+TRACKING_IMGSZ = 320
+
+# 손 모양 확정 설정 - N 프레임 연속 같은 손 모양일 때 확정하고 일정 시간 결과 유지
+GESTURE_COMMIT_FRAMES = 5
+GESTURE_HOLD_SECONDS = 3.0
+
+# 단계별 시간 계측 (기본은 기록하지 않음, 벤치마크에서 StageTimer로 교체)
+stage_timer = NULL_TIMER
+
+# 전체 세션의 추론 / 생략 횟수
+motion_stats = MotionStats()
+
+# 세션별 출력 프레임 버퍼 수 - 그라디오가 이전 출력을 인코딩하는 동안 다음 프레임은 다른 버퍼에 그림
+FRAME_BUFFERS_PER_SESSION = 2
+
+# 전체 세션의 프레임 처리 / 전체 프레임 크기 버퍼 할당 횟수 (디버그용, 정상 상태에서는 호출당 0)
+frame_alloc_stats = AllocationStats()
+
+# 출력 화면 설정 - 추론 입력 크기와 별개로 브라우저에 보내는 화면의 크기 / 형식 / 품질 / 최대 FPS
+OUTPUT_ENCODING_ENABLED = True   # False이면 그라디오 기본 방식 (원본 크기 numpy → PNG)
+OUTPUT_FORMAT = "jpeg"           # "jpeg" 또는 "webp"
+OUTPUT_QUALITY = 80
+OUTPUT_MAX_WIDTH = 640           # None이면 원본 크기
+OUTPUT_MAX_HEIGHT = None
+OUTPUT_MAX_FPS = 15              # 이보다 자주 들어온 프레임은 처리하지 않음 (None이면 제한 없음)
+OUTPUT_ADAPTIVE_QUALITY = True   # 프레임 처리 시간이 예산을 넘으면 품질을 낮춤
+OUTPUT_FRAME_BUDGET = 0.066      # 프레임 처리 시간 예산 (초)
+OUTPUT_MIN_QUALITY = 50
+
+# 전체 세션의 출력 인코딩 통계
+encoder_stats = EncoderStats()
+
+# 지표 설정 - 켜면 그라디오 서버 옆 별도 포트에 Prometheus 텍스트 형식 /metrics 엔드포인트 실행
+# 끈 상태에서는 아래 지표가 모두 NULL_METRIC / NULL_TIMER이므로 프레임 경로에 기록 비용이 없음
+METRICS_ENABLED = False
+METRICS_PORT = 9100
+
+metrics = MetricsRegistry()
+frame_outcomes = NULL_METRIC   # 분기별 프레임 수 (손 없음 / 여러 손 / 한 손 / justhand / 결과 유지 등)
+move_counts = NULL_METRIC      # 한 손으로 인식된 손 모양 분포
+round_counts = NULL_METRIC     # 확정된 판 수 (사용자 손 모양별)
+session_frames = NULL_METRIC   # 끝난 세션별 처리 프레임 수
+batch_sizes = NULL_METRIC      # 배치 추론 크기
+inference_admission = NULL_METRIC  # 추론 요청 결과 (추론 / 세션 FPS 제한 / 과부하로 버림)
+_sessions = weakref.WeakSet()  # 살아 있는 세션
+
+# 아직 컴퓨터 손 이미지를 보내지 않은 세션 표시
+_NOT_SENT = object()
+
+# 세션(접속한 사용자)별 상태
+class SessionState:
+    def __init__(self):
+        self.motion_gate = MotionGate(MOTION_THRESHOLD, MOTION_MAX_STALENESS, stats=motion_stats)
+        self.tracker = RoiTracker(imgsz=TRACKING_IMGSZ) if TRACKING_ENABLED else None
+        self.gesture = GestureStateMachine(GESTURE_COMMIT_FRAMES, hold_seconds=GESTURE_HOLD_SECONDS)
+        self.frame_buffers = FrameBuffers(FRAME_BUFFERS_PER_SESSION, stats=frame_alloc_stats)
+        self.last_hand = _NOT_SENT
+        self.counts = {"frames": 0}
+        self.next_inference = 0.0   # 세션별 추론 FPS 제한 - 다음 추론이 가능한 시각
+        _sessions.add(self)
+        weakref.finalize(self, _session_closed, self.counts)
+        self.encoder = FrameEncoder(OUTPUT_FORMAT, OUTPUT_QUALITY, OUTPUT_MAX_WIDTH, OUTPUT_MAX_HEIGHT, OUTPUT_MAX_FPS,
+                                    adaptive=OUTPUT_ADAPTIVE_QUALITY, budget=OUTPUT_FRAME_BUDGET,
+                                    min_quality=OUTPUT_MIN_QUALITY, stats=encoder_stats) if OUTPUT_ENCODING_ENABLED else None
+
+    # 세션별 추론 FPS 제한 - 이번 프레임을 추론해도 되는지 (가능하면 다음 추론 시각을 예약)
+    def admit_inference(self, now=None):
+        if not SESSION_INFERENCE_FPS:
+            return True
+        now = time.monotonic() if now is None else now
+        if now < self.next_inference:
+            return False
+        self.next_inference = now + 1.0 / SESSION_INFERENCE_FPS
+        return True
+
+    # 출력 화면 - 인코더가 있으면 축소 / 인코딩한 파일 경로 (그라디오는 PNG로 다시 인코딩하지 않음)
+    def frame_output(self, frame, started):
+        if self.encoder is None:
+            return frame
+        with stage_timer.measure("output"):
+            return self.encoder.encode(frame, started)
+
+    # 컴퓨터 손 이미지가 이전 프레임과 같으면 다시 보내지 않음 (gr.update()는 화면을 그대로 유지)
+    def hand_output(self, computer_hand_img):
+        if computer_hand_img is self.last_hand:
+            return gr.update()
+        self.last_hand = computer_hand_img
+        return computer_hand_img
+
+# 세션 상태가 사라질 때 처리한 프레임 수 기록
+def _session_closed(counts):
+    session_frames.observe(counts["frames"])
+
+# 지표 수집을 켜고 /metrics 엔드포인트 실행 (단계별 시간은 stage_timer를 히스토그램 기록용으로 교체)
+def enable_metrics(port=METRICS_PORT):
+    global stage_timer, frame_outcomes, move_counts, round_counts, session_frames, batch_sizes, inference_admission
+    stage_timer = HistogramTimer(metrics.histogram("rps_stage_seconds", "프레임 처리 단계별 소요 시간 (초)", labels=("stage",)))
+    frame_outcomes = metrics.counter("rps_frames_total", "처리 결과별 프레임 수", labels=("outcome",))
+    move_counts = metrics.counter("rps_moves_total", "한 손으로 인식된 손 모양별 프레임 수", labels=("move",))
+    round_counts = metrics.counter("rps_rounds_total", "확정되어 판정한 판 수", labels=("move",))
+    session_frames = metrics.histogram("rps_session_frames", "끝난 세션별 처리 프레임 수",
+                                       buckets=(10, 100, 1000, 10000, 100000))
+    batch_sizes = metrics.histogram("rps_inference_batch_size", "배치 추론 한 번의 프레임 수",
+                                    buckets=(1, 2, 4, 8, 16, 32))
+    inference_admission = metrics.counter("rps_inference_requests_total", "추론 요청 결과별 프레임 수", labels=("result",))
+
+    # 기존 통계 객체는 수집할 때 읽기만 함
+    metrics.gauge("rps_active_sessions", "살아 있는 세션 수", lambda: len(_sessions))
+    metrics.gauge("rps_model_ready", "모델 준비 완료 여부", lambda: int(ready.is_set()))
+    metrics.gauge("rps_model_info", "현재 모델", lambda: {(registry.current_info.name, registry.current_info.backend or ""): 1}
+                  if registry.current_info is not None else None, labels=("name", "backend"))
+    metrics.gauge("rps_model_swaps_total", "모델 교체 / 되돌리기 횟수", lambda: registry.swaps, kind="counter")
+    metrics.gauge("rps_inference_queue", "배치 추론 대기 중인 세션 수", lambda: inference_service.pending)
+    metrics.gauge("rps_inference_dropped_total", "추론하지 않고 버린 프레임 수",
+                  lambda: {"expired": inference_service.expired},
+                  labels=("reason",), kind="counter")
+    metrics.gauge("rps_motion_frames_total", "움직임 감지 결과별 프레임 수",
+                  lambda: {"inferred": motion_stats.inferred, "skipped": motion_stats.skipped},
+                  labels=("result",), kind="counter")
+    metrics.gauge("rps_output_frames_total", "출력 화면 인코딩 / FPS 제한으로 건너뛴 프레임 수",
+                  lambda: {"encoded": encoder_stats.encoded, "skipped": encoder_stats.skipped},
+                  labels=("result",), kind="counter")
+    metrics.gauge("rps_output_bytes_total", "인코딩한 출력 화면 바이트 수", lambda: encoder_stats.bytes, kind="counter")
+    metrics.gauge("rps_output_quality_changes_total", "적응형 품질 변경 횟수", lambda: encoder_stats.quality_changes, kind="counter")
+    metrics.gauge("rps_frame_allocations_total", "전체 프레임 크기 버퍼 할당 횟수", lambda: frame_alloc_stats.allocations, kind="counter")
+    return start_http_server(metrics, port)
+
+# 세션의 추적 모드에 따라 전체 프레임 또는 추적 영역을 추론
+def detect_hands(frame, session):
+    predict = functools.partial(inference_service.predict, session=session)
+    if session.tracker is None or not session.tracker.usable(get_detector()):
+        return predict(frame)
+    return session.tracker.detect(frame, predict)
+
+# 컴퓨터 손 이미지 설정 - 크기 / 형식별로 한 번만 인코딩해 두고 파일 경로로 전달 (매 프레임 재인코딩 없음)
+HAND_IMAGE_SIZE = (400, 400)
+HAND_IMAGE_FORMAT = "webp"   # "webp" 또는 "png" (WebP가 더 작음)
+hand_assets = HandAssetCache(sizes=[HAND_IMAGE_SIZE], formats=(HAND_IMAGE_FORMAT, "png"))
+
+# 컴퓨터 손 이미지 미리 로드 (성능 향상) - {이름: 인코딩된 이미지 파일 경로}
 hands = {}
 
 def load_hand_images():
-    global hands
-    try:
-        # PIL을 사용하여 이미지 로드 (RGB 형식으로 올바르게 로드)
-        hands["rock"] = Image.open("assets/images/rock.png").convert("RGBA")
-        hands["paper"] = Image.open("assets/images/paper.png").convert("RGBA")
-        hands["scissors"] = Image.open("assets/images/scissors.png").convert("RGBA")
-        hands["default"] = Image.open("assets/images/yolo_c.png").convert("RGBA")
-        hands["none"] = Image.open("assets/images/none.png").convert("RGBA")
-        
-        # 이미지 크기 조정
-        for key in hands:
-            if hands[key] is not None:
-                hands[key] = hands[key].resize((400, 400))
-                # PIL 이미지를 numpy 배열로 변환
-                hands[key] = np.array(hands[key])
-        return True
-    except Exception as e:
-        print(f"손 이미지 로드 중 오류: {e}")
-        return False
+    success = hand_assets.load()
+    for name in hand_assets.names:
+        hands[name] = hand_assets.path(name, HAND_IMAGE_SIZE)
+    return success
 
-# 시작 시 이미지 로드
-load_success = load_hand_images()
 
 # AI 판단 함수 - YOLO v11의 높은 정확도를 활용
 def get_ai_move(user_move):
@@ -63,20 +342,6 @@ def get_ai_move(user_move):
     counter = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
     return counter.get(user_move.lower(), "none")
 
-# 클래스 이름 매핑
-label_map = {
-    "Rock": "rock",
-    "Paper": "paper",
-    "Scissors": "scissors",
-    "rock": "rock",
-    "paper": "paper",
-    "scissors": "scissors",
-    "0": "rock",
-    "1": "paper",
-    "2": "scissors",
-    "3": "justhand"
-}
-
 # 게임 결과 판정 함수
 def determine_winner(user_move, ai_move):
     if user_move == "justhand":
@@ -90,37 +355,190 @@ def determine_winner(user_move, ai_move):
     else:
         return "컴퓨터 승리!"
 
+# 손 이미지 / 고정 문구 스프라이트를 한 번만 로드
+def load_assets():
+    global _assets_loaded
+    if _assets_loaded:
+        return
+    with _init_lock:
+        if _assets_loaded:
+            return
+        if not load_hand_images():
+            print("경고: 일부 이미지를 로드하지 못했습니다. 기본 이미지를 사용합니다.")
+        
+        # 화면에 반복 출력되는 고정 문구는 미리 렌더링
+        preload_texts(
+            [("손을 인식하지 못했어요.", 30, (100, 100, 100)),
+             ("손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.", 30, (0, 0, 255)),
+             ("컴퓨터: 승리!", 30, (0, 0, 255)),
+             ("판정패! (허용되지 않는 손 모양)", 30, (255, 0, 0)),
+             ("모델 준비 중입니다... 잠시만 기다려 주세요.", 30, (255, 165, 0))]
+            + [(f"컴퓨터: {move}", 30, (0, 0, 255)) for move in ("rock", "paper", "scissors")]
+            + [(text, 30, (255, 165, 0)) for text in ("무승부!", "사용자 승리!", "컴퓨터 승리!")]
+        )
+        _assets_loaded = True
+
+# 모델 / 이미지 로드 후 더미 프레임으로 워밍업 추론 (첫 실제 요청의 지연 제거)
+def warmup():
+    global _warmup_error
+    try:
+        start = time.perf_counter()
+        load_assets()
+        get_detector()
+        if WARMUP_ENABLED:
+            dummy = np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+            inference_service.predict(dummy)
+            if TRACKING_ENABLED:
+                inference_service.predict(dummy, TRACKING_IMGSZ)
+        _warmup_error = None
+        ready.set()
+        print(f"준비 완료 ({time.perf_counter() - start:.2f}초)")
+    except Exception as e:
+        _warmup_error = e
+        print(f"모델 준비 중 오류: {e}")
+
+# 백그라운드 워밍업 시작 (이미 진행 중이거나 끝났으면 무시, 실패한 경우 다시 시도)
+def start_warmup():
+    global _warmup_thread
+    with _init_lock:
+        if ready.is_set() or (_warmup_thread is not None and _warmup_thread.is_alive()):
+            return
+        _warmup_thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+        _warmup_thread.start()
+
+def is_ready():
+    return ready.is_set()
+
+# 화면 문구 목록 [(text, position, color), ...] 출력
+def draw_text_lines(frame, lines):
+    with stage_timer.measure("overlay"):
+        for text, position, color in lines:
+            frame = put_korean_text(frame, text, position, font_size=30, color=color)
+    return frame
+
+# 확정된 손 모양으로 승패를 판정하여 (화면 문구 목록, 컴퓨터 손 이미지, 결과 텍스트) 반환
+def judge_committed_move(user_move, conf):
+    # 사용자 움직임에 대응하는 AI 움직임 선택
+    if user_move == "justhand":
+        # 판정패 메시지
+        verdict = "판정패! (허용되지 않는 손 모양)"
+        lines = [(f"사용자: {user_move} ({conf:.2f})", (30, 40), (0, 255, 0)),
+                 ("컴퓨터: 승리!", (30, 80), (0, 0, 255)),
+                 (verdict, (30, 120), (255, 0, 0))]
+        result_text = f"사용자: {user_move} ({conf:.2f}) vs 컴퓨터: 승리 - {verdict}"
+        
+        # 컴퓨터 손 이미지는 yolo_c.png 사용
+        computer_hand_img = hands["default"]
+    else:
+        ai_move = get_ai_move(user_move)
+        
+        # 승패 결정
+        verdict = determine_winner(user_move, ai_move)
+        lines = [(f"사용자: {user_move} ({conf:.2f})", (30, 40), (0, 255, 0)),
+                 (f"컴퓨터: {ai_move}", (30, 80), (0, 0, 255)),
+                 (verdict, (30, 120), (255, 165, 0))]
+        result_text = f"사용자: {user_move} ({conf:.2f}) vs 컴퓨터: {ai_move} - {verdict}"
+        
+        # 컴퓨터 손 이미지 선택
+        computer_hand_img = hands[ai_move] if ai_move in hands else hands["default"]
+    return lines, computer_hand_img, result_text
+
+# 모델 관리 - 선택한 모델을 백그라운드에서 로드 후 교체 (스트림은 끊기지 않음)
+def swap_model(name):
+    if not name:
+        return registry.status()
+    try:
+        registry.load(name)
+        message = f"{name} 모델을 로드하는 중입니다. 완료되면 자동으로 교체됩니다."
+    except (RuntimeError, FileNotFoundError) as e:
+        message = str(e)
+    return f"{message}\n{registry.status()}"
+
+def rollback_model():
+    info = registry.rollback()
+    message = f"{info.name} 모델로 되돌렸습니다." if info else "되돌릴 이전 모델이 없습니다."
+    return f"{message}\n{registry.status()}"
+
+def refresh_models():
+    return gr.update(choices=list(registry.models())), registry.status()
+
 # 웹캠 처리 함수 - YOLO v11 모델 활용
-def process_webcam(webcam_image):
+def process_webcam(webcam_image, session=None):
+    if session is None:
+        session = SessionState()
     if webcam_image is None:
-        return None, None, "웹캠을 연결해주세요."
+        frame_outcomes.inc("no_input")
+        return None, None, "웹캠을 연결해주세요.", session
     
-    # 웹캠 이미지 좌우 반전 (거울 효과)
-    frame = cv2.flip(webcam_image.copy(), 1)
+    # 최대 출력 FPS보다 자주 들어온 프레임은 처리하지 않고 이전 화면 유지
+    if session.encoder is not None and session.encoder.should_skip():
+        frame_outcomes.inc("fps_limited")
+        return gr.update(), gr.update(), gr.update(), session
+    started = time.perf_counter()
+    session.counts["frames"] += 1
     
-    # YOLO v11 모델 예측 - 향상된 신뢰도 설정
-    results = model.predict(frame, conf=0.5, iou=0.45)
-    result = results[0]
+    # 웹캠 이미지 좌우 반전 (거울 효과) - 입력은 그대로 두고 세션 버퍼에 바로 반전
+    # 이후 바운딩 박스 / 텍스트는 모두 이 버퍼에 제자리로 그림 (프레임 복사 없음)
+    frame_alloc_stats.add_call()
+    with stage_timer.measure("flip"):
+        frame = cv2.flip(webcam_image, 1, dst=session.frame_buffers.next(webcam_image.shape, webcam_image.dtype))
+    
+    # 모델 로드 / 워밍업이 끝나기 전에는 추론하지 않고 준비 중 안내만 출력
+    if not ready.is_set():
+        start_warmup()
+        frame_outcomes.inc("not_ready")
+        if _warmup_error is not None:
+            return session.frame_output(frame, started), session.hand_output(None), f"모델을 준비하지 못했습니다: {_warmup_error}", session
+        frame = put_korean_text(frame, "모델 준비 중입니다... 잠시만 기다려 주세요.", (30, 40), font_size=30, color=(255, 165, 0))
+        return session.frame_output(frame, started), session.hand_output(None), "모델 준비 중입니다... 잠시만 기다려 주세요.", session
     
-    # 결과 처리
-    boxes = result.boxes
-    num_objects = len(boxes)
+    # 손 모양이 확정되어 결과를 유지하는 동안에는 추론 / 판정 없이 확정 화면만 출력
+    gesture = session.gesture
+    if gesture.is_committed():
+        frame_outcomes.inc("hold")
+        lines, computer_hand_img, result_text = gesture.view
+        return session.frame_output(draw_text_lines(frame, lines), started), session.hand_output(computer_hand_img), result_text, session
+    
+    # YOLO v11 모델 예측 - 향상된 신뢰도 설정
+    # 동시 접속한 다른 세션의 프레임과 함께 배치로 추론 (화면이 정지해 있으면 이전 결과 재사용)
+    # 세션별 추론 FPS 제한에 걸리면 마지막 결과 재사용, 서버 과부하로 버려진 프레임도 마지막 결과 재사용
+    gate = session.motion_gate
+    if gate.last_result is not None and not session.admit_inference():
+        inference_admission.inc("throttled")
+        dets = gate.last_result
+    elif not MOTION_GATE_ENABLED or gate.should_infer(frame):
+        try:
+            with stage_timer.measure("predict"):
+                dets = gate.remember(detect_hands(frame, session))
+            inference_admission.inc("inferred")
+        except FrameDropped:
+            inference_admission.inc("dropped")
+            dets = gate.last_result if gate.last_result is not None else empty_detections()
+    else:
+        dets = gate.last_result
     
     # 손 객체 인식 결과 처리
-    if num_objects == 0:
+    outcome = classify(dets)
+    if outcome == NO_HAND:
         # 손 객체가 없는 경우
-        frame = put_korean_text(frame, "손을 인식하지 못했어요.", (30, 40), font_size=30, color=(100, 100, 100))
+        frame_outcomes.inc(outcome)
+        gesture.update(None)
+        with stage_timer.measure("overlay"):
+            frame = put_korean_text(frame, "손을 인식하지 못했어요.", (30, 40), font_size=30, color=(100, 100, 100))
         result_text = "손을 인식하지 못했어요. 손 모양을 카메라에 보여주세요."
         
         # 기본 이미지 표시
         computer_hand_img = hands["default"] if "default" in hands else None
-    elif num_objects > 1:
+    elif outcome == MULTIPLE_HANDS:
         # 2개 이상의 손 객체가 인식된 경우
+        frame_outcomes.inc(outcome)
+        gesture.update(None)
         # 바운딩 박스 그리기
-        annotated_frame = result.plot()
-        frame = annotated_frame
+        with stage_timer.measure("plot"):
+            frame = draw_detections(frame, dets, get_detector().names)
         
-        frame = put_korean_text(frame, "손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.", (30, 40), font_size=30, color=(0, 0, 255))
+        with stage_timer.measure("overlay"):
+            frame = put_korean_text(frame, "손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.", (30, 40), font_size=30, color=(0, 0, 255))
         result_text = "손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요."
         
         # 기본 이미지 표시
@@ -128,48 +546,31 @@ def process_webcam(webcam_image):
     else:
         # 정상적으로 하나의 손 객체만 인식된 경우
         # 바운딩 박스 그리기
-        annotated_frame = result.plot()
-        frame = annotated_frame
+        with stage_timer.measure("plot"):
+            frame = draw_detections(frame, dets, get_detector().names)
         
-        best_idx = boxes.conf.argmax().item()
-        label_id = int(boxes.cls[best_idx])
-        conf = float(boxes.conf[best_idx])
+        # 검출 배열은 신뢰도 내림차순 정렬
+        conf = float(dets[0, CONF])
         
-        # 클래스 이름 가져오기
-        class_name = result.names.get(label_id, "unknown")
+        # 클래스 ID → 손 모양 (모델 클래스 목록별 조회 테이블)
+        user_move = move_table(get_detector().names).move(dets[0, CLS])
+        frame_outcomes.inc("justhand" if user_move == "justhand" else outcome)
+        move_counts.inc(user_move)
         
-        # 클래스 이름 매핑
-        user_move = label_map.get(class_name, class_name.lower())
-        
-        # 사용자 움직임에 대응하는 AI 움직임 선택
-        if user_move == "justhand":
-            # 화면에 텍스트 출력
-            frame = put_korean_text(frame, f"사용자: {user_move} ({conf:.2f})", (30, 40), font_size=30, color=(0, 255, 0))
-            frame = put_korean_text(frame, "컴퓨터: 승리!", (30, 80), font_size=30, color=(0, 0, 255))
-            
-            # 판정패 메시지
-            result_text = "판정패! (허용되지 않는 손 모양)"
-            frame = put_korean_text(frame, result_text, (30, 120), font_size=30, color=(255, 0, 0))
-            result_text = f"사용자: {user_move} ({conf:.2f}) vs 컴퓨터: 승리 - {result_text}"
-            
-            # 컴퓨터 손 이미지는 yolo_c.png 사용
-            computer_hand_img = hands["default"]
+        # 연속 프레임으로 손 모양이 확정될 때만 승패 판정
+        if gesture.update(user_move, conf) == COMMITTED:
+            round_counts.inc(gesture.move)
+            gesture.view = judge_committed_move(gesture.move, gesture.conf)
+            lines, computer_hand_img, result_text = gesture.view
+            frame = draw_text_lines(frame, lines)
         else:
-            ai_move = get_ai_move(user_move)
-        
-        # 화면에 텍스트 출력
-            frame = put_korean_text(frame, f"사용자: {user_move} ({conf:.2f})", (30, 40), font_size=30, color=(0, 255, 0))
-            frame = put_korean_text(frame, f"컴퓨터: {ai_move}", (30, 80), font_size=30, color=(0, 0, 255))
-        
-        # 승패 결정
-            result_text = determine_winner(user_move, ai_move)
-            frame = put_korean_text(frame, result_text, (30, 120), font_size=30, color=(255, 165, 0))
-            result_text = f"사용자: {user_move} ({conf:.2f}) vs 컴퓨터: {ai_move} - {result_text}"
-        
-        # 컴퓨터 손 이미지 선택
-            computer_hand_img = hands[ai_move] if ai_move in hands else hands["default"]
+            with stage_timer.measure("overlay"):
+                frame = put_korean_text(frame, f"사용자: {user_move} ({conf:.2f})", (30, 40), font_size=30, color=(0, 255, 0))
+                frame = put_korean_text(frame, f"손 모양 인식 중... ({gesture.progress}/{gesture.commit_frames})", (30, 80), font_size=30, color=(255, 165, 0))
+            result_text = "손 모양 인식 중... 손을 그대로 유지해 주세요."
+            computer_hand_img = hands["default"]
     
-    return frame, computer_hand_img, result_text
+    return session.frame_output(frame, started), session.hand_output(computer_hand_img), result_text, session
 
 # CSS 스타일 정의 - 그라디오 3.50.2 호환
 css = """
@@ -201,16 +602,35 @@ with gr.Blocks(title="절대 이길 수 없는 가위바위보 게임", css=css,
     # 결과 출력 영역
     result_text = gr.Textbox(label="게임 결과", value="손 모양을 카메라에 보여주세요.")
     
+    # 세션별 상태 (움직임 감지 등)
+    session = gr.State()
+    
     # 이벤트 연결 - 그라디오 3.50.2 스트리밍 문법
     webcam.stream(
         fn=process_webcam,
-        inputs=[webcam],
-        outputs=[webcam, computer_hand, result_text],
+        inputs=[webcam, session],
+        outputs=[webcam, computer_hand, result_text, session],
         show_progress=False,
         preprocess=True,
         postprocess=True
     )
     
+    # 모델 관리 (선택 사항)
+    if MODEL_ADMIN_ENABLED:
+        with gr.Accordion("모델 관리", open=False):
+            model_choice = gr.Dropdown(choices=list(registry.models()), label="모델")
+            with gr.Row():
+                load_button = gr.Button("불러오기")
+                rollback_button = gr.Button("되돌리기")
+                refresh_button = gr.Button("새로고침")
+            model_status = gr.Textbox(label="모델 상태", lines=4, interactive=False)
+        load_button.click(fn=swap_model, inputs=model_choice, outputs=model_status)
+        rollback_button.click(fn=rollback_model, inputs=None, outputs=model_status)
+        refresh_button.click(fn=refresh_models, inputs=None, outputs=[model_choice, model_status])
+    
+    # 페이지를 열면 (아직 시작하지 않았다면) 백그라운드 워밍업 시작
+    demo.load(fn=start_warmup, inputs=None, outputs=None)
+    
     gr.HTML("""
     <div style="text-align: center; margin-top: 20px;">
         <h2>🎲 게임 방법</h2>
@@ -224,9 +644,15 @@ with gr.Blocks(title="절대 이길 수 없는 가위바위보 게임", css=css,
 
 # 그라디오 앱 실행 - 추가 옵션 설정
 if __name__ == "__main__":
-    # 이미지 미리 로드 확인
-    if not load_success:
-        print("경고: 일부 이미지를 로드하지 못했습니다. 기본 이미지를 사용합니다.")
+    # 서버가 뜨는 동안 백그라운드에서 모델 / 이미지 로드 및 워밍업
+    start_warmup()
+    
+    # 지표 엔드포인트 (그라디오 서버와 별도 포트)
+    if METRICS_ENABLED:
+        enable_metrics(METRICS_PORT)
+    
+    # 여러 세션의 스트림 요청을 동시에 처리해야 배치 추론이 효과를 가짐
+    demo.queue(concurrency_count=QUEUE_CONCURRENCY)
     
     # 그라디오 3.50.2 실행 옵션
     demo.launch(
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+프레임 처리 경로 벤치마크
+
+카메라나 화면 없이 test_img/ 이미지(또는 녹화된 영상)를 다음 두 경로로 재생합니다.
+- app: Gradio 스트림 콜백과 같은 app.process_webcam 경로 (+ 그라디오와 같은 PNG/base64 인코딩)
+- demo: demo.main()의 추론 스레드(inference_loop / pooled_inference_loop)와 렌더링 본문
+  (반전 → 추론 → 렌더링 → 출력용 인코딩, --track / --workers로 ROI 추적 / 워커 프로세스 모드 측정)
+
+단계별(decode, flip, predict, inference, plot, overlay, render, encode) 지연 시간 백분위수, FPS, 최대 메모리(RSS)를 출력하고
+모델 파일이나 코드 변경 간 성능 저하를 비교할 수 있도록 JSON으로 저장합니다.
+
+사용법:
+    python benchmark.py
+    python benchmark.py --video session.mp4 --frames 500 --paths demo --output bench.json
+    python benchmark.py --paths demo --workers 2
+"""
+import argparse
+import base64
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from pipeline import StageTimer
+
+IMAGE_EXTS = ("*.jpg", "*.jpeg", "*.png")
+STAGE_ORDER = ("decode", "flip", "predict", "inference", "plot", "overlay", "output", "render", "encode")
+
+# app 경로 실행 중 모은 추가 지표 (보고서에 함께 기록)
+app_stats = {}
+# demo 경로를 워커 프로세스 모드로 실행했을 때의 모델 정보 (이 프로세스에서는 모델을 로드하지 않음)
+pool_model = {}
+
+
+def peak_rss_mb():
+    """프로세스 최대 메모리 사용량(MB), 확인할 수 없으면 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 바이트 단위
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def image_source(folder):
+    """폴더 이미지를 인코딩된 상태로 메모리에 읽어 둠 (디스크 I/O는 측정에서 제외)"""
+    files = []
+    for ext in IMAGE_EXTS:
+        files.extend(glob.glob(os.path.join(folder, ext)))
+    buffers = []
+    for path in sorted(files):
+        with open(path, "rb") as f:
+            buffers.append(np.frombuffer(f.read(), dtype=np.uint8))
+    if not buffers:
+        raise FileNotFoundError(f"이미지를 찾을 수 없음: {folder}")
+    return buffers
+
+
+def iter_frames(args, timer):
+    """decode 단계를 계측하며 BGR 프레임을 frames개 생성 (이미지/영상은 반복 재생)"""
+    produced = 0
+    if args.video:
+        while produced < args.frames:
+            cap = cv2.VideoCapture(args.video)
+            if not cap.isOpened():
+                raise FileNotFoundError(f"영상을 열 수 없음: {args.video}")
+            while produced < args.frames:
+                with timer.measure("decode"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                produced += 1
+                yield frame
+            cap.release()
+            if produced == 0:
+                raise ValueError(f"영상에서 프레임을 읽을 수 없음: {args.video}")
+    else:
+        buffers = image_source(args.images)
+        while produced < args.frames:
+            buf = buffers[produced % len(buffers)]
+            with timer.measure("decode"):
+                frame = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+            produced += 1
+            yield frame
+
+
+# 그라디오 3.x가 numpy 이미지 출력을 전송할 때와 같은 방식 (PNG → base64)
+def encode_like_gradio(img):
+    buffer = io.BytesIO()
+    Image.fromarray(img).save(buffer, format="png")
+    return base64.b64encode(buffer.getvalue())
+
+
+# 그라디오 이미지 출력 전송 비용 - numpy는 PNG 인코딩, 파일 경로는 파일을 읽어 base64로만 변환,
+# gr.update() 딕셔너리(이전 출력 유지)는 전송할 것이 없음
+def send_like_gradio(value):
+    if isinstance(value, np.ndarray):
+        return encode_like_gradio(value)
+    if isinstance(value, str):
+        with open(value, "rb") as f:
+            return base64.b64encode(f.read())
+    return None
+
+
+def run_app_path(args, timer):
+    import app
+
+    # 모델 로드 / 워밍업은 측정에서 제외
+    app.warmup()
+    if not app.is_ready():
+        raise RuntimeError("앱 모델을 준비하지 못했습니다.")
+    app.stage_timer = timer
+    if args.batch_window_ms is not None:
+        app.inference_service.window = args.batch_window_ms / 1000.0
+    if args.no_motion_gate:
+        app.MOTION_GATE_ENABLED = False
+    if not args.keep_hold:
+        # 확정 결과 유지 중에는 추론이 생략되므로 기본적으로 매 프레임 전체 경로를 측정
+        app.GESTURE_HOLD_SECONDS = 0.0
+
+    # 최대 출력 FPS / 세션별 추론 FPS 제한은 끄고 매 프레임 측정 (재생 속도가 카메라보다 빠름)
+    app.OUTPUT_MAX_FPS = None
+    app.SESSION_INFERENCE_FPS = None
+
+    session = app.SessionState()
+    frames = 0
+    sent_bytes = 0
+    start = time.perf_counter()
+    for frame in iter_frames(args, timer):
+        # 그라디오는 웹캠 이미지를 RGB로 전달
+        with timer.measure("decode"):
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with timer.measure("total"):
+            output, computer_hand, _, session = app.process_webcam(rgb, session)
+            with timer.measure("encode"):
+                sent = send_like_gradio(output)
+                send_like_gradio(computer_hand)
+        if sent is not None:
+            sent_bytes += len(sent)
+        frames += 1
+        if frames == args.warmup:
+            timer.reset()
+            app.frame_alloc_stats.reset()
+            sent_bytes = 0
+            start = time.perf_counter()
+    app_stats["sent_kb_per_frame"] = sent_bytes / max(frames - args.warmup, 1) / 1024
+    return frames - args.warmup, time.perf_counter() - start
+
+
+def max_frame_shape(args):
+    """재생할 프레임 중 가장 큰 (h, w, 3) - 워커 풀의 공유 메모리 슬롯 크기 (측정 전에 계산)"""
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        cap.release()
+        return shape
+    shapes = [cv2.imdecode(buf, cv2.IMREAD_COLOR).shape[:2] for buf in image_source(args.images)]
+    return (max(h for h, _ in shapes), max(w for _, w in shapes), 3)
+
+
+def run_demo_path(args, timer):
+    """
+    demo.main()과 같은 추론 스레드(inference_loop / pooled_inference_loop)와 렌더링 본문을 실행
+    카메라 대신 재생 프레임을 BLOCK 큐로 전달하므로 프레임을 버리지 않고 모두 측정
+    """
+    import threading
+    import demo
+    from gesture import GestureStateMachine
+    from motion import MotionGate
+    from pipeline import StageQueue, BLOCK
+    from tracking import RoiTracker, ROI_IMGSZ
+
+    # 모델 로드 / 워커 시작은 측정에서 제외
+    pool = None
+    if args.workers > 0:
+        from workers import InferenceWorkerPool
+        pool = InferenceWorkerPool(demo.MODEL_PATH, args.workers, frame_shape=max_frame_shape(args),
+                                   conf=demo.registry.conf, iou=demo.registry.iou)
+        pool_model.update(path=demo.MODEL_PATH, backend=pool.backend_name)
+        # demo.main()과 같이 클래스 이름을 워커에서 받아 씀 (렌더링 중 이 프로세스에서 모델을 로드하지 않도록)
+        demo.inference_pool = pool
+    else:
+        demo.get_detector()
+
+    demo.stage_timer = timer
+    gesture = GestureStateMachine(hold_seconds=demo.HOLD_SECONDS if args.keep_hold else 0.0)
+    motion_gate = None if args.no_motion_gate else MotionGate()
+    # 워커 프로세스 모드에서는 demo.main()과 같이 ROI 추적을 사용하지 않음
+    tracker = RoiTracker(imgsz=ROI_IMGSZ) if args.track and pool is None else None
+
+    stop_event = threading.Event()
+    frame_queue = StageQueue(maxsize=2, drop_policy=BLOCK)
+    result_queue = StageQueue(maxsize=2, drop_policy=BLOCK)
+    if pool is not None:
+        inference_thread = threading.Thread(target=demo.pooled_inference_loop, args=(frame_queue, result_queue, timer, stop_event, pool, motion_gate, gesture), daemon=True)
+    else:
+        inference_thread = threading.Thread(target=demo.inference_loop, args=(frame_queue, result_queue, timer, stop_event, motion_gate, tracker, gesture), daemon=True)
+
+    # demo.capture_loop 대신 재생 프레임을 전달 (decode 단계 계측)
+    def feed():
+        for frame in iter_frames(args, timer):
+            if not frame_queue.put((time.perf_counter(), frame)):
+                break
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    inference_thread.start()
+    feeder.start()
+
+    frames = 0
+    start = time.perf_counter()
+    try:
+        # demo.main 렌더링 / 출력 본문 (cv2.imshow 대신 JPEG 인코딩)
+        while frames < args.frames:
+            item = result_queue.get(timeout=1.0)
+            if item is None:
+                if not inference_thread.is_alive():
+                    raise RuntimeError("추론 스레드가 종료되었습니다.")
+                continue
+            captured_at, frame, dets = item
+            with timer.measure("render"):
+                annotated_frame = demo.render_result(frame, dets, gesture)
+            with timer.measure("encode"):
+                cv2.imencode(".jpg", annotated_frame)
+            timer.record("total", time.perf_counter() - captured_at)
+            frames += 1
+            if frames == args.warmup:
+                timer.reset()
+                start = time.perf_counter()
+        return frames - args.warmup, time.perf_counter() - start
+    finally:
+        stop_event.set()
+        frame_queue.close()
+        result_queue.close()
+        feeder.join(timeout=1.0)
+        inference_thread.join(timeout=1.0)
+        if pool is not None:
+            pool.close()
+            demo.inference_pool = None
+
+
+def print_path_report(name, report):
+    print(f"\n[{name}] {report['frames']}프레임, {report['fps']:.1f} FPS")
+    stages = report["stages"]
+    for stage in STAGE_ORDER + ("total",):
+        if stage in stages:
+            s = stages[stage]
+            print(f"  {stage:<8} 평균 {s['mean_ms']:7.2f} ms | p50 {s['p50_ms']:7.2f} | "
+                  f"p95 {s['p95_ms']:7.2f} | p99 {s['p99_ms']:7.2f} | 최대 {s['max_ms']:7.2f} ({s['count']}회)")
+    if "frame_allocations_per_call" in report:
+        print(f"  프레임 버퍼 할당: 호출당 {report['frame_allocations_per_call']:.3f}회")
+    if "sent_kb_per_frame" in report:
+        print(f"  출력 화면 전송량: 프레임당 {report['sent_kb_per_frame']:.1f} KB (base64)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프레임 처리 경로 벤치마크 (카메라 / 화면 불필요)")
+    parser.add_argument("--images", default="test_img", help="재생할 이미지 폴더")
+    parser.add_argument("--video", help="재생할 영상 파일 (지정하면 이미지 대신 사용)")
+    parser.add_argument("--frames", type=int, default=200, help="측정할 프레임 수 (워밍업 제외)")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 프레임 수")
+    parser.add_argument("--paths", default="app,demo", help="측정할 경로 (app, demo 쉼표 구분)")
+    parser.add_argument("--batch-window-ms", type=float, help="app 경로 배치 대기 시간 (ms, 기본: app.py 설정)")
+    parser.add_argument("--no-motion-gate", action="store_true", help="움직임 감지 끄기 (매 프레임 추론)")
+    parser.add_argument("--track", action="store_true", help="demo 경로 ROI 추적 모드 (이전 손 주변만 추론)")
+    parser.add_argument("--workers", type=int, default=0, help="demo 경로 추론 워커 프로세스 수 (0이면 단일 프로세스)")
+    parser.add_argument("--keep-hold", action="store_true", help="확정 결과 유지 시간 적용 (기본은 매 프레임 전체 경로 측정)")
+    parser.add_argument("--verbose", action="store_true", help="경로 내부 콘솔 출력 표시")
+    parser.add_argument("--output", default="benchmark.json", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+    args.frames += args.warmup
+
+    runners = {"app": run_app_path, "demo": run_demo_path}
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    for path in paths:
+        if path not in runners:
+            parser.error(f"알 수 없는 경로: {path} (사용 가능: {', '.join(runners)})")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "source": args.video or args.images,
+        "warmup": args.warmup,
+        "motion_gate": not args.no_motion_gate,
+        "track": args.track,
+        "workers": args.workers,
+        "paths": {},
+    }
+
+    for path in paths:
+        timer = StageTimer(window=None)
+        output = sys.stdout if args.verbose else open(os.devnull, "w")
+        try:
+            with contextlib.redirect_stdout(output):
+                frames, elapsed = runners[path](args, timer)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        stages = timer.summary()
+        for stage in stages.values():
+            stage.pop("fps", None)
+        report["paths"][path] = {
+            "frames": frames,
+            "seconds": elapsed,
+            "fps": frames / elapsed if elapsed > 0 else 0.0,
+            "stages": stages,
+        }
+        if path == "app":
+            # process_webcam 호출당 전체 프레임 크기 버퍼 할당 횟수 (워밍업 이후, 정상이면 0)
+            report["paths"][path]["frame_allocations_per_call"] = sys.modules["app"].frame_alloc_stats.per_call
+            report["paths"][path].update(app_stats)
+        print_path_report(path, report["paths"][path])
+
+    # 모델 정보 (경로 실행 중 로드된 검출기 기준, 워커 프로세스 모드는 워커의 백엔드)
+    for module_name in ("app", "demo"):
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        if module_name == "demo" and pool_model:
+            report["model"] = dict(pool_model)
+            break
+        detector = module.get_detector() if hasattr(module, "get_detector") else getattr(module, "detector", None)
+        if detector is not None:
+            report["model"] = {"path": detector.model_path, "backend": detector.backend_name}
+            break
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    if report["peak_rss_mb"] is not None:
+        print(f"\n최대 메모리(RSS): {report['peak_rss_mb']:.1f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장됨: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
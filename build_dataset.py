@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+"""
+학습용 데이터셋 빌드 (병합 / 클래스 재매핑 / 층화 분할 / 증강 / data.yaml)
+
+collected_data와 추가 데이터셋 폴더 또는 zip 파일(압축을 풀지 않고 읽음)의 이미지 / YOLO 라벨을 모아
+postprocess.CLASS_MAP 클래스 ID로 맞춘 뒤, 클래스별 비율을 유지하여 train / valid / test로 나누고
+train 이미지마다 증강 이미지를 만들어 rsp_data 폴더(YOLO 형식)와 data.yaml을 생성합니다.
+
+- 소스에 data.yaml(names)이 있으면 클래스 이름으로 재매핑하고, 없으면 이미 CLASS_MAP ID라고 봅니다.
+  (`경로=rock,paper,scissors`처럼 소스별 클래스 이름 목록을 직접 지정할 수 있음)
+- 출력 파일 이름은 이미지 + 재매핑된 라벨 내용의 해시이므로 다시 실행하면 새로 추가되거나 바뀐 샘플만 처리하고,
+  분할이 바뀐 샘플은 파일을 옮기기만 하며, 더 이상 없는 샘플의 출력은 삭제합니다. 내용이 같은 샘플은 하나만 남깁니다.
+- 해시 계산과 디코딩 / 증강 / 저장은 프로세스 풀에서 실행합니다. 소스 파일 해시는 수정 시각 / 크기로 캐시합니다.
+- 증강은 OpenCV로 하며(밝기·대비 / 블러 / HSV / 회전 / 이동·확대·회전), 회전·이동 증강은 라벨 박스도 함께 변환합니다.
+  증강 난수는 샘플 해시에서 정해지므로 같은 입력이면 항상 같은 결과가 나옵니다.
+
+사용법:
+    python build_dataset.py                                    # collected_data → rsp_data
+    python build_dataset.py collected_data extra/4class_data.zip rock-paper-scissors_1.zip --output rsp_data
+    python build_dataset.py collected_data old_data=rock,paper,scissors --augment 3 --workers 8
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import multiprocessing.util as mp_util
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from postprocess import CLASS_MAP, to_move, convert_bbox_to_yolo
+
+SOURCES = ["collected_data"]
+OUTPUT_DIR = "rsp_data"
+SPLITS = ("train", "valid", "test")
+SPLIT_RATIOS = (0.6, 0.2, 0.2)
+AUGMENT_COPIES = 5            # 원본 한 장당 증강 이미지 수
+AUGMENT_SPLITS = ("train",)   # 증강 이미지를 만들 분할
+SEED = 42
+JPEG_QUALITY = 95
+CHUNK_SIZE = 16               # 워커 프로세스에 한 번에 넘기는 작업 수
+PROGRESS_EVERY = 500          # 진행 상황 출력 간격 (샘플 수)
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+LABEL_DIRS = {"images": "labels", "img": "label"}   # 이미지 폴더 이름 → 라벨 폴더 이름
+CACHE_FILE = ".build_cache.json"
+CACHE_VERSION = 1
+
+# 증강 설정 (바꾸면 증강 파일 이름이 달라져 다시 생성됨)
+BRIGHTNESS_LIMIT = 0.2
+CONTRAST_LIMIT = 0.2
+BLUR_KERNELS = (3, 5, 7)
+HUE_SHIFT = 5                 # OpenCV 색조 단위 (0~180)
+SAT_SCALE = 0.4
+VAL_SCALE = 0.3
+ROTATE_LIMIT = 20
+SSR_SHIFT = 0.1
+SSR_SCALE = 0.1
+SSR_ROTATE = 15
+MIN_BOX_PIXELS = 2            # 변환 후 이보다 작은 박스는 제외
+
+
+# ---------------------------------------------------------------------------
+# 소스 읽기 (폴더 또는 zip)
+
+_zip_files = {}   # 프로세스별로 열어 둔 zip 파일 (build 종료 / 워커 프로세스 종료 시 닫음)
+
+
+def _read(source, member):
+    if source.endswith(".zip"):
+        zf = _zip_files.get(source)
+        if zf is None:
+            zf = _zip_files[source] = zipfile.ZipFile(source)
+        return zf.read(member)
+    with open(os.path.join(source, member), "rb") as f:
+        return f.read()
+
+
+def _close_zip_files():
+    while _zip_files:
+        _, zf = _zip_files.popitem()
+        zf.close()
+
+
+def _list_files(source):
+    """소스 안의 {상대 경로(/ 구분): 변경 확인용 서명}"""
+    if source.endswith(".zip"):
+        with zipfile.ZipFile(source) as zf:
+            return {info.filename: (info.CRC, info.file_size) for info in zf.infolist() if not info.is_dir()}
+    files = {}
+    for root, _, names in os.walk(source):
+        for name in names:
+            path = os.path.join(root, name)
+            st = os.stat(path)
+            files[os.path.relpath(path, source).replace(os.sep, "/")] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def _read_yaml_names(data):
+    """data.yaml 내용의 names (목록 또는 {id: 이름}), 읽을 수 없으면 None"""
+    try:
+        import yaml
+    except ImportError:
+        print("경고: PyYAML이 없어 data.yaml의 클래스 이름을 읽지 않습니다.")
+        return None
+    names = (yaml.safe_load(data) or {}).get("names")
+    if isinstance(names, list):
+        return dict(enumerate(names))
+    if isinstance(names, dict):
+        return {int(k): v for k, v in names.items()}
+    return None
+
+
+def class_remap(names):
+    """소스 클래스 이름 {id: 이름} → {소스 ID: CLASS_MAP ID} (매핑할 수 없는 클래스는 -1)"""
+    return {class_id: CLASS_MAP.get(to_move(str(name)), -1) for class_id, name in names.items()}
+
+
+def discover(source, names=None):
+    """
+    소스의 (이미지, 라벨) 쌍 목록과 클래스 재매핑 표
+
+    이미지 옆의 .txt, 또는 images/ → labels/, img/ → label/ 폴더 구조의 라벨을 찾습니다.
+    라벨이 없는 이미지(collected_data/bbox_i 미리보기 등)는 제외합니다.
+    """
+    files = _list_files(source)
+    if names is None:
+        yaml_files = sorted((f for f in files if os.path.basename(f) in ("data.yaml", "data.yml")), key=len)
+        if yaml_files:
+            names = _read_yaml_names(_read(source, yaml_files[0]))
+    remap = class_remap(names) if names else None
+    if remap and -1 in remap.values():
+        unknown = [names[k] for k, v in remap.items() if v < 0]
+        print(f"경고: {source}의 클래스 {unknown}는 {list(CLASS_MAP)}에 없어 제외합니다.")
+
+    pairs = []
+    for member in sorted(files):
+        stem, ext = os.path.splitext(member)
+        if ext.lower() not in IMAGE_EXTS:
+            continue
+        parts = stem.split("/")
+        candidates = [stem + ".txt"]
+        if len(parts) > 1 and parts[-2] in LABEL_DIRS:
+            candidates.append("/".join(parts[:-2] + [LABEL_DIRS[parts[-2]], parts[-1]]) + ".txt")
+        label = next((c for c in candidates if c in files), None)
+        if label is not None:
+            pairs.append((member, label, (files[member], files[label])))
+    return pairs, remap
+
+
+# ---------------------------------------------------------------------------
+# 워커 프로세스 작업
+
+def _init_worker():
+    # 프로세스마다 OpenCV 스레드를 늘리지 않음 (프로세스 수만큼 코어 사용)
+    cv2.setNumThreads(1)
+    # 워커 프로세스 종료 시 열어 둔 zip 파일 닫기 (자식 프로세스에서는 atexit이 실행되지 않음)
+    mp_util.Finalize(None, _close_zip_files, exitpriority=10)
+
+
+def remap_label(text, remap):
+    """YOLO 라벨 텍스트의 클래스 ID 재매핑. (새 라벨 텍스트, 제외된 박스 수)"""
+    lines, dropped = [], 0
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 5:
+            continue
+        try:
+            class_id = int(float(parts[0]))
+        except ValueError:
+            continue
+        if remap is not None:
+            class_id = remap.get(class_id, -1)
+        if class_id < 0:
+            dropped += 1
+            continue
+        lines.append(" ".join([str(class_id)] + parts[1:5]))
+    return "".join(line + "\n" for line in lines), dropped
+
+
+def hash_sample(task):
+    """(소스, 이미지, 라벨, 재매핑 표) → (해시, 층화 클래스, 라벨 텍스트, 제외된 박스 수)"""
+    source, image, label, remap = task
+    data = _read(source, image)
+    text, dropped = remap_label(_read(source, label).decode("utf-8", "replace"), remap)
+    if dropped and not text:
+        return None   # 모든 박스가 제외된 샘플은 사용하지 않음
+    key = hashlib.sha1(data + b"\0" + text.encode()).hexdigest()[:16]
+    # 층화 기준은 첫 번째 박스의 클래스 (박스가 없는 배경 이미지는 -1)
+    stratum = int(text.split(None, 1)[0]) if text else -1
+    return key, stratum, text, dropped
+
+
+def parse_label(text):
+    """라벨 텍스트 → (N,) 클래스 ID, (N, 4) 정규화 (x_center, y_center, width, height)"""
+    rows = np.array([line.split() for line in text.splitlines()], dtype=np.float64).reshape(-1, 5)
+    return rows[:, 0].astype(np.int64), rows[:, 1:]
+
+
+def format_label(classes, boxes):
+    return "".join(f"{c} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n" for c, (x, y, w, h) in zip(classes.tolist(), boxes.tolist()))
+
+
+def _brightness_contrast(img, classes, boxes, rng):
+    alpha = 1.0 + rng.uniform(-CONTRAST_LIMIT, CONTRAST_LIMIT)
+    beta = rng.uniform(-BRIGHTNESS_LIMIT, BRIGHTNESS_LIMIT) * 255
+    return cv2.convertScaleAbs(img, alpha=alpha, beta=beta), classes, boxes
+
+
+def _blur(img, classes, boxes, rng):
+    k = int(rng.choice(BLUR_KERNELS))
+    return cv2.GaussianBlur(img, (k, k), 0), classes, boxes
+
+
+def _hue_saturation_value(img, classes, boxes, rng):
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
+    hsv[..., 0] = (hsv[..., 0] + rng.uniform(-HUE_SHIFT, HUE_SHIFT)) % 180
+    hsv[..., 1] *= 1.0 + rng.uniform(-SAT_SCALE, SAT_SCALE)
+    hsv[..., 2] *= 1.0 + rng.uniform(-VAL_SCALE, VAL_SCALE)
+    hsv[..., 1:] = np.clip(hsv[..., 1:], 0, 255)
+    return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR), classes, boxes
+
+
+def _warp(img, classes, boxes, angle, scale=1.0, shift=(0.0, 0.0)):
+    """아핀 변환 후 박스는 네 꼭짓점을 변환한 외접 사각형으로 (이미지 밖 부분은 잘라냄)"""
+    h, w = img.shape[:2]
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, scale)
+    m[:, 2] += (shift[0] * w, shift[1] * h)
+    out = cv2.warpAffine(img, m, (w, h), borderMode=cv2.BORDER_REFLECT_101)
+
+    xc, yc, bw, bh = (boxes * (w, h, w, h)).T
+    corners = np.stack([np.stack([xc + dx * bw / 2, yc + dy * bh / 2], axis=-1)
+                        for dx, dy in ((-1, -1), (1, -1), (1, 1), (-1, 1))], axis=1)   # (N, 4, 2)
+    moved = corners @ m[:, :2].T + m[:, 2]
+    xyxy = np.concatenate([moved.min(axis=1), moved.max(axis=1)], axis=1)
+    xyxy = np.clip(xyxy, 0, (w, h, w, h))
+    keep = ((xyxy[:, 2] - xyxy[:, 0]) >= MIN_BOX_PIXELS) & ((xyxy[:, 3] - xyxy[:, 1]) >= MIN_BOX_PIXELS)
+    return out, classes[keep], convert_bbox_to_yolo(xyxy[keep].reshape(-1, 4), w, h)
+
+
+def _rotate(img, classes, boxes, rng):
+    return _warp(img, classes, boxes, rng.uniform(-ROTATE_LIMIT, ROTATE_LIMIT))
+
+
+def _shift_scale_rotate(img, classes, boxes, rng):
+    return _warp(img, classes, boxes, rng.uniform(-SSR_ROTATE, SSR_ROTATE), 1.0 + rng.uniform(-SSR_SCALE, SSR_SCALE),
+                 tuple(rng.uniform(-SSR_SHIFT, SSR_SHIFT, size=2)))
+
+
+AUGMENTATIONS = [_brightness_contrast, _blur, _hue_saturation_value, _rotate, _shift_scale_rotate]
+
+
+def augmentation_tag():
+    """증강 설정 해시 (설정이 바뀌면 증강 파일 이름이 달라짐)"""
+    config = (BRIGHTNESS_LIMIT, CONTRAST_LIMIT, BLUR_KERNELS, HUE_SHIFT, SAT_SCALE, VAL_SCALE, ROTATE_LIMIT,
+              SSR_SHIFT, SSR_SCALE, SSR_ROTATE, MIN_BOX_PIXELS, JPEG_QUALITY, [f.__name__ for f in AUGMENTATIONS])
+    return hashlib.sha1(repr(config).encode()).hexdigest()[:6]
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _encode(img):
+    ok, data = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise RuntimeError("JPEG 인코딩 실패")
+    return data.tobytes()
+
+
+def process_sample(task):
+    """
+    샘플 하나의 원본 / 증강 이미지와 라벨 저장. 저장한 파일 쌍 수 반환
+
+    task: (소스, 이미지, 라벨 텍스트, 분할 폴더, 해시, 원본 저장 여부, [(증강 번호, 출력 이름), ...])
+    """
+    source, image, text, split_dir, key, write_original, augments = task
+    data = _read(source, image)
+    is_jpeg = image.lower().endswith((".jpg", ".jpeg"))
+    img = None
+    if not is_jpeg or augments:
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return 0
+
+    written = 0
+    if write_original:
+        # JPEG 원본은 다시 인코딩하지 않고 그대로 복사
+        _write_atomic(os.path.join(split_dir, "labels", key + ".txt"), text.encode())
+        _write_atomic(os.path.join(split_dir, "images", key + ".jpg"), data if is_jpeg else _encode(img))
+        written += 1
+
+    classes, boxes = parse_label(text)
+    for index, name in augments:
+        rng = np.random.default_rng([int(key, 16), index])
+        aug_img, aug_classes, aug_boxes = AUGMENTATIONS[index % len(AUGMENTATIONS)](img, classes, boxes, rng)
+        _write_atomic(os.path.join(split_dir, "labels", name + ".txt"), format_label(aug_classes, aug_boxes).encode())
+        _write_atomic(os.path.join(split_dir, "images", name + ".jpg"), _encode(aug_img))
+        written += 1
+    return written
+
+
+# ---------------------------------------------------------------------------
+# 빌드
+
+def stratified_split(samples, ratios=SPLIT_RATIOS, seed=SEED):
+    """
+    {해시: 층화 클래스} → {해시: 분할 이름}
+
+    클래스별로 (시드, 해시)의 해시 순서로 정렬한 뒤 비율대로 나누므로, 같은 샘플 집합이면 항상 같은 분할이 나옵니다.
+    """
+    strata = {}
+    for key, stratum in samples.items():
+        strata.setdefault(stratum, []).append(key)
+    bounds = np.cumsum(ratios) / sum(ratios)
+    assignment = {}
+    for keys in strata.values():
+        keys.sort(key=lambda k: hashlib.sha1(f"{seed}:{k}".encode()).digest())
+        cuts = [0] + [int(round(b * len(keys))) for b in bounds]
+        for split, start, end in zip(SPLITS, cuts, cuts[1:]):
+            for key in keys[start:end]:
+                assignment[key] = split
+    return assignment
+
+
+def _existing_outputs(output_dir):
+    """출력 폴더의 {이름: 분할} (이미지와 라벨이 모두 있는 것만) 과 나머지 파일 경로 목록"""
+    complete, partial = {}, []
+    for split in SPLITS:
+        images_dir, labels_dir = os.path.join(output_dir, split, "images"), os.path.join(output_dir, split, "labels")
+        images = {os.path.splitext(f)[0] for f in os.listdir(images_dir)} if os.path.isdir(images_dir) else set()
+        labels = {os.path.splitext(f)[0] for f in os.listdir(labels_dir)} if os.path.isdir(labels_dir) else set()
+        for name in images & labels:
+            complete[name] = split
+        partial += [os.path.join(images_dir, n + ".jpg") for n in images - labels]
+        partial += [os.path.join(labels_dir, n + ".txt") for n in labels - images]
+    return complete, partial
+
+
+def _output_paths(output_dir, split, name):
+    return (os.path.join(output_dir, split, "images", name + ".jpg"),
+            os.path.join(output_dir, split, "labels", name + ".txt"))
+
+
+def _run(executor, fn, tasks, label):
+    """작업을 프로세스 풀(없으면 현재 프로세스)에서 순서대로 실행하며 진행 상황 출력"""
+    results = []
+    start = time.perf_counter()
+    mapped = executor.map(fn, tasks, chunksize=CHUNK_SIZE) if executor else map(fn, tasks)
+    for i, result in enumerate(mapped, 1):
+        results.append(result)
+        if i % PROGRESS_EVERY == 0:
+            print(f"  {label} [{i}/{len(tasks)}] {i / (time.perf_counter() - start):.1f}개/초")
+    return results
+
+
+def write_data_yaml(output_dir):
+    names = [name for name, _ in sorted(CLASS_MAP.items(), key=lambda item: item[1])]
+    content = (f"path: {os.path.abspath(output_dir)}\n"
+               f"train: train/images\n"
+               f"val: valid/images\n"
+               f"test: test/images\n\n"
+               f"nc: {len(names)}\n"
+               f"names: {names}\n")
+    path = os.path.join(output_dir, "data.yaml")
+    _write_atomic(path, content.encode())
+    return path
+
+
+def build(sources, output_dir=OUTPUT_DIR, ratios=SPLIT_RATIOS, augment=AUGMENT_COPIES, augment_splits=AUGMENT_SPLITS,
+          workers=None, seed=SEED, prune=True):
+    """
+    소스들을 병합 / 재매핑 / 분할 / 증강하여 output_dir에 YOLO 데이터셋 생성. 요약 dict 반환
+
+    Args:
+        sources: [(폴더 또는 zip 경로, 클래스 이름 {id: 이름} 또는 None), ...]
+        workers: 프로세스 수 (None이면 CPU 코어 수, 0이면 현재 프로세스에서 실행)
+        prune: 이번 빌드에 없는 출력 파일 삭제
+    """
+    start = time.perf_counter()
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    for split in SPLITS:
+        for sub in ("images", "labels"):
+            os.makedirs(os.path.join(output_dir, split, sub), exist_ok=True)
+
+    cache_path = os.path.join(output_dir, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") == CACHE_VERSION:
+            cache = saved["samples"]
+
+    executor = None
+    if workers > 0:
+        # spawn: 부모 프로세스의 스레드 / 런타임 상태를 물려받지 않도록
+        executor = ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"), initializer=_init_worker)
+    try:
+        # 1. 소스 목록 / 해시 (수정되지 않은 파일은 캐시 사용)
+        entries, to_hash = [], []
+        for source, names in sources:
+            pairs, remap = discover(source, names)
+            print(f"{source}: 라벨 있는 이미지 {len(pairs)}개")
+            remap_key = json.dumps(sorted(remap.items())) if remap else None
+            for image, label, signature in pairs:
+                cache_key = f"{os.path.abspath(source)}|{image}"
+                signature = [list(signature[0]), list(signature[1]), remap_key]
+                entries.append((cache_key, source, image, signature))
+                cached = cache.get(cache_key)
+                if cached is None or cached[0] != signature:
+                    to_hash.append((cache_key, signature, (source, image, label, remap)))
+
+        hashed = _run(executor, hash_sample, [task for _, _, task in to_hash], "해시")
+        dropped_boxes = 0
+        for (cache_key, signature, _), result in zip(to_hash, hashed):
+            cache[cache_key] = [signature] + (list(result[:3]) if result else [None, None, None])
+            dropped_boxes += result[3] if result else 0
+        live = {key for key, *_ in entries}
+        cache = {k: v for k, v in cache.items() if k in live}
+
+        # 2. 내용이 같은 샘플은 하나만 사용하고 클래스별 비율로 분할
+        samples = {}   # 해시 -> (소스, 이미지, 라벨 텍스트, 층화 클래스)
+        for cache_key, source, image, _ in entries:
+            _, key, stratum, text = cache[cache_key]
+            if key is not None and key not in samples:
+                samples[key] = (source, image, text, stratum)
+        assignment = stratified_split({key: sample[3] for key, sample in samples.items()}, ratios, seed)
+
+        # 3. 출력 계획 - 이미 있는 파일은 건너뛰고, 다른 분할에 있으면 옮기기만 함
+        tag = augmentation_tag()
+        existing, partial = _existing_outputs(output_dir)
+        planned, tasks, moved = set(), [], 0
+        for key, (source, image, text, _) in samples.items():
+            split = assignment[key]
+            names = [key] + ([f"{key}_{tag}_{i}" for i in range(augment)] if split in augment_splits else [])
+            missing = []
+            for name in names:
+                planned.add(name)
+                current = existing.get(name)
+                if current == split:
+                    continue
+                if current is not None:
+                    for src, dst in zip(_output_paths(output_dir, current, name), _output_paths(output_dir, split, name)):
+                        os.replace(src, dst)
+                    moved += 1
+                    continue
+                missing.append(name)
+            if missing:
+                augments = [(i, name) for i, name in enumerate(names[1:]) if name in missing]
+                tasks.append((source, image, text, os.path.join(output_dir, split), key, key in missing, augments))
+
+        removed = 0
+        if prune:
+            for name, split in existing.items():
+                if name not in planned:
+                    for path in _output_paths(output_dir, split, name):
+                        os.remove(path)
+                    removed += 1
+            for path in partial:
+                os.remove(path)
+
+        # 4. 디코딩 / 증강 / 저장
+        written = sum(_run(executor, process_sample, tasks, "저장"))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        _close_zip_files()
+
+    _write_atomic(cache_path, json.dumps({"version": CACHE_VERSION, "samples": cache}).encode())
+    yaml_path = write_data_yaml(output_dir)
+
+    counts = {split: {} for split in SPLITS}
+    id_to_name = {class_id: name for name, class_id in CLASS_MAP.items()}
+    for key, (_, _, _, stratum) in samples.items():
+        name = id_to_name.get(stratum, "background")
+        counts[assignment[key]][name] = counts[assignment[key]].get(name, 0) + 1
+    summary = {
+        "samples": len(samples),
+        "duplicates": len(entries) - len(samples) - sum(1 for e in entries if cache[e[0]][1] is None),
+        "hashed": len(to_hash),
+        "written": written,
+        "moved": moved,
+        "removed": removed,
+        "dropped_boxes": dropped_boxes,
+        "split_counts": counts,
+        "seconds": time.perf_counter() - start,
+        "data_yaml": yaml_path,
+    }
+    return summary
+
+
+def print_summary(summary, augment, augment_splits):
+    print(f"\n샘플 {summary['samples']}개 (중복 제외 {summary['duplicates']}개) | 해시 계산 {summary['hashed']}개 | "
+          f"새로 저장 {summary['written']}개 | 분할 이동 {summary['moved']}개 | 삭제 {summary['removed']}개 | "
+          f"{summary['seconds']:.1f}초")
+    if summary["dropped_boxes"]:
+        print(f"매핑할 수 없는 클래스로 제외된 박스: {summary['dropped_boxes']}개")
+    for split, counts in summary["split_counts"].items():
+        total = sum(counts.values())
+        extra = f" (+ 증강 {total * augment}개)" if split in augment_splits and augment else ""
+        detail = ", ".join(f"{name} {n}" for name, n in sorted(counts.items()))
+        print(f"  {split:<6} {total}개{extra}: {detail or '없음'}")
+    print(f"data.yaml: {summary['data_yaml']}")
+
+
+def parse_source(spec):
+    """'경로' 또는 '경로=이름0,이름1,...' → (경로, {id: 이름} 또는 None)"""
+    if "=" in spec and not os.path.exists(spec):
+        path, names = spec.rsplit("=", 1)
+        return path, dict(enumerate(n.strip() for n in names.split(",")))
+    return spec, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학습용 데이터셋 빌드 (병합 / 클래스 재매핑 / 층화 분할 / 증강 / data.yaml)")
+    parser.add_argument("sources", nargs="*", default=SOURCES,
+                        help="데이터 폴더 또는 zip (경로=rock,paper,...로 소스 클래스 이름 지정 가능)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="출력 폴더")
+    parser.add_argument("--split", type=float, nargs=3, default=SPLIT_RATIOS, metavar=("TRAIN", "VALID", "TEST"),
+                        help="train / valid / test 비율")
+    parser.add_argument("--augment", type=int, default=AUGMENT_COPIES, help="원본 한 장당 증강 이미지 수 (0이면 증강 안 함)")
+    parser.add_argument("--augment-splits", nargs="+", choices=SPLITS, default=list(AUGMENT_SPLITS),
+                        help="증강 이미지를 만들 분할")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수, 0이면 단일 프로세스)")
+    parser.add_argument("--seed", type=int, default=SEED, help="분할 시드")
+    parser.add_argument("--keep-stale", action="store_true", help="이번 빌드에 없는 기존 출력 파일을 삭제하지 않음")
+    args = parser.parse_args()
+
+    sources = [parse_source(spec) for spec in args.sources]
+    missing = [path for path, _ in sources if not os.path.exists(path)]
+    if missing:
+        parser.error(f"소스를 찾을 수 없습니다: {', '.join(missing)}")
+
+    summary = build(sources, args.output, tuple(args.split), args.augment, tuple(args.augment_splits),
+                    args.workers, args.seed, prune=not args.keep_stale)
+    print_summary(summary, args.augment, args.augment_splits)
+
+
+if __name__ == "__main__":
+    main()
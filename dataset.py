@@ -1,73 +1,62 @@
+import argparse
 import cv2
 import os
 import numpy as np
-from ultralytics import YOLO
+from detector import create_detector, CONF, CLS
+from postprocess import move_table, classify, convert_bbox_to_yolo, NO_HAND, MULTIPLE_HANDS, CLASS_MAP
+from pipeline import StageQueue, BLOCK
+from manifest import DatasetManifest
+from workers import InferenceWorkerPool
+from concurrent.futures import Future
+import threading
 import time
-import glob
-import sys
-import re
-
-# YOLO 모델 로드
-model = YOLO("models/best.onnx", task='detect')
-print("모델 로드 완료")
-
-# 클래스 이름 매핑 - justhand 추가
-label_map = {
-    "Rock": "rock",
-    "Paper": "paper",
-    "Scissors": "scissors",
-    "rock": "rock",
-    "paper": "paper",
-    "scissors": "scissors",
-    "justhand": "justhand",
-    "0": "rock",
-    "1": "paper",
-    "2": "scissors",
-    "3": "justhand"
-}
-
-# 클래스 ID 매핑 - justhand 추가
-class_map = {'paper': 0, 'rock': 1, 'scissors': 2, 'justhand': 3}
+from collections import deque
+
+# YOLO 모델 (ONNX Runtime / OpenVINO 중 사용 가능한 CPU 백엔드)
+# 워커 프로세스 모드에서는 이 프로세스에 모델을 로드하지 않도록 처음 사용할 때 로드
+MODEL_PATH = "models/best.onnx"
+detector = None
+
+def get_detector():
+    global detector
+    if detector is None:
+        detector = create_detector(MODEL_PATH)
+        print("모델 로드 완료")
+    return detector
+
+# 이미 끝난 결과를 Future로 감싸기 (단일 프로세스 모드도 워커 모드와 같은 흐름으로 처리)
+def completed_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
 
 # 저장할 폴더 경로
 img_dir = 'collected_data/images'
 txt_dir = 'collected_data/labels'
 bbox_dir = 'collected_data/bbox_i'
+manifest_path = 'collected_data/manifest.sqlite3'
 
 # 폴더가 없으면 생성
 os.makedirs(img_dir, exist_ok=True)
 os.makedirs(txt_dir, exist_ok=True)
 os.makedirs(bbox_dir, exist_ok=True)
 
-# 파일명에서 숫자 추출 함수
-def get_last_file_index(directory, prefix='img_', ext='.jpg'):
-    if not os.path.exists(directory):
-        return -1
-    files = [f for f in os.listdir(directory) if f.startswith(prefix) and f.endswith(ext)]
-    if not files:
-        return -1
-    # 파일명에서 숫자 추출
-    indices = []
-    for f in files:
-        match = re.search(r'img_(\d{5})', f)
-        if match:
-            indices.append(int(match.group(1)))
-    if not indices:
-        return -1
-    return max(indices)
-
-# 바운딩 박스 좌표를 YOLO 포맷으로 변환
-def convert_bbox_to_yolo(bbox, img_width, img_height):
-    # bbox는 (xmin, ymin, xmax, ymax) 형식
-    xmin, ymin, xmax, ymax = bbox
-    
-    # YOLO 포맷: (x_center, y_center, width, height) - 정규화된 좌표
-    x_center = (xmin + xmax) / 2 / img_width
-    y_center = (ymin + ymax) / 2 / img_height
-    width = (xmax - xmin) / img_width
-    height = (ymax - ymin) / img_height
-    
-    return x_center, y_center, width, height
+# 저장 설정
+SAVE_INTERVAL = 1.0        # 저장 간격 (초)
+WRITER_WORKERS = 2         # 백그라운드 저장 스레드 수
+WRITER_QUEUE_SIZE = 32     # 저장 대기열 크기 (가득 차면 drop_policy에 따라 대기 또는 버림)
+JPEG_QUALITY = 95
+
+# 고속 수집 모드 설정 - 매 프레임 검출하되 이전 저장본과 충분히 다른 프레임만 저장
+HASH_SIZE = 8                 # dHash 크기 (HASH_SIZE * HASH_SIZE 비트, 최대 8 = 64비트)
+HASH_DISTANCE_THRESHOLD = 10  # 최근 저장본과의 해밍 거리가 이보다 크면 새 프레임
+HASH_INDEX_SIZE = 256         # 비교할 최근 저장본 해시 수
+BBOX_MOVE_THRESHOLD = 0.08    # 박스 중심 이동량 (프레임 대각선 대비)
+BBOX_SCALE_THRESHOLD = 0.25   # 박스 넓이 변화율
+
+# 수집 데이터 매니페스트 열기 (없으면 폴더를 스캔하여 생성)
+def open_manifest():
+    return DatasetManifest(manifest_path, img_dir, txt_dir, bbox_dir)
 
 # 라벨 저장 함수
 def save_yolo_label(filename, class_id, bbox):
@@ -76,21 +65,186 @@ def save_yolo_label(filename, class_id, bbox):
     with open(filename, 'w') as f:
         f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
 
+# 이미지의 dHash (인접 픽셀 밝기 차이 부호를 HASH_SIZE * HASH_SIZE 비트 정수로)
+def dhash(image, hash_size=HASH_SIZE):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+# 최근 저장본과 비교하여 새로운 프레임인지 판단 (클래스 변경, 박스 이동 / 크기 변화, 해시 차이)
+class NoveltyFilter:
+    def __init__(self, hash_threshold=HASH_DISTANCE_THRESHOLD, index_size=HASH_INDEX_SIZE,
+                 move_threshold=BBOX_MOVE_THRESHOLD, scale_threshold=BBOX_SCALE_THRESHOLD):
+        self.hash_threshold = hash_threshold
+        self.move_threshold = move_threshold
+        self.scale_threshold = scale_threshold
+        self._hashes = deque(maxlen=index_size)  # 최근 저장본 해시 (메모리 인덱스)
+        self._last = None                        # 마지막 저장본 (class_id, box)
+        # 통계
+        self.accepted = {}
+        self.duplicates = 0
+
+    def _hash_distance(self, h):
+        if not self._hashes:
+            return None
+        index = np.fromiter(self._hashes, dtype=np.uint64, count=len(self._hashes))
+        diff = np.bitwise_xor(index, np.uint64(h))
+        return int(np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1).min())
+
+    def _box_changed(self, box, last_box, frame_shape):
+        h, w = frame_shape[:2]
+        diagonal = (w * w + h * h) ** 0.5
+        cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+        lx, ly = (last_box[0] + last_box[2]) / 2, (last_box[1] + last_box[3]) / 2
+        if ((cx - lx) ** 2 + (cy - ly) ** 2) ** 0.5 / diagonal > self.move_threshold:
+            return "move"
+        area = max((box[2] - box[0]) * (box[3] - box[1]), 1.0)
+        last_area = max((last_box[2] - last_box[0]) * (last_box[3] - last_box[1]), 1.0)
+        if abs(area - last_area) / last_area > self.scale_threshold:
+            return "scale"
+        return None
+
+    def check(self, frame, class_id, box):
+        """
+        새 프레임이면 (이유, 해시), 최근 저장본과 거의 같으면 (None, 해시)
+
+        이유: "first", "class", "move", "scale", "hash"
+        """
+        xmin, ymin, xmax, ymax = map(int, box)
+        crop = frame[max(ymin, 0):max(ymax, 0), max(xmin, 0):max(xmax, 0)]
+        h = dhash(crop if crop.size else frame)
+
+        if self._last is None:
+            return "first", h
+        last_class, last_box = self._last
+        if class_id != last_class:
+            return "class", h
+        reason = self._box_changed(box, last_box, frame.shape)
+        if reason is not None:
+            return reason, h
+        distance = self._hash_distance(h)
+        if distance is None or distance > self.hash_threshold:
+            return "hash", h
+        self.duplicates += 1
+        return None, h
+
+    def remember(self, reason, h, class_id, box):
+        """저장한 프레임을 비교 기준에 추가"""
+        self._hashes.append(h)
+        self._last = (class_id, list(box))
+        self.accepted[reason] = self.accepted.get(reason, 0) + 1
+
+    def format_stats(self):
+        reasons = ", ".join(f"{k} {v}" for k, v in self.accepted.items()) or "없음"
+        return f"저장 사유: {reasons} | 중복으로 건너뜀 {self.duplicates}개"
+
+# 파일을 임시 이름으로 쓴 뒤 교체 (저장 도중 종료되어도 반쪽짜리 파일이 남지 않음)
+def write_file_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# 원본 이미지 / 라벨 / 바운딩 박스 미리보기를 백그라운드 스레드에서 JPEG 인코딩 후 저장
+class DatasetWriter:
+    def __init__(self, num_workers=WRITER_WORKERS, queue_size=WRITER_QUEUE_SIZE, drop_policy=BLOCK, jpeg_quality=JPEG_QUALITY, manifest=None):
+        self._queue = StageQueue(queue_size, drop_policy)
+        self.manifest = manifest
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+        self._lock = threading.Lock()
+        # 통계 (대기열 적체 확인용)
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.blocked_seconds = 0.0   # 대기열이 가득 차 캡처 루프가 기다린 시간
+        self.max_pending = 0
+        self._workers = [threading.Thread(target=self._run, name=f"dataset-writer-{i}", daemon=True)
+                         for i in range(max(int(num_workers), 1))]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def dropped(self):
+        return self._queue.dropped
+
+    @property
+    def pending(self):
+        return len(self._queue)
+
+    def save(self, index, filename, frame, class_id, yolo_bbox, box, label_text, conf=None):
+        """
+        샘플 하나를 저장 대기열에 추가 (프레임은 이후 수정하지 않아야 함)
+
+        Returns:
+            대기열에 들어가면 True, 드롭 정책에 따라 버려지면 False
+        """
+        start = time.perf_counter()
+        accepted = self._queue.put((index, filename, frame, class_id, yolo_bbox, box, label_text, conf))
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.blocked_seconds += waited
+            if accepted:
+                self.submitted += 1
+            self.max_pending = max(self.max_pending, len(self._queue))
+        return accepted
+
+    def _write(self, index, filename, frame, class_id, yolo_bbox, box, label_text, conf):
+        # 원본 이미지
+        ok, buf = cv2.imencode(".jpg", frame, self._encode_params)
+        if not ok:
+            raise IOError(f"이미지 인코딩 실패: {filename}")
+        write_file_atomic(os.path.join(img_dir, filename + ".jpg"), buf.tobytes())
+        
+        # 라벨
+        save_yolo_label(os.path.join(txt_dir, filename + ".txt"), class_id, yolo_bbox)
+        
+        # 바운딩 박스 그린 이미지 (sync_deleted_files 기준 파일이므로 마지막에 저장)
+        bbox_img = frame.copy()
+        xmin, ymin, xmax, ymax = map(int, box)
+        cv2.rectangle(bbox_img, (xmin, ymin), (xmax, ymax), (0, 255, 0), 2)
+        cv2.putText(bbox_img, label_text, (xmin, ymin - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        ok, buf = cv2.imencode(".jpg", bbox_img, self._encode_params)
+        if not ok:
+            raise IOError(f"이미지 인코딩 실패: {filename}")
+        write_file_atomic(os.path.join(bbox_dir, filename + ".jpg"), buf.tobytes())
+        
+        # 세 파일이 모두 저장된 뒤 매니페스트에 기록
+        if self.manifest is not None:
+            self.manifest.add(index, filename, class_id, yolo_bbox, conf)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"저장 중 오류 ({item[1]}): {e}")
+            else:
+                with self._lock:
+                    self.written += 1
+
+    def close(self):
+        """대기 중인 샘플을 모두 저장한 뒤 저장 스레드 종료"""
+        self._queue.close()
+        for worker in self._workers:
+            worker.join()
+
+    def format_stats(self):
+        return (f"저장 {self.written}개 / 요청 {self.submitted}개 | 실패 {self.failed}개 | 버림 {self.dropped}개 | "
+                f"최대 대기 {self.max_pending}개 | 캡처 대기 시간 {self.blocked_seconds:.2f}초")
+
 # 삭제된 bbox 이미지에 해당하는 원본 이미지와 라벨 파일도 함께 삭제하는 함수
-def sync_deleted_files():
+def sync_deleted_files(manifest=None):
     print("\n[파일 동기화 시작]")
+    manifest = manifest or open_manifest()
     
-    # bbox_img 폴더의 모든 파일 목록 가져오기
-    bbox_files = set([os.path.splitext(os.path.basename(f))[0] for f in glob.glob(os.path.join(bbox_dir, "*.jpg"))])
-    
-    # 원본 이미지 폴더의 모든 파일 목록 가져오기
-    img_files = set([os.path.splitext(os.path.basename(f))[0] for f in glob.glob(os.path.join(img_dir, "*.jpg"))])
-    
-    # 라벨 폴더의 모든 파일 목록 가져오기
-    txt_files = set([os.path.splitext(os.path.basename(f))[0] for f in glob.glob(os.path.join(txt_dir, "*.txt"))])
-    
-    # bbox_img 폴더에 없는 파일 찾기
-    deleted_files = (img_files.union(txt_files)) - bbox_files
+    # 매니페스트에는 있지만 bbox_img 폴더에 없는 파일 찾기
+    deleted_files = manifest.missing_previews()
     
     if not deleted_files:
         print("삭제할 파일이 없습니다. 모든 파일이 동기화되어 있습니다.")
@@ -99,155 +253,228 @@ def sync_deleted_files():
     print(f"총 {len(deleted_files)}개의 파일을 동기화합니다.")
     
     for filename in deleted_files:
+        img_path, txt_path, _ = manifest.paths(filename)
+        
         # 원본 이미지 파일 삭제
-        img_path = os.path.join(img_dir, filename + ".jpg")
         if os.path.exists(img_path):
             os.remove(img_path)
             print(f"삭제됨: {img_path}")
         
         # 라벨 파일 삭제
-        txt_path = os.path.join(txt_dir, filename + ".txt")
         if os.path.exists(txt_path):
             os.remove(txt_path)
             print(f"삭제됨: {txt_path}")
     
+    manifest.remove(deleted_files)
     print("[파일 동기화 완료]")
 
+# 매니페스트 기준 클래스별 샘플 수 출력
+def print_class_counts(manifest=None):
+    manifest = manifest or open_manifest()
+    names = {class_id: name for name, class_id in CLASS_MAP.items()}
+    counts = manifest.class_counts()
+    print(f"\n[수집 데이터] 총 {len(manifest)}개")
+    for class_id, count in sorted(counts.items(), key=lambda item: (item[0] is None, item[0])):
+        print(f"  {names.get(class_id, class_id)}: {count}개")
+
 # 메인 데이터 수집 함수 - 클래스 지정 매개변수 추가
-def collect_data(fixed_class=None):
+# high_rate=True이면 매 프레임 검출하고 새로운 프레임만 저장 (interval 무시)
+# num_workers > 0이면 검출을 워커 프로세스에서 실행 (결과는 몇 프레임 늦게 도착)
+def collect_data(fixed_class=None, interval=SAVE_INTERVAL, high_rate=False, num_workers=0):
     # 카메라 설정
     cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # DirectShow 백엔드 사용
     
     if not cap.isOpened():
         print("카메라를 열 수 없습니다.")
         return
+    
+    # 검출기 준비 (워커 프로세스 모드이면 카메라 해상도 크기의 공유 메모리 슬롯으로 프레임 전달)
+    if num_workers > 0:
+        frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640, 3)
+        pool = InferenceWorkerPool(MODEL_PATH, num_workers, frame_shape=frame_shape)
+        names = pool.names
+    else:
+        pool = None
+        names = get_detector().names
+    table = move_table(names)  # 클래스 ID → 손 모양 / 데이터셋 클래스 ID 조회 테이블
+    pending = deque()  # 검출 결과를 기다리는 (프레임, Future)
+
+    # 이미지 인코딩 / 파일 저장은 백그라운드에서 처리 (캡처 루프가 디스크를 기다리지 않음)
+    manifest = open_manifest()
+    writer = DatasetWriter(manifest=manifest)
+    novelty = NoveltyFilter() if high_rate else None
 
     # 마지막 파일 인덱스 가져오기
-    last_index = get_last_file_index(img_dir)
+    last_index = manifest.last_index()
     count = last_index + 1
     print(f"마지막 파일 인덱스: {last_index}, 새 파일은 img_{count:05d}.jpg부터 시작합니다.")
     
     # 고정 클래스가 지정된 경우 표시
     if fixed_class:
         print(f"지정된 클래스: {fixed_class} (모든 이미지가 이 클래스로 저장됩니다)")
+    if high_rate:
+        print("고속 수집 모드: 매 프레임 검출하고 이전 저장본과 다른 프레임만 저장합니다.")
     
     start_time = time.time()
     
     print("\n[데이터 수집 시작]")
     print("웹캠을 켜고 손을 화면 중앙에 위치시켜 주세요. (종료: Q 키)")
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("카메라 프레임을 읽을 수 없습니다. 다시 시도합니다.")
-            continue
-
-        # 프레임 좌우 반전 (거울 효과)
-        frame = cv2.flip(frame, 1)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                print("카메라 프레임을 읽을 수 없습니다. 다시 시도합니다.")
+                continue
+
+            # 프레임 좌우 반전 (거울 효과)
+            frame = cv2.flip(frame, 1)
         
-        # 현재 화면 표시용 프레임
-        display_frame = frame.copy()
+            # 현재 화면 표시용 프레임
+            display_frame = frame.copy()
         
-        # 1초에 1장 저장
-        current_time = time.time()
-        if current_time - start_time >= 1.0:
-            start_time = current_time
-            
-            # 모델 예측
-            results = model(frame)
-            result = results[0]
-            
-            # 결과 처리
-            boxes = result.boxes
-            num_objects = len(boxes)
+            # interval초에 1장 저장 (고속 수집 모드는 매 프레임)
+            current_time = time.time()
+            if high_rate or current_time - start_time >= interval:
+                if pool is None:
+                    # 모델 예측
+                    start_time = current_time
+                    pending.append((frame, completed_future(get_detector().predict(frame))))
+                elif not (high_rate and pool.in_flight >= pool.num_workers):
+                    # 워커에 예측 요청 (고속 수집 모드에서 워커가 모두 바쁘면 이번 프레임은 건너뜀)
+                    start_time = current_time
+                    pending.append((frame, pool.submit(frame)))
+        
+            # 도착한 검출 결과를 요청 순서대로 처리
+            while pending and pending[0][1].done():
+                frame, future = pending.popleft()
+                try:
+                    dets = future.result()
+                except RuntimeError as e:
+                    if pool is None or pool.error is not None:
+                        raise
+                    # 이 프레임만 검출에 실패 - 저장하지 않고 계속
+                    print(f"검출 실패: {e}")
+                    continue
             
-            # 화면에 결과 표시할 프레임 준비
-            annotated_frame = result.plot()
+                # 결과 처리
+                outcome = classify(dets)
             
-            if num_objects == 0:
-                # 손 객체가 없는 경우
-                cv2.putText(display_frame, "No hand detected", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 100, 100), 2)
-            elif num_objects > 1:
-                # 2개 이상의 손 객체가 인식된 경우
-                cv2.putText(display_frame, "Multiple hands detected!", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            else:
-                # 정상적으로 하나의 손 객체만 인식된 경우
-                best_idx = boxes.conf.argmax().item()
-                label_id = int(boxes.cls[best_idx])
-                conf = float(boxes.conf[best_idx])
-                
-                # 클래스 이름 가져오기
-                class_name = result.names.get(label_id, "unknown")
-                
-                # 바운딩 박스 좌표 (xmin, ymin, xmax, ymax)
-                box = boxes.xyxy[best_idx].tolist()
-                
-                # 이미지 크기
-                h, w = frame.shape[:2]
+                if outcome == NO_HAND:
+                    # 손 객체가 없는 경우
+                    cv2.putText(display_frame, "No hand detected", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 100, 100), 2)
+                elif outcome == MULTIPLE_HANDS:
+                    # 2개 이상의 손 객체가 인식된 경우
+                    cv2.putText(display_frame, "Multiple hands detected!", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                else:
+                    # 정상적으로 하나의 손 객체만 인식된 경우
+                    # 검출 배열은 신뢰도 내림차순 정렬
+                    label_id = dets[0, CLS]
+                    conf = float(dets[0, CONF])
                 
-                # YOLO 포맷으로 변환
-                yolo_bbox = convert_bbox_to_yolo(box, w, h)
+                    # 바운딩 박스 좌표 (xmin, ymin, xmax, ymax)
+                    box = dets[0, :4].tolist()
                 
-                # 파일명 생성
-                filename = f"img_{count:05d}"
+                    # 이미지 크기
+                    h, w = frame.shape[:2]
                 
-                # 이미지 저장
-                img_path = os.path.join(img_dir, filename + ".jpg")
-                cv2.imwrite(img_path, frame)
+                    # YOLO 포맷으로 변환
+                    yolo_bbox = convert_bbox_to_yolo(box, w, h)
                 
-                # 클래스 이름 및 ID 결정 (고정 클래스가 있으면 그것을 사용)
-                if fixed_class:
-                    user_move = fixed_class
-                    class_id = class_map.get(fixed_class, 3)  # 기본값은 justhand(3)
-                else:
-                    # 클래스 이름 매핑
-                    user_move = label_map.get(class_name, class_name.lower())
-                    class_id = class_map.get(user_move, 0)  # 기본값은 paper(0)
+                    # 파일명 생성
+                    filename = f"img_{count:05d}"
                 
-                # 라벨 저장
-                label_path = os.path.join(txt_dir, filename + ".txt")
-                save_yolo_label(label_path, class_id, yolo_bbox)
+                    # 클래스 이름 및 ID 결정 (고정 클래스가 있으면 그것을 사용)
+                    if fixed_class:
+                        user_move = fixed_class
+                        class_id = CLASS_MAP.get(fixed_class, 3)  # 기본값은 justhand(3)
+                    else:
+                        # 클래스 ID → 손 모양 / 데이터셋 클래스 ID (매핑되지 않은 손 모양은 paper(0))
+                        user_move = table.move(label_id)
+                        class_id = int(table.dataset_class(label_id))
                 
-                # 바운딩 박스 그린 이미지 저장
-                bbox_img = frame.copy()
-                xmin, ymin, xmax, ymax = map(int, box)
-                cv2.rectangle(bbox_img, (xmin, ymin), (xmax, ymax), (0, 255, 0), 2)
-                label_text = f"{user_move} ({conf:.2f})"
-                cv2.putText(bbox_img, label_text, (xmin, ymin - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-                bbox_img_path = os.path.join(bbox_dir, filename + ".jpg")
-                cv2.imwrite(bbox_img_path, bbox_img)
+                    # 고속 수집 모드에서는 최근 저장본과 거의 같은 프레임은 건너뜀
+                    reason, frame_hash = novelty.check(frame, class_id, box) if novelty else ("interval", None)
                 
-                print(f"저장 완료: {filename}.jpg - 클래스: {user_move}, 신뢰도: {conf:.2f}")
+                    # 원본 이미지 / 라벨 / 바운딩 박스 그린 이미지 저장 요청 (백그라운드 저장)
+                    label_text = f"{user_move} ({conf:.2f})"
+                    if reason is None:
+                        status_text, status_color = "Duplicate - skipped", (100, 100, 100)
+                    elif writer.save(count, filename, frame, class_id, yolo_bbox, box, label_text, conf):
+                        if novelty:
+                            novelty.remember(reason, frame_hash, class_id, box)
+                        print(f"저장 요청: {filename}.jpg - 클래스: {user_move}, 신뢰도: {conf:.2f}")
+                        count += 1
+                        status_text, status_color = f"Saved: {filename}.jpg", (0, 0, 255)
+                    else:
+                        # 저장 대기열이 가득 차 드롭 정책에 따라 버려짐 (중복과 구분)
+                        status_text, status_color = "Queue full - dropped", (0, 165, 255)
                 
-                # 화면에 텍스트 출력
-                cv2.putText(display_frame, f"Class: {user_move} ({conf:.2f})", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(display_frame, f"Saved: {filename}.jpg", (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                
-                count += 1
+                    # 화면에 텍스트 출력
+                    cv2.putText(display_frame, f"Class: {user_move} ({conf:.2f})", (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                    cv2.putText(display_frame, status_text, (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, status_color, 2)
+        
+            # 저장 대기열 상태
+            cv2.putText(display_frame, f"Queue: {writer.pending}", (30, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
         
-        # 화면 출력
-        cv2.imshow("YOLO Data Collection", display_frame)
+            # 화면 출력
+            cv2.imshow("YOLO Data Collection", display_frame)
         
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except RuntimeError:
+        if pool is None or pool.error is None:
+            raise
+        # 검출 워커 프로세스가 죽어 더 검출할 수 없음 - 지금까지 요청한 샘플은 저장하고 종료
+        print(f"검출 워커 오류로 수집을 중단합니다: {pool.error}")
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        if pool is not None:
+            if pending:
+                print(f"검출 중이던 프레임 {len(pending)}개는 저장하지 않습니다.")
+            print(pool.format_stats())
+            pool.close()
     
-    cap.release()
-    cv2.destroyAllWindows()
-    print(f"\n[데이터 수집 종료] 총 {count - (last_index + 1)}개의 이미지와 라벨이 저장되었습니다.")
+        # 대기 중인 샘플을 모두 디스크에 기록
+        print(f"\n저장 대기 중인 {writer.pending}개 샘플을 기록합니다...")
+        writer.close()
+        print(writer.format_stats())
+        if novelty:
+            print(novelty.format_stats())
+        print(f"[데이터 수집 종료] 총 {writer.written}개의 이미지와 라벨이 저장되었습니다.")
+        print_class_counts(manifest)
+        manifest.close()
+
+# 명령행 인자 처리
+def main():
+    parser = argparse.ArgumentParser(description="가위바위보 학습 데이터 수집 / 관리")
+    parser.add_argument("fixed_class", nargs="?", choices=list(CLASS_MAP), help="모든 이미지를 이 클래스로 저장 (생략하면 모델 예측 클래스)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sync", action="store_true", help="삭제된 bbox 이미지에 해당하는 원본 이미지 / 라벨 삭제")
+    mode.add_argument("--rebuild", action="store_true", help="폴더를 스캔하여 매니페스트 다시 작성")
+    mode.add_argument("--stats", action="store_true", help="클래스별 샘플 수 출력")
+    parser.add_argument("--fast", action="store_true", help="고속 수집 모드 (매 프레임 검출, 이전 저장본과 다른 프레임만 저장)")
+    parser.add_argument("--workers", type=int, default=0, help="검출 워커 프로세스 수 (0이면 현재 프로세스에서 검출)")
+    args = parser.parse_args()
+    if args.workers < 0:
+        parser.error("--workers는 0 이상이어야 합니다.")
+
+    if args.sync:
+        # 파일 동기화 모드
+        sync_deleted_files()
+    elif args.rebuild:
+        # 폴더를 스캔하여 매니페스트 다시 작성
+        manifest = open_manifest()
+        print(f"매니페스트 재작성 완료: {manifest.rebuild()}개 샘플")
+        print_class_counts(manifest)
+    elif args.stats:
+        # 클래스별 샘플 수
+        print_class_counts()
+    else:
+        # 데이터 수집 모드 (클래스를 지정하면 클래스 지정 모드)
+        collect_data(fixed_class=args.fixed_class, high_rate=args.fast, num_workers=args.workers)
 
 # 메인 함수
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--sync":
-            # 파일 동기화 모드
-            sync_deleted_files()
-        elif sys.argv[1] in class_map:
-            # 클래스 지정 모드
-            collect_data(fixed_class=sys.argv[1])
-        else:
-            print(f"알 수 없는 인자: {sys.argv[1]}")
-            print(f"사용 가능한 클래스: {', '.join(class_map.keys())}")
-            print("사용법: python script.py [--sync|rock|paper|scissors|justhand]")
-    else:
-        # 기본 데이터 수집 모드
-        collect_data()
+    main()
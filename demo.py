@@ -1,32 +1,57 @@
 # -*- coding: utf-8 -*-
-import cv2
+import argparse
+import csv
+import functools
 import os
-import numpy as np
-from ultralytics import YOLO
-from PIL import ImageFont, ImageDraw, Image
-
-# 한글 텍스트 출력 함수
-def put_korean_text(img, text, position, font_size=30, color=(0, 255, 0)):
-    img_pil = Image.fromarray(img)
-    draw = ImageDraw.Draw(img_pil)
-    
-    # 폰트 파일 경로 (프로젝트 폴더에 폰트 파일 추가 필요)
-    font_path = "./assets/font/NanumGothic.ttf"  # 또는 다른 한글 폰트 파일
-    
-    if not os.path.exists(font_path):
-        print(f"경고: 폰트 파일을 찾을 수 없습니다: {font_path}")
-        print("영문으로 표시합니다.")
-        # 영문으로 대체
-        cv2.putText(img, text, position, cv2.FONT_HERSHEY_SIMPLEX, font_size/30, color, 2)
-        return img
-    
-    font = ImageFont.truetype(font_path, font_size)
-    draw.text(position, text, font=font, fill=color)
-    return np.array(img_pil)
+import threading
+import time
+import cv2
+from detector import draw_detections, empty_detections, CONF, CLS
+from postprocess import move_table, classify, NO_HAND, ONE_HAND, MULTIPLE_HANDS
+from registry import ModelRegistry
+from text_overlay import put_korean_text, preload_texts
+from motion import MotionGate, MOTION_THRESHOLD, MAX_STALENESS
+from tracking import RoiTracker, ROI_IMGSZ
+from gesture import GestureStateMachine, COMMITTED, COMMIT_FRAMES, HOLD_SECONDS
+from pipeline import LatestFrameSlot, StageQueue, StageTimer, DROP_OLDEST, DROP_POLICIES, BLOCK, NULL_TIMER
+from workers import InferenceWorkerPool
+from collections import deque
+
+# YOLO v11 모델 설정 - 향상된 설정 (내보낸 ONNX/OpenVINO 모델이 있으면 더 빠른 CPU 백엔드 사용)
+MODEL_PATH = "models/best4.pt"
+
+# 모델 레지스트리 - 실행 중 N 키로 다음 모델 로드 / B 키로 이전 모델로 되돌리기
+registry = ModelRegistry(conf=0.5, iou=0.45)
+
+# 추론 워커 프로세스 수 (0이면 이 프로세스의 추론 스레드에서 실행)
+NUM_WORKERS = 0
+
+# 워커 프로세스 모드의 추론 풀 (main에서 생성)
+inference_pool = None
+
+# 현재 검출기 (처음 호출할 때 MODEL_PATH 로드)
+def get_detector():
+    if registry.current is None:
+        registry.load(MODEL_PATH, background=False)
+    return registry.current
+
+# 클래스 이름 - 워커 프로세스 모드이면 워커가 알려 준 이름 (이 프로세스에서는 모델을 로드하지 않음)
+def get_class_names():
+    return inference_pool.names if inference_pool is not None else get_detector().names
+
+# 파이프라인 설정
+QUEUE_SIZE = 2              # 추론 → 렌더링 큐 크기
+DROP_POLICY = DROP_OLDEST   # 큐가 가득 찼을 때의 드롭 정책
+STATS_INTERVAL = 5.0        # 단계별 시간 출력 간격 (초, 0이면 종료 시에만 출력)
+
+# 렌더링 세부 단계(plot / overlay) 시간 계측 (기본은 기록하지 않음, 벤치마크에서 StageTimer로 교체)
+stage_timer = NULL_TIMER
 
-# YOLO v11 모델 로드 - 향상된 설정
-model = YOLO("models/best4.pt")
-print("YOLO v11 모델 로드 완료")
+# 움직임 감지 설정 - 화면이 정지해 있으면 YOLO 추론을 생략하고 마지막 검출 결과 재사용
+MOTION_GATE_ENABLED = True
+
+# ROI 추적 모드 - 손이 하나 검출되면 이전 박스 주변만 작은 입력 크기로 추론 (선택 사항)
+TRACKING_ENABLED = False
 
 # AI 판단 함수
 def get_ai_move(user_move):
@@ -35,23 +60,195 @@ def get_ai_move(user_move):
     counter = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
     return counter.get(user_move.lower(), "none")
 
-# 클래스 이름 매핑
-label_map = {
-    "Rock": "rock",
-    "Paper": "paper",
-    "Scissors": "scissors",
-    "rock": "rock",
-    "paper": "paper",
-    "scissors": "scissors",
-    "0": "rock",
-    "1": "paper",
-    "2": "scissors",
-    "3": "justhand"
-}
-
-# 메인 함수
-def main():
-    camera_index = 0
+# 화면에 반복 출력되는 고정 문구는 미리 렌더링
+preload_texts(
+    [("손을 인식하지 못했어요.", 30, (100, 100, 100)),
+     ("손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.", 30, (0, 0, 255)),
+     ("컴퓨터: 승리!", 30, (0, 0, 255))]
+    + [(f"컴퓨터: {move}", 30, (0, 0, 255)) for move in ("rock", "paper", "scissors")]
+    + [(text, 30, (255, 165, 0)) for text in ("무승부!", "사용자 승리!", "컴퓨터 승리!", "판정패! (허용되지 않는 손 모양)")]
+)
+
+# 화면 문구 목록 [(text, position, color), ...] 출력
+def draw_text_lines(frame, lines):
+    with stage_timer.measure("overlay"):
+        for text, position, color in lines:
+            frame = put_korean_text(frame, text, position, font_size=30, color=color)
+    return frame
+
+# 확정된 손 모양으로 승패를 판정하여 화면 문구 목록 반환
+def judge_committed_move(user_move, conf):
+    ai_move = get_ai_move(user_move)
+
+    if user_move == "justhand":
+    # justhand일 경우 특별 메시지 표시
+        lines = [("컴퓨터: 승리!", (30, 80), (0, 0, 255))]
+        result_text = "판정패! (허용되지 않는 손 모양)"
+    else:
+        # 일반적인 가위바위보 경우
+        lines = [(f"컴퓨터: {ai_move}", (30, 80), (0, 0, 255))]
+        result_text = determine_winner(user_move, ai_move)
+
+    lines.append((result_text, (30, 120), (255, 165, 0)))
+    print(f"사용자: {user_move} ({conf:.2f})  →  컴퓨터: {ai_move}  →  {result_text}")
+    return lines
+
+# 추론 결과를 화면용 프레임으로 렌더링 (바운딩 박스 + 한글 텍스트)
+# now: 손 모양 확정 / 결과 유지 판단 시각 (기본은 현재 시각, 오프라인 처리에서는 영상 시간)
+def render_result(frame, dets, gesture, now=None):
+    # 손 모양이 확정되어 추론을 생략한 프레임은 확정 화면만 출력
+    if dets is None:
+        return draw_text_lines(frame, gesture.view) if gesture.is_committed(now) else frame
+
+    # 결과 처리
+    outcome = classify(dets)
+    
+    # 화면에 결과 표시할 프레임 준비
+    with stage_timer.measure("plot"):
+        annotated_frame = draw_detections(frame, dets, get_class_names())
+    
+    if outcome == NO_HAND:
+        # 손 객체가 없는 경우
+        gesture.update(None, now=now)
+        with stage_timer.measure("overlay"):
+            annotated_frame = put_korean_text(annotated_frame, "손을 인식하지 못했어요.", (30, 40), font_size=30, color=(100, 100, 100))
+    elif outcome == MULTIPLE_HANDS:
+        # 2개 이상의 손 객체가 인식된 경우
+        gesture.update(None, now=now)
+        with stage_timer.measure("overlay"):
+            annotated_frame = put_korean_text(annotated_frame, "손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.", (30, 40), font_size=30, color=(0, 0, 255))
+        print("손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.")
+    else:
+        # 정상적으로 하나의 손 객체만 인식된 경우
+        # 검출 배열은 신뢰도 내림차순 정렬
+        conf = float(dets[0, CONF])
+        
+        # 클래스 ID → 클래스 이름 / 손 모양 (모델 클래스 목록별 조회 테이블)
+        table = move_table(get_class_names())
+        class_name, user_move = table.name(dets[0, CLS]), table.move(dets[0, CLS])
+
+        # 연속 프레임으로 손 모양이 확정될 때만 승패 판정
+        if gesture.update(user_move, conf, now) == COMMITTED:
+            print(f"감지된 클래스: {class_name}, 신뢰도: {gesture.conf:.2f}")
+            gesture.view = judge_committed_move(gesture.move, gesture.conf)
+            annotated_frame = draw_text_lines(annotated_frame, gesture.view)
+        else:
+            with stage_timer.measure("overlay"):
+                annotated_frame = put_korean_text(annotated_frame, f"손 모양 인식 중... ({gesture.progress}/{gesture.commit_frames})", (30, 80), font_size=30, color=(255, 165, 0))
+
+    return annotated_frame
+
+# 캡처 스레드 - 카메라에서 읽은 최신 프레임만 슬롯에 보관
+def capture_loop(cap, frame_slot, timer, stop_event):
+    while not stop_event.is_set():
+        with timer.measure("capture"):
+            ret, frame = cap.read()
+        if not ret:
+            print("카메라 프레임을 읽을 수 없습니다. 다시 시도합니다.")
+            continue
+        frame_slot.put((time.perf_counter(), frame))
+    frame_slot.close()
+
+# 프레임 하나의 추론 단계 (inference_loop / pooled_inference_loop / benchmark.py 공용)
+# 프레임을 좌우 반전(거울 효과)한 뒤 예측 - 손 모양 확정 중에는 생략(None), 화면이 정지해 있으면 이전 결과 재사용
+# predict는 반전된 프레임의 검출 배열(워커 모드에서는 Future)을 반환
+# 상태 변경은 렌더링 스레드에서만 하므로 여기서는 gesture 상태를 읽기만 함
+def infer_frame(frame, predict, motion_gate=None, gesture=None):
+    frame = cv2.flip(frame, 1)
+    if gesture is not None and gesture.state == COMMITTED:
+        return frame, None
+    if motion_gate is None or motion_gate.should_infer(frame):
+        dets = predict(frame)
+        if motion_gate is not None:
+            motion_gate.remember(dets)
+        return frame, dets
+    return frame, motion_gate.last_result
+
+# 추론 스레드 - 최신 프레임을 반전 후 예측하여 렌더링 큐로 전달
+def inference_loop(frame_slot, result_queue, timer, stop_event, motion_gate=None, tracker=None, gesture=None):
+    predict = functools.partial(detect_hands, tracker=tracker)
+    while not stop_event.is_set():
+        item = frame_slot.get(timeout=0.1)
+        if item is None:
+            continue
+        captured_at, frame = item
+
+        with timer.measure("inference"):
+            frame, dets = infer_frame(frame, predict, motion_gate, gesture)
+        result_queue.put((captured_at, frame, dets))
+    result_queue.close()
+
+# 워커 프로세스 모드의 추론 스레드 - 프레임을 공유 메모리로 워커에 보내고 워커 수만큼 동시에 추론
+# 결과는 캡처 순서대로 렌더링 큐에 전달 (정지 화면은 마지막 추론 요청의 결과를 재사용)
+def pooled_inference_loop(frame_slot, result_queue, timer, stop_event, pool, motion_gate=None, gesture=None):
+    in_flight = deque()  # (captured_at, frame, Future 또는 None)
+
+    def emit_oldest():
+        captured_at, frame, future = in_flight.popleft()
+        try:
+            dets = future.result() if future is not None else None
+        except RuntimeError as e:
+            if pool.error is not None:
+                raise
+            # 이 프레임만 추론에 실패 - 손이 없는 것으로 처리
+            print(f"추론 실패: {e}")
+            dets = empty_detections()
+        timer.record("inference", time.perf_counter() - captured_at)
+        result_queue.put((captured_at, frame, dets))
+
+    try:
+        while not stop_event.is_set():
+            # 완료된 결과를 순서대로 전달
+            while in_flight and (in_flight[0][2] is None or in_flight[0][2].done()):
+                emit_oldest()
+
+            item = frame_slot.get(timeout=0.01)
+            if item is None:
+                continue
+            captured_at, frame = item
+
+            frame, future = infer_frame(frame, pool.submit, motion_gate, gesture)
+            in_flight.append((captured_at, frame, future))
+
+            # 워커 수보다 많이 밀리면 가장 오래된 결과를 기다림
+            while len(in_flight) > pool.num_workers:
+                emit_oldest()
+    except RuntimeError:
+        if pool.error is None:
+            raise
+        # 워커 프로세스가 죽어 더 추론할 수 없음 - 렌더링 루프도 종료되도록 알림
+        print(f"추론을 중단합니다: {pool.error}")
+        stop_event.set()
+    finally:
+        result_queue.close()
+
+# 추적 모드이면 이전 손 주변 영역, 아니면 전체 프레임 추론
+def detect_hands(frame, tracker=None):
+    detector = get_detector()
+    if tracker is None or not tracker.usable(detector):
+        return detector.predict(frame)
+    return tracker.detect(frame, lambda image, imgsz: detector.predict(image, imgsz=imgsz))
+
+# models/ 폴더에서 현재 모델 다음 모델을 백그라운드로 로드 (로드가 끝나면 추론 스레드가 자동으로 새 모델 사용)
+def load_next_model():
+    names = list(registry.models())
+    if not names:
+        print("models/ 폴더에서 모델을 찾을 수 없습니다.")
+        return
+    current = registry.current_info.name if registry.current_info else None
+    name = names[(names.index(current) + 1) % len(names)] if current in names else names[0]
+    try:
+        registry.load(name)
+        print(f"\n{name} 모델을 로드하는 중입니다... (기존 모델로 계속 추론)")
+    except RuntimeError as e:
+        print(e)
+
+# 메인 함수 - 캡처 / 추론 / 렌더링(화면 출력) 단계를 파이프라인으로 실행
+def main(camera_index=0, queue_size=QUEUE_SIZE, drop_policy=DROP_POLICY, stats_interval=STATS_INTERVAL,
+         motion_gate_enabled=MOTION_GATE_ENABLED, motion_threshold=MOTION_THRESHOLD, max_staleness=MAX_STALENESS,
+         tracking_enabled=TRACKING_ENABLED, tracking_imgsz=ROI_IMGSZ,
+         commit_frames=COMMIT_FRAMES, hold_seconds=HOLD_SECONDS, num_workers=NUM_WORKERS):
+    global inference_pool
     print(f"{camera_index}번 카메라를 사용합니다.")
 
     # 카메라 설정 - 향상된 설정
@@ -65,83 +262,338 @@ def main():
         print(f"카메라 {camera_index}를 열 수 없습니다.")
         return
 
+    # 첫 프레임이 모델 로드를 기다리지 않도록 미리 로드
+    if num_workers > 0:
+        # 워커 프로세스마다 모델을 로드하고, 카메라 해상도 크기의 공유 메모리 슬롯으로 프레임 전달
+        frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640, 3)
+        inference_pool = InferenceWorkerPool(MODEL_PATH, num_workers, frame_shape=frame_shape,
+                                             conf=registry.conf, iou=registry.iou)
+        if tracking_enabled:
+            print("워커 프로세스 모드에서는 ROI 추적을 사용하지 않습니다. (프레임을 동시에 추론하므로)")
+            tracking_enabled = False
+    else:
+        get_detector()
+
     print("\n[실시간 가위바위보 데모 시작]")
-    print("웹캠을 켜고 손을 화면 중앙에 위치시켜 주세요. (종료: Q 키)")
+    print("웹캠을 켜고 손을 화면 중앙에 위치시켜 주세요. (종료: Q 키, 다음 모델: N 키, 모델 되돌리기: B 키)")
+    print(f"파이프라인 설정: 큐 크기 {queue_size}, 드롭 정책 {drop_policy}")
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("카메라 프레임을 읽을 수 없습니다. 다시 시도합니다.")
-            continue
+    timer = StageTimer()
+    stop_event = threading.Event()
+    frame_slot = LatestFrameSlot()
+    result_queue = StageQueue(maxsize=queue_size, drop_policy=drop_policy)
+    motion_gate = MotionGate(motion_threshold, max_staleness) if motion_gate_enabled else None
+    if motion_gate is not None:
+        print(f"움직임 감지: 임계값 {motion_threshold}, 최대 재사용 시간 {max_staleness}초")
+    tracker = RoiTracker(imgsz=tracking_imgsz) if tracking_enabled else None
+    if tracker is not None:
+        print(f"ROI 추적 모드: 입력 크기 {tracking_imgsz}")
+    gesture = GestureStateMachine(commit_frames, hold_seconds=hold_seconds)
+    print(f"손 모양 확정: {commit_frames} 프레임 연속, 결과 유지 {hold_seconds}초")
 
-        # 프레임 좌우 반전 (거울 효과)
-        frame = cv2.flip(frame, 1)
-        
-        # YOLO v11 모델 예측 - 향상된 설정
-        results = model.predict(frame, conf=0.5, iou=0.45)
-        result = results[0]
-        
-        # 결과 처리
-        boxes = result.boxes
-        num_objects = len(boxes)
-        
-        # 화면에 결과 표시할 프레임 준비
-        annotated_frame = result.plot()
-        
-        if num_objects == 0:
-            # 손 객체가 없는 경우
-            annotated_frame = put_korean_text(annotated_frame, "손을 인식하지 못했어요.", (30, 40), font_size=30, color=(100, 100, 100))
-        elif num_objects > 1:
-            # 2개 이상의 손 객체가 인식된 경우
-            annotated_frame = put_korean_text(annotated_frame, "손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.", (30, 40), font_size=30, color=(0, 0, 255))
-            print("손이 2개 이상 인식됨! 화면 또는 자세를 조정해 주세요.")
-        else:
-            # 정상적으로 하나의 손 객체만 인식된 경우
-            best_idx = boxes.conf.argmax().item()
-            label_id = int(boxes.cls[best_idx])
-            conf = float(boxes.conf[best_idx])
-            
-            # 클래스 이름 가져오기
-            class_name = result.names.get(label_id, "unknown")
-            print(f"감지된 클래스: {class_name}, 신뢰도: {conf:.2f}")
+    if inference_pool is not None:
+        inference_thread = threading.Thread(target=pooled_inference_loop, args=(frame_slot, result_queue, timer, stop_event, inference_pool, motion_gate, gesture), daemon=True)
+    else:
+        inference_thread = threading.Thread(target=inference_loop, args=(frame_slot, result_queue, timer, stop_event, motion_gate, tracker, gesture), daemon=True)
+    threads = [
+        threading.Thread(target=capture_loop, args=(cap, frame_slot, timer, stop_event), daemon=True),
+        inference_thread,
+    ]
+    for thread in threads:
+        thread.start()
+
+    last_stats = time.perf_counter()
+    try:
+        # 렌더링 / 화면 출력은 메인 스레드에서 실행 (cv2.imshow 제약)
+        while True:
+            item = result_queue.get(timeout=0.05)
+            if item is None and stop_event.is_set():
+                # 추론 스레드가 중단됨 (워커 프로세스 종료 등)
+                break
+            if item is not None:
+                captured_at, frame, dets = item
+                with timer.measure("render"):
+                    annotated_frame = render_result(frame, dets, gesture)
+                
+                # 화면 출력
+                with timer.measure("display"):
+                    cv2.imshow("YOLO v11 RSP Demo", annotated_frame)
+                timer.record("end_to_end", time.perf_counter() - captured_at)
             
-            # 클래스 이름 매핑
-            user_move = label_map.get(class_name, class_name.lower())
-            ai_move = get_ai_move(user_move)
-
-            if user_move == "justhand":
-            # justhand일 경우 특별 메시지 표시
-                annotated_frame = put_korean_text(annotated_frame, "컴퓨터: 승리!", (30, 80), font_size=30, color=(0, 0, 255))
-                result_text = "판정패! (허용되지 않는 손 모양)"
-            else:
-                # 일반적인 가위바위보 경우
-                annotated_frame = put_korean_text(annotated_frame, f"컴퓨터: {ai_move}", (30, 80), font_size=30, color=(0, 0, 255))
-                result_text = determine_winner(user_move, ai_move)
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            elif key in (ord('n'), ord('b')) and inference_pool is not None:
+                print("워커 프로세스 모드에서는 모델 교체를 지원하지 않습니다.")
+            elif key == ord('n'):
+                load_next_model()
+            elif key == ord('b'):
+                info = registry.rollback()
+                if info is None:
+                    print("되돌릴 이전 모델이 없습니다.")
 
-            annotated_frame = put_korean_text(annotated_frame, result_text, (30, 120), font_size=30, color=(255, 165, 0))
-            print(f"사용자: {user_move} ({conf:.2f})  →  컴퓨터: {ai_move}  →  {result_text}")
+            if stats_interval and time.perf_counter() - last_stats >= stats_interval:
+                last_stats = time.perf_counter()
+                print_stats(timer, frame_slot, result_queue, motion_gate, tracker)
+    finally:
+        stop_event.set()
+        result_queue.close()
+        for thread in threads:
+            thread.join(timeout=1.0)
+        cap.release()
+        cv2.destroyAllWindows()
+        if inference_pool is not None:
+            inference_pool.close()
 
+    print_stats(timer, frame_slot, result_queue, motion_gate, tracker)
+    print("\n[End Demo]")
 
+# 단계별 소요 시간 출력
+def print_stats(timer, frame_slot, result_queue, motion_gate=None, tracker=None):
+    print("\n[파이프라인 단계별 시간]")
+    print(timer.format_summary())
+    print(f"  버려진 프레임: 캡처 {frame_slot.dropped}개, 렌더링 큐 {result_queue.dropped}개")
+    if motion_gate is not None:
+        print(f"  추론 생략: {motion_gate.skipped}회 (추론 {motion_gate.inferred}회)")
+    if tracker is not None:
+        print(f"  ROI 추적: 영역 추론 {tracker.roi_frames}회, 전체 프레임 {tracker.full_frames}회, 추적 실패 {tracker.fallbacks}회")
+    if inference_pool is not None:
+        print(f"  {inference_pool.format_stats()}")
 
-            
-            # # 화면에 텍스트 출력
-            # annotated_frame = put_korean_text(annotated_frame, f"사용자: {user_move} ({conf:.2f})", (30, 40), font_size=30, color=(0, 255, 0))
-            # annotated_frame = put_korean_text(annotated_frame, f"컴퓨터: {ai_move}", (30, 80), font_size=30, color=(0, 0, 255))
-            
-            # # 승패 결정 추가
-            # result_text = determine_winner(user_move, ai_move)
-            # annotated_frame = put_korean_text(annotated_frame, result_text, (30, 120), font_size=30, color=(255, 165, 0))
-            # print(f"사용자: {user_move} ({conf:.2f})  →  컴퓨터: {ai_move}  →  {result_text}")
-        
-        # 화면 출력
-        cv2.imshow("YOLO v11 RSP Demo", annotated_frame)
-        
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+# 오프라인(헤드리스) 처리 설정 - 카메라 / 화면 없이 녹화 영상이나 이미지 폴더를 처리
+OFFLINE_BATCH_SIZE = 8     # 한 번에 추론할 프레임 수
+OFFLINE_FPS = 30.0         # 이미지 폴더 입력의 프레임 속도 (영상은 파일의 FPS 사용)
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+TABLE_COLUMNS = ["frame", "time", "hands", "class", "conf", "x1", "y1", "x2", "y2", "outcome", "move", "ai_move", "result"]
+
+# 영상 파일 또는 이미지 폴더를 열어 (프레임 속도, 전체 프레임 수, 프레임 반복자) 반환
+def open_source(path, fps=OFFLINE_FPS):
+    if os.path.isdir(path):
+        files = sorted(f for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTS))
+
+        def read_images():
+            for name in files:
+                frame = cv2.imread(os.path.join(path, name))
+                if frame is None:
+                    print(f"이미지를 읽을 수 없음: {name}")
+                    continue
+                yield frame
+        return fps, len(files), read_images()
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"영상을 열 수 없습니다: {path}")
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+
+    def read_video():
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
+    return source_fps, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), read_video()
+
+# 디코딩 스레드 - 프레임을 읽어 반전한 뒤 순서대로 큐에 넣음 (큐가 가득 차면 대기, 프레임 손실 없음)
+def decode_loop(frames, decoded, timer):
+    index = 0
+    while True:
+        with timer.measure("decode"):
+            frame = next(frames, None)
+            if frame is not None:
+                frame = cv2.flip(frame, 1)
+        if frame is None:
             break
-    
-    cap.release()
-    cv2.destroyAllWindows()
-    print("\n[End Demo]")
+        decoded.put((index, frame))
+        index += 1
+    decoded.close()
+
+# 배치 추론 스레드 - batch_size 프레임씩 모아 한 번에 추론
+# 손 모양 확정 중(영상 시간 기준 유지 시간 안)인 프레임은 추론하지 않고(None), 움직임이 없는 프레임은 직전 결과 재사용
+# gesture 상태 변경은 렌더링(메인) 스레드에서만 하므로 여기서는 읽기만 함 - 확정을 늦게 보더라도 렌더링에서
+# 유지 중인 프레임의 검출 결과는 쓰지 않으므로 출력은 스레드 타이밍과 관계없이 같음
+def batch_inference_loop(decoded, results, timer, batch_size, fps, motion_gate=None, gesture=None):
+    detector = get_detector()
+    last = None
+    while True:
+        item = decoded.get()
+        if item is None:
+            break
+        batch = [item]
+        while len(batch) < batch_size:
+            item = decoded.get()
+            if item is None:
+                break
+            batch.append(item)
+
+        # 추론할 프레임만 골라 배치로 추론
+        # plan: 프레임별 배치 내 결과 번호, -1이면 직전 결과 재사용, None이면 손 모양 확정 중이라 추론 생략
+        # 추론할 프레임은 고르는 즉시 움직임 감지에 기록하여 같은 배치의 다음 프레임이 이 프레임과 비교되도록 함
+        plan, frames = [], []
+        for index, frame in batch:
+            now = index / fps
+            if (gesture is not None and gesture.state == COMMITTED
+                    and now - gesture.committed_at < gesture.hold_seconds):
+                plan.append(None)
+            elif motion_gate is None or motion_gate.should_infer(frame, now=now):
+                if motion_gate is not None:
+                    motion_gate.remember(len(frames))   # 결과 자리 (배치 추론 후 검출 배열로 교체)
+                plan.append(len(frames))
+                frames.append(frame)
+            else:
+                plan.append(-1)
+        with timer.measure("inference"):
+            dets_list = detector.predict_batch(frames) if frames else []
+        for (index, frame), k in zip(batch, plan):
+            if k is None:
+                results.put((index, frame, None))
+                continue
+            if k >= 0 or last is None:
+                last = dets_list[k] if k >= 0 else empty_detections()
+            results.put((index, frame, last))
+        if motion_gate is not None and last is not None:
+            motion_gate.remember(last)
+    results.close()
+
+# 한 프레임의 검출 / 게임 결과를 표 한 줄로 정리 (결과 유지 중에는 추론하지 않으므로 검출 열은 비움)
+def make_row(index, now, dets, gesture, hold, names):
+    row = dict.fromkeys(TABLE_COLUMNS, "")
+    row.update(frame=index, time=round(now, 3))
+    if hold:
+        row.update(outcome="hold", move=gesture.move, ai_move=get_ai_move(gesture.move), result=gesture.view[-1][0])
+        return row
+
+    row["hands"] = len(dets)
+    table = move_table(names)
+    outcome = classify(dets)
+    if len(dets):
+        x1, y1, x2, y2, conf, cls = dets[0].tolist()
+        row.update({"class": table.name(cls), "conf": round(conf, 4),
+                    "x1": round(x1, 1), "y1": round(y1, 1), "x2": round(x2, 1), "y2": round(y2, 1)})
+
+    if outcome == ONE_HAND and gesture.state == COMMITTED:
+        # 이번 프레임에서 손 모양이 확정되어 승패 판정
+        row.update(outcome="committed", move=gesture.move,
+                   ai_move=get_ai_move(gesture.move), result=gesture.view[-1][0])
+    elif outcome != ONE_HAND:
+        row["outcome"] = outcome
+    else:
+        row.update(outcome="recognizing", move=table.move(cls))
+    return row
+
+# Parquet 저장 가능 여부 - DataFrame.to_parquet는 pandas 외에 pyarrow 또는 fastparquet 엔진이 필요
+def parquet_available():
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        return False
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+# 프레임별 결과 표 저장 - .parquet이면 pandas(pyarrow)로, 그 밖에는 CSV로 한 줄씩 기록
+class ResultTable:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.lower().endswith(".parquet")
+        self.rows = []
+        self._file = None
+        if self.parquet and not parquet_available():
+            self.path = os.path.splitext(path)[0] + ".csv"
+            self.parquet = False
+            print(f"pandas와 Parquet 엔진(pyarrow 또는 fastparquet)이 설치되어 있지 않아 CSV로 저장합니다: {self.path}")
+        if not self.parquet:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=TABLE_COLUMNS)
+            self._writer.writeheader()
+
+    def add(self, row):
+        if self.parquet:
+            self.rows.append(row)
+        else:
+            self._writer.writerow(row)
+
+    def close(self):
+        if self.parquet:
+            import pandas as pd
+            pd.DataFrame(self.rows, columns=TABLE_COLUMNS).to_parquet(self.path, index=False)
+        else:
+            self._file.close()
+
+# 헤드리스 처리 - 디코딩 / 배치 추론 / 렌더링·인코딩을 스트리밍 파이프라인으로 실행하여
+# 결과 영상과 프레임별 결과 표 저장 (게임 판정 시각은 영상 시간 기준)
+def process_offline(input_path, output_path="output.mp4", table_path="output.csv", batch_size=OFFLINE_BATCH_SIZE,
+                    fps=OFFLINE_FPS, motion_gate_enabled=MOTION_GATE_ENABLED, motion_threshold=MOTION_THRESHOLD,
+                    max_staleness=MAX_STALENESS, commit_frames=COMMIT_FRAMES, hold_seconds=HOLD_SECONDS):
+    fps, total, frames = open_source(input_path, fps)
+    print(f"입력: {input_path} ({total}프레임, {fps:.1f} FPS)")
+    names = get_detector().names
+
+    timer = StageTimer(window=None)
+    # 디코딩 / 추론이 앞서 나가도 메모리가 늘지 않도록 큐 크기 제한 (BLOCK: 프레임 손실 없음)
+    decoded = StageQueue(batch_size * 2, BLOCK)
+    results = StageQueue(batch_size * 2, BLOCK)
+    # 정지 화면 / 결과 유지 시간 판단은 모두 영상 시간 기준
+    motion_gate = MotionGate(motion_threshold, max_staleness) if motion_gate_enabled else None
+    gesture = GestureStateMachine(commit_frames, hold_seconds=hold_seconds)
+
+    threads = [
+        threading.Thread(target=decode_loop, args=(frames, decoded, timer), daemon=True),
+        threading.Thread(target=batch_inference_loop, args=(decoded, results, timer, batch_size, fps, motion_gate, gesture), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    writer = None
+    table = ResultTable(table_path)
+    count = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            item = results.get()
+            if item is None:
+                break
+            index, frame, dets = item
+            now = index / fps
+
+            # 결과 유지 중에는 검출 결과 대신 확정 화면 출력 (실시간 데모와 같은 판정 흐름)
+            with timer.measure("render"):
+                hold = gesture.is_committed(now)
+                annotated = render_result(frame, None if hold else dets, gesture, now)
+                table.add(make_row(index, now, dets, gesture, hold, names))
+
+            with timer.measure("encode"):
+                if writer is None:
+                    size = (annotated.shape[1], annotated.shape[0])
+                    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+                if (annotated.shape[1], annotated.shape[0]) != size:
+                    annotated = cv2.resize(annotated, size)
+                writer.write(annotated)
+
+            count += 1
+            if count % 500 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {count}/{total or '?'} 프레임 ({count / elapsed:.1f} FPS)")
+    finally:
+        decoded.close()
+        results.close()
+        if writer is not None:
+            writer.release()
+        table.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n[오프라인 처리 완료] {count}프레임, {elapsed:.1f}초 ({count / max(elapsed, 1e-9):.1f} FPS, "
+          f"실시간 대비 {count / fps / max(elapsed, 1e-9):.1f}배)")
+    print(timer.format_summary())
+    if motion_gate is not None:
+        print(f"  추론 생략: {motion_gate.skipped}회 (추론 {motion_gate.inferred}회)")
+    print(f"결과 영상: {output_path}\n프레임별 결과: {table.path}")
 
 # 승패 결정 함수 추가
 def determine_winner(user_move, ai_move):
@@ -157,4 +609,33 @@ def determine_winner(user_move, ai_move):
         return "컴퓨터 승리!"
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="YOLO v11 실시간 가위바위보 데모")
+    parser.add_argument("--camera", type=int, default=0, help="카메라 번호")
+    parser.add_argument("--model", default=MODEL_PATH, help="모델 경로 또는 models/ 폴더의 모델 이름")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="추론 워커 프로세스 수 (0이면 단일 프로세스)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="추론 → 렌더링 큐 크기")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default=DROP_POLICY, help="큐가 가득 찼을 때의 드롭 정책")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL, help="단계별 시간 출력 간격 (초)")
+    parser.add_argument("--no-motion-gate", action="store_true", help="매 프레임 추론 (움직임 감지 끄기)")
+    parser.add_argument("--motion-threshold", type=float, default=MOTION_THRESHOLD, help="다시 추론할 썸네일 평균 차이 임계값 (0~255)")
+    parser.add_argument("--max-staleness", type=float, default=MAX_STALENESS, help="정지 상태에서 검출 결과를 재사용할 최대 시간 (초)")
+    parser.add_argument("--commit-frames", type=int, default=COMMIT_FRAMES, help="손 모양 확정에 필요한 연속 프레임 수")
+    parser.add_argument("--hold-seconds", type=float, default=HOLD_SECONDS, help="확정된 결과를 유지하는 시간 (초)")
+    parser.add_argument("--track", action="store_true", help="ROI 추적 모드 (이전 손 주변만 추론)")
+    parser.add_argument("--track-imgsz", type=int, default=ROI_IMGSZ, help="ROI 추적 모드 입력 크기")
+    parser.add_argument("--input", help="헤드리스 처리할 영상 파일 또는 이미지 폴더 (지정하면 카메라 / 화면 없이 실행)")
+    parser.add_argument("--output", default="output.mp4", help="헤드리스 처리 결과 영상 경로")
+    parser.add_argument("--table", default="output.csv", help="프레임별 결과 표 경로 (.csv 또는 .parquet)")
+    parser.add_argument("--batch-size", type=int, default=OFFLINE_BATCH_SIZE, help="헤드리스 처리 배치 크기")
+    parser.add_argument("--fps", type=float, default=OFFLINE_FPS, help="이미지 폴더 입력의 프레임 속도")
+    args = parser.parse_args()
+    MODEL_PATH = args.model
+    if args.input:
+        process_offline(args.input, args.output, args.table, batch_size=args.batch_size, fps=args.fps,
+                        motion_gate_enabled=not args.no_motion_gate, motion_threshold=args.motion_threshold,
+                        max_staleness=args.max_staleness, commit_frames=args.commit_frames, hold_seconds=args.hold_seconds)
+        raise SystemExit
+    main(camera_index=args.camera, queue_size=args.queue_size, drop_policy=args.drop_policy, stats_interval=args.stats_interval,
+         motion_gate_enabled=not args.no_motion_gate, motion_threshold=args.motion_threshold, max_staleness=args.max_staleness,
+         tracking_enabled=args.track, tracking_imgsz=args.track_imgsz,
+         commit_frames=args.commit_frames, hold_seconds=args.hold_seconds, num_workers=args.workers)
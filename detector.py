@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+공용 손 모양 검출기 (Detector)
+
+백엔드(PyTorch / ONNX Runtime / OpenVINO)에 관계없이 같은 형태의 결과를 반환합니다.
+검출 결과는 (N, 6) float32 numpy 배열이며, 각 행은 [x1, y1, x2, y2, conf, cls] 입니다.
+행은 신뢰도 내림차순으로 정렬되어 있으므로 dets[0]이 가장 신뢰도가 높은 검출입니다.
+"""
+import ast
+import os
+
+import cv2
+import numpy as np
+
+# 검출 배열 열 인덱스
+X1, Y1, X2, Y2, CONF, CLS = range(6)
+
+# 백엔드 이름
+PYTORCH = "pytorch"
+ONNXRUNTIME = "onnxruntime"
+OPENVINO = "openvino"
+AUTO = "auto"
+
+# CPU에서 빠른 순서 (자동 선택 시 사용 가능한 첫 번째 백엔드 선택)
+BACKEND_PREFERENCE = (OPENVINO, ONNXRUNTIME, PYTORCH)
+
+# 메타데이터가 없는 모델의 기본 클래스 (data.yaml과 동일한 순서)
+DEFAULT_NAMES = {0: "paper", 1: "rock", 2: "scissors", 3: "justhand"}
+
+# 클래스별 바운딩 박스 색상
+PALETTE = [(4, 42, 255), (11, 219, 235), (243, 243, 243), (0, 223, 183), (17, 31, 104), (255, 111, 221)]
+
+
+def empty_detections():
+    return np.zeros((0, 6), dtype=np.float32)
+
+
+# 레터박스 리사이즈 - 비율을 유지하며 new_shape (h, w)에 맞추고 나머지는 회색(114)으로 채움
+def letterbox(img, new_shape=(640, 640), color=(114, 114, 114)):
+    h, w = img.shape[:2]
+    ratio = min(new_shape[0] / h, new_shape[1] / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_w, pad_h = (new_shape[1] - new_w) / 2, (new_shape[0] - new_h) / 2
+
+    if (w, h) != (new_w, new_h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return img, ratio, (left, top)
+
+
+# 프레임 목록을 (B, 3, H, W) float32 입력 텐서로 변환 (Ultralytics와 동일하게 BGR → RGB, 0~1 정규화)
+def make_blob(frames, input_size):
+    blob = np.empty((len(frames), 3, input_size[0], input_size[1]), dtype=np.float32)
+    transforms = []
+    for i, frame in enumerate(frames):
+        img, ratio, pad = letterbox(frame, input_size)
+        blob[i] = img[:, :, ::-1].transpose(2, 0, 1)
+        transforms.append((ratio, pad, frame.shape[:2]))
+    blob *= 1.0 / 255.0
+    return blob, transforms
+
+
+# 클래스별 NMS (numpy)
+def nms(boxes, scores, classes, iou_threshold, max_det=300):
+    # 클래스가 다른 박스끼리 겹치지 않도록 클래스별로 좌표를 이동
+    offset = classes[:, None] * 7680.0
+    shifted = boxes + offset
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0 and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+# YOLO 원시 출력 (4 + nc, anchors) 하나를 검출 배열로 변환 (입력 텐서 좌표계)
+def decode_predictions(pred, conf_threshold, iou_threshold, max_det=300):
+    pred = pred.T  # (anchors, 4 + nc)
+    scores_all = pred[:, 4:]
+    classes = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(len(classes)), classes]
+    mask = scores > conf_threshold
+    if not mask.any():
+        return empty_detections()
+
+    xywh, scores, classes = pred[mask, :4], scores[mask], classes[mask].astype(np.float32)
+    boxes = np.empty_like(xywh)
+    boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+    keep = nms(boxes, scores, classes, iou_threshold, max_det)
+    return np.concatenate([boxes[keep], scores[keep, None], classes[keep, None]], axis=1).astype(np.float32)
+
+
+# 입력 텐서 좌표계의 박스를 원본 이미지 좌표로 복원
+def scale_detections(dets, ratio, pad, orig_shape):
+    if len(dets) == 0:
+        return dets
+    dets[:, [X1, X2]] = ((dets[:, [X1, X2]] - pad[0]) / ratio).clip(0, orig_shape[1])
+    dets[:, [Y1, Y2]] = ((dets[:, [Y1, Y2]] - pad[1]) / ratio).clip(0, orig_shape[0])
+    return dets
+
+
+def _sort_by_conf(dets):
+    return dets[np.argsort(-dets[:, CONF], kind="stable")] if len(dets) > 1 else dets
+
+
+def _parse_imgsz(value, default=640):
+    if value is None:
+        return (default, default)
+    if isinstance(value, str):
+        value = ast.literal_eval(value)
+    if isinstance(value, int):
+        return (value, value)
+    return (int(value[0]), int(value[-1]))
+
+
+class UltralyticsBackend:
+    """Ultralytics YOLO (.pt) 백엔드"""
+
+    name = PYTORCH
+
+    def __init__(self, model_path, imgsz=640, num_threads=None):
+        from ultralytics import YOLO
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        self.model = YOLO(model_path, task="detect")
+        self.names = dict(self.model.names)
+        self.imgsz = imgsz
+        self.input_size = None  # 입력 크기 자유
+
+    def predict_batch(self, frames, conf, iou, imgsz=None):
+        results = self.model.predict(list(frames), conf=conf, iou=iou, imgsz=imgsz or self.imgsz, verbose=False)
+        return [_sort_by_conf(result.boxes.data.cpu().numpy().astype(np.float32)[:, :6]) for result in results]
+
+
+class _RawOutputBackend:
+    """원시 YOLO 출력을 내는 백엔드(ONNX Runtime, OpenVINO)의 공통 전/후처리"""
+
+    fixed_batch = None
+    input_size = None
+    end2end = False
+
+    def __init__(self, imgsz=640):
+        self.imgsz = imgsz
+
+    def _infer(self, blob):
+        raise NotImplementedError
+
+    def predict_batch(self, frames, conf, iou, imgsz=None):
+        frames = list(frames)
+        if not frames:
+            return []
+        input_size = self.input_size or _parse_imgsz(imgsz or self.imgsz)
+
+        if self.fixed_batch == 1 and len(frames) > 1:
+            # 배치 크기가 1로 고정된 모델은 한 장씩 추론
+            return [self.predict_batch([frame], conf, iou, imgsz)[0] for frame in frames]
+
+        blob, transforms = make_blob(frames, input_size)
+        preds = self._infer(blob)
+
+        detections = []
+        for pred, (ratio, pad, orig_shape) in zip(preds, transforms):
+            if self.end2end:
+                # 모델 내부에서 NMS까지 끝난 출력 (max_det, 6)
+                dets = pred[pred[:, CONF] > conf].astype(np.float32)
+            else:
+                dets = decode_predictions(pred, conf, iou)
+            detections.append(_sort_by_conf(scale_detections(dets, ratio, pad, orig_shape)))
+        return detections
+
+
+class OnnxRuntimeBackend(_RawOutputBackend):
+    """ONNX Runtime (CPU) 백엔드"""
+
+    name = ONNXRUNTIME
+
+    def __init__(self, model_path, imgsz=640, num_threads=None):
+        import onnxruntime as ort
+        super().__init__(imgsz)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, width = model_input.shape
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (height, width)
+
+        # Ultralytics로 내보낸 모델은 메타데이터에 클래스 이름과 입력 크기를 기록함
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else dict(DEFAULT_NAMES)
+        if "imgsz" in metadata:
+            self.imgsz = _parse_imgsz(metadata["imgsz"])
+        self.end2end = metadata.get("end2end") == "True"
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINOBackend(_RawOutputBackend):
+    """OpenVINO (CPU) 백엔드 - *_openvino_model 폴더 또는 .onnx 파일"""
+
+    name = OPENVINO
+
+    def __init__(self, model_path, imgsz=640, num_threads=None):
+        import openvino as ov
+        super().__init__(imgsz)
+
+        if os.path.isdir(model_path):
+            xml_files = [f for f in os.listdir(model_path) if f.endswith(".xml")]
+            if not xml_files:
+                raise FileNotFoundError(f"OpenVINO 모델(.xml)을 찾을 수 없습니다: {model_path}")
+            model_file = os.path.join(model_path, xml_files[0])
+            metadata = read_metadata_yaml(os.path.join(model_path, "metadata.yaml"))
+        else:
+            # .onnx 파일 - OnnxRuntimeBackend와 같이 모델에 기록된 메타데이터 사용
+            model_file = model_path
+            metadata = read_onnx_metadata(model_path)
+
+        core = ov.Core()
+        model = core.read_model(model_file)
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if num_threads:
+            config["INFERENCE_NUM_THREADS"] = num_threads
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.output = self.compiled.output(0)
+
+        shape = model.input(0).get_partial_shape()
+        if shape[0].is_static:
+            self.fixed_batch = shape[0].get_length()
+        if shape[2].is_static and shape[3].is_static:
+            self.input_size = (shape[2].get_length(), shape[3].get_length())
+
+        self.names = {int(k): v for k, v in metadata.get("names", DEFAULT_NAMES).items()}
+        if "imgsz" in metadata:
+            self.imgsz = _parse_imgsz(metadata["imgsz"])
+        self.end2end = bool(metadata.get("end2end", False))
+
+    def _infer(self, blob):
+        return self.compiled(blob)[self.output]
+
+
+def read_onnx_metadata(path):
+    """
+    Ultralytics가 ONNX 모델에 기록한 메타데이터를 metadata.yaml과 같은 형태로 읽기 (names / imgsz / end2end)
+
+    onnx 패키지가 없으면 ImportError - 클래스 이름 없이 로드하면 클래스 순서가 다른 모델의 손 모양이 틀리므로
+    이 백엔드 대신 다음 백엔드(ONNX Runtime)를 사용하게 함
+    """
+    import onnx
+    model = onnx.load(path, load_external_data=False)
+    raw = {prop.key: prop.value for prop in model.metadata_props}
+    metadata = {}
+    if "names" in raw:
+        metadata["names"] = ast.literal_eval(raw["names"])
+    if "imgsz" in raw:
+        metadata["imgsz"] = raw["imgsz"]
+    metadata["end2end"] = raw.get("end2end") == "True"
+    return metadata
+
+
+def read_metadata_yaml(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+BACKENDS = {PYTORCH: UltralyticsBackend, ONNXRUNTIME: OnnxRuntimeBackend, OPENVINO: OpenVINOBackend}
+
+
+def backend_available(backend):
+    """백엔드 런타임 패키지가 설치되어 있는지 확인"""
+    module = {PYTORCH: "ultralytics", ONNXRUNTIME: "onnxruntime", OPENVINO: "openvino"}[backend]
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def find_model_files(model_path):
+    """
+    같은 모델의 백엔드별 파일 찾기
+
+    models/best4.pt 라면 models/best4_openvino_model/, models/best4.onnx, models/best4.pt 순으로 확인합니다.
+
+    Returns:
+        {backend: path} 딕셔너리
+    """
+    stem, ext = os.path.splitext(model_path)
+    if stem.endswith("_openvino_model"):
+        stem = stem[:-len("_openvino_model")]
+
+    candidates = {
+        OPENVINO: [stem + "_openvino_model", stem + ".onnx"],
+        ONNXRUNTIME: [stem + ".onnx"],
+        PYTORCH: [stem + ".pt"],
+    }
+    found = {}
+    for backend, paths in candidates.items():
+        for path in paths:
+            if os.path.exists(path):
+                found[backend] = path
+                break
+    return found
+
+
+class Detector:
+    """백엔드에 관계없이 (N, 6) 검출 배열을 반환하는 검출기"""
+
+    def __init__(self, backend, model_path, conf=0.25, iou=0.7):
+        self.backend = backend
+        self.model_path = model_path
+        self.conf = conf
+        self.iou = iou
+
+    @property
+    def backend_name(self):
+        return self.backend.name
+
+    @property
+    def names(self):
+        return self.backend.names
+
+    @property
+    def input_size(self):
+        """고정 입력 크기 (h, w), 입력 크기가 자유로운 모델이면 None (이때만 imgsz 지정이 적용됨)"""
+        return self.backend.input_size
+
+    def class_name(self, class_id):
+        return self.names.get(int(class_id), "unknown")
+
+    def predict(self, frame, conf=None, iou=None, imgsz=None):
+        """이미지 한 장 추론 - (N, 6) 검출 배열"""
+        return self.predict_batch([frame], conf, iou, imgsz)[0]
+
+    def predict_batch(self, frames, conf=None, iou=None, imgsz=None):
+        """여러 이미지를 한 번에 추론 - 이미지별 (N, 6) 검출 배열 목록"""
+        return self.backend.predict_batch(
+            frames,
+            self.conf if conf is None else conf,
+            self.iou if iou is None else iou,
+            imgsz,
+        )
+
+
+def create_detector(model_path, backend=AUTO, conf=0.25, iou=0.7, imgsz=640, num_threads=None):
+    """
+    검출기 생성
+
+    Args:
+        model_path: 모델 경로 (.pt, .onnx 또는 *_openvino_model 폴더)
+        backend: "auto"면 같은 이름의 내보낸 모델 중 CPU에서 가장 빠른 백엔드
+                 (OpenVINO → ONNX Runtime → PyTorch 순)를 선택
+        conf, iou: 기본 신뢰도 / NMS IoU 임계값
+        imgsz: 입력 크기가 고정되지 않은 모델의 기본 추론 크기
+        num_threads: 추론 스레드 수 (None이면 런타임 기본값, 여러 프로세스에서 나누어 쓸 때 지정)
+    """
+    files = find_model_files(model_path)
+
+    if backend == AUTO:
+        order = [b for b in BACKEND_PREFERENCE if b in files and backend_available(b)]
+        if not order:
+            raise FileNotFoundError(f"사용 가능한 모델 파일 또는 런타임을 찾을 수 없습니다: {model_path}")
+    else:
+        if backend not in BACKENDS:
+            raise ValueError(f"알 수 없는 백엔드: {backend} (사용 가능: {', '.join(BACKENDS)})")
+        path = files.get(backend)
+        if path is None and backend == PYTORCH and os.path.exists(model_path):
+            # Ultralytics는 .onnx 등 내보낸 모델도 직접 로드 가능
+            path = model_path
+        if path is None:
+            raise FileNotFoundError(f"{backend} 백엔드용 모델 파일을 찾을 수 없습니다: {model_path}")
+        files = {backend: path}
+        order = [backend]
+
+    last_error = None
+    for name in order:
+        try:
+            instance = BACKENDS[name](files[name], imgsz=imgsz, num_threads=num_threads)
+        except Exception as e:
+            print(f"{name} 백엔드 로드 실패: {e}")
+            last_error = e
+            continue
+        print(f"검출기 백엔드: {name} ({files[name]})")
+        return Detector(instance, files[name], conf=conf, iou=iou)
+    raise last_error
+
+
+# 검출 결과를 이미지에 직접 그림 (result.plot() 대체, img를 수정하고 그대로 반환)
+def draw_detections(img, dets, names, line_width=2, font_scale=0.6):
+    for x1, y1, x2, y2, conf, cls in dets:
+        class_id = int(cls)
+        color = PALETTE[class_id % len(PALETTE)]
+        p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+        cv2.rectangle(img, p1, p2, color, line_width, cv2.LINE_AA)
+
+        label = f"{names.get(class_id, class_id)} {conf:.2f}"
+        (tw, th), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 1)
+        top = p1[1] - th - baseline if p1[1] - th - baseline >= 0 else p1[1]
+        cv2.rectangle(img, (p1[0], top), (p1[0] + tw, top + th + baseline), color, -1, cv2.LINE_AA)
+        cv2.putText(img, label, (p1[0], top + th), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), 1, cv2.LINE_AA)
+    return img
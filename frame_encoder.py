@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+스트림 출력 프레임 인코더
+
+그라디오 3.x는 numpy 이미지 출력을 매 프레임 PNG로 인코딩하므로 CPU와 대역폭을 많이 씁니다.
+FrameEncoder는 출력 프레임을 지정한 크기로 줄이고 OpenCV(libjpeg-turbo / libwebp)로 JPEG 또는 WebP
+인코딩하여 세션별 파일에 씁니다. 그라디오에는 파일 경로를 넘기므로 파일 내용을 base64로만 변환해 전송합니다.
+
+- 출력 해상도(max_width, max_height)는 추론 입력 크기와 별개입니다.
+- adaptive=True이면 프레임 처리 시간이 budget을 넘을 때 품질을 낮추고, 여유가 생기면 다시 올립니다.
+- max_fps를 지정하면 그보다 자주 들어온 프레임은 처리하지 않습니다. (should_skip)
+
+사용법:
+    encoder = FrameEncoder(fmt="jpeg", quality=80, max_width=640, adaptive=True, budget=0.05)
+    if encoder.should_skip():
+        ...                                  # 이전 출력 유지
+    path = encoder.encode(rgb_frame, started=start_time)
+"""
+import os
+import tempfile
+import threading
+import time
+import weakref
+from itertools import count
+
+import cv2
+
+from pipeline import FrameBuffers
+
+FORMATS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+QUALITY_STEP = 5
+RECOVER_RATIO = 0.7          # 처리 시간이 budget의 이 비율보다 짧으면 품질을 다시 올림
+FILES_PER_SESSION = 2        # 세션별 출력 파일 수 (그라디오가 이전 파일을 읽는 동안 다음 파일에 씀)
+
+# 메모리 기반 임시 폴더가 있으면 사용 (디스크 쓰기 없음)
+OUTPUT_DIR = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "rps_stream")
+
+_encoder_ids = count()
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class EncoderStats:
+    """여러 FrameEncoder가 공유하는 인코딩 / 건너뛴 프레임 수, 전송 바이트, 품질 변경 횟수"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.encoded = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.quality_changes = 0
+
+    def add(self, encoded=0, skipped=0, nbytes=0, quality_changes=0):
+        with self._lock:
+            self.encoded += encoded
+            self.skipped += skipped
+            self.bytes += nbytes
+            self.quality_changes += quality_changes
+
+    @property
+    def mean_kb(self):
+        return self.bytes / self.encoded / 1024 if self.encoded else 0.0
+
+
+class FrameEncoder:
+    """세션 하나의 출력 프레임 축소 / 인코딩 / 출력 FPS 제한"""
+
+    def __init__(self, fmt="jpeg", quality=80, max_width=None, max_height=None, max_fps=None,
+                 adaptive=False, budget=None, min_quality=50, output_dir=OUTPUT_DIR, stats=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"지원하지 않는 출력 형식: {fmt} (사용 가능: {', '.join(FORMATS)})")
+        self.fmt = fmt
+        self.max_quality = quality
+        self.min_quality = min(min_quality, quality)
+        self.quality = quality
+        self.max_width = max_width
+        self.max_height = max_height
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.adaptive = adaptive and budget is not None
+        self.budget = budget
+        self.stats = stats
+        self.last_seconds = 0.0
+        self._last_output = None
+        self._buffers = FrameBuffers(1)
+        self._convert_buffers = FrameBuffers(1)
+
+        ext, self._quality_flag = FORMATS[fmt]
+        os.makedirs(output_dir, exist_ok=True)
+        prefix = os.path.join(output_dir, f"{os.getpid()}_{next(_encoder_ids)}")
+        self._paths = [f"{prefix}_{i}{ext}" for i in range(FILES_PER_SESSION)]
+        self._next = 0
+        # 세션 상태가 사라지면 출력 파일도 삭제
+        weakref.finalize(self, _remove_files, list(self._paths))
+
+    def should_skip(self, now=None):
+        """max_fps보다 자주 들어온 프레임이면 True (이 프레임은 처리 / 전송하지 않음)"""
+        if not self.min_interval or self._last_output is None:
+            return False
+        now = time.monotonic() if now is None else now
+        skip = now - self._last_output < self.min_interval
+        if skip and self.stats is not None:
+            self.stats.add(skipped=1)
+        return skip
+
+    def _resize(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(self.max_width / w if self.max_width else 1.0, self.max_height / h if self.max_height else 1.0)
+        if scale >= 1.0:
+            return frame
+        size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+        dst = self._buffers.next((size[1], size[0]) + frame.shape[2:], frame.dtype)
+        return cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+    def _adapt(self, seconds):
+        # 처리 시간이 예산을 넘으면 품질을 낮추고, 충분히 여유가 있으면 원래 품질 쪽으로 되돌림
+        previous = self.quality
+        if seconds > self.budget:
+            self.quality = max(self.quality - QUALITY_STEP, self.min_quality)
+        elif seconds < self.budget * RECOVER_RATIO:
+            self.quality = min(self.quality + QUALITY_STEP, self.max_quality)
+        return self.quality != previous
+
+    def encode(self, frame, started=None, rgb=True):
+        """
+        프레임을 축소 / 인코딩하여 세션 출력 파일에 쓰고 경로 반환
+
+        Args:
+            frame: 출력 프레임 (그라디오 프레임은 RGB)
+            started: 이 프레임 처리를 시작한 time.perf_counter() 값 (적응형 품질 판단용)
+        """
+        self._last_output = time.monotonic()
+        small = self._resize(frame)
+        if rgb:
+            # OpenCV 인코더는 BGR 순서를 사용
+            small = cv2.cvtColor(small, cv2.COLOR_RGB2BGR, dst=self._convert_buffers.next(small.shape, small.dtype))
+        ok, data = cv2.imencode(os.path.splitext(self._paths[0])[1], small, [self._quality_flag, self.quality])
+        if not ok:
+            raise RuntimeError(f"{self.fmt} 인코딩 실패")
+
+        path = self._paths[self._next]
+        self._next = (self._next + 1) % len(self._paths)
+        with open(path, "wb") as f:
+            f.write(data.tobytes())
+
+        changed = False
+        if started is not None:
+            self.last_seconds = time.perf_counter() - started
+            if self.adaptive:
+                changed = self._adapt(self.last_seconds)
+        if self.stats is not None:
+            self.stats.add(encoded=1, nbytes=len(data), quality_changes=int(changed))
+        return path
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+손 모양 확정 상태 머신
+
+프레임마다 바뀌는 단일 프레임 분류 결과를 바로 쓰지 않고, 최근 (손 모양, 신뢰도) 기록을
+링 버퍼에 모아 N 프레임 연속으로 같은 손 모양이 나왔을 때만 확정합니다.
+확정된 결과는 일정 시간 유지되며, 그동안에는 추론과 렌더링을 다시 할 필요가 없습니다.
+"""
+import time
+from collections import deque
+
+# 기본 설정
+COMMIT_FRAMES = 5       # 확정에 필요한 연속 프레임 수
+MIN_COMMIT_CONF = 0.5   # 확정에 사용할 최소 신뢰도
+HOLD_SECONDS = 3.0      # 확정된 결과를 유지하는 시간 (초)
+
+# 상태
+SEARCHING = "searching"   # 손 모양 인식 중
+COMMITTED = "committed"   # 손 모양 확정 (결과 유지 중)
+
+
+class GestureStateMachine:
+    """최근 프레임 기록으로 손 모양을 확정하고 일정 시간 유지하는 상태 머신"""
+
+    def __init__(self, commit_frames=COMMIT_FRAMES, min_conf=MIN_COMMIT_CONF, hold_seconds=HOLD_SECONDS):
+        self.commit_frames = max(int(commit_frames), 1)
+        self.min_conf = min_conf
+        self.hold_seconds = hold_seconds
+        self.history = deque(maxlen=self.commit_frames)
+        self.state = SEARCHING
+        self.move = None
+        self.conf = 0.0
+        self.committed_at = 0.0
+        self.view = None  # 확정 시점의 화면 출력 정보 (호출하는 쪽에서 저장)
+
+    def is_committed(self, now=None):
+        """확정 상태인지 확인 (유지 시간이 지나면 다시 인식 상태로 전환)"""
+        if self.state == COMMITTED:
+            now = time.monotonic() if now is None else now
+            if now - self.committed_at >= self.hold_seconds:
+                self.reset()
+        return self.state == COMMITTED
+
+    @property
+    def progress(self):
+        """현재 손 모양이 연속으로 나온 프레임 수"""
+        if not self.history or self.history[-1][0] is None:
+            return 0
+        last_move = self.history[-1][0]
+        count = 0
+        for move, conf in reversed(self.history):
+            if move != last_move or conf < self.min_conf:
+                break
+            count += 1
+        return count
+
+    def update(self, move, conf=0.0, now=None):
+        """
+        프레임 하나의 분류 결과 추가
+
+        Args:
+            move: 인식된 손 모양 (손이 없거나 여러 개면 None)
+            conf: 신뢰도
+
+        Returns:
+            현재 상태 (SEARCHING 또는 COMMITTED)
+        """
+        now = time.monotonic() if now is None else now
+        if self.is_committed(now):
+            return self.state
+
+        self.history.append((move, conf))
+        if move is not None and self.progress >= self.commit_frames:
+            self.state = COMMITTED
+            self.move = move
+            self.conf = sum(c for _, c in self.history) / len(self.history)
+            self.committed_at = now
+        return self.state
+
+    def reset(self):
+        self.history.clear()
+        self.state = SEARCHING
+        self.move = None
+        self.conf = 0.0
+        self.view = None
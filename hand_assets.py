@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+컴퓨터 손 이미지 캐시
+
+assets/images의 손 이미지를 시작할 때 한 번만 열어 요청한 크기별로 줄이고, 형식(PNG / WebP)별로
+미리 인코딩해 메모리와 캐시 폴더에 보관합니다. 그라디오에 파일 경로로 넘기면 매 프레임 이미지를
+다시 인코딩하지 않고 인코딩된 바이트를 그대로 전송합니다.
+
+사용법:
+    cache = HandAssetCache(sizes=[(400, 400)], formats=("webp", "png"))
+    cache.load()
+    cache.path("rock")          # 기본 크기 / 형식의 인코딩된 파일 경로
+    cache.encoded("rock")       # 인코딩된 바이트
+    cache.array("rock")         # RGBA numpy 배열
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image, features
+
+IMAGE_DIR = "assets/images"
+HAND_IMAGES = {
+    "rock": "rock.png",
+    "paper": "paper.png",
+    "scissors": "scissors.png",
+    "default": "yolo_c.png",
+    "none": "none.png",
+}
+DEFAULT_SIZES = [(400, 400)]
+DEFAULT_FORMATS = ("png",)
+WEBP_QUALITY = 90
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "rps_hand_assets")
+
+# 형식별 PIL 저장 인자
+_SAVE_OPTIONS = {
+    "png": {"format": "PNG", "optimize": True},
+    "webp": {"format": "WEBP", "quality": WEBP_QUALITY, "method": 4},
+}
+
+
+def encode_image(rgba, fmt):
+    """RGBA 배열을 형식(png / webp)에 맞게 인코딩한 바이트"""
+    buffer = io.BytesIO()
+    Image.fromarray(rgba).save(buffer, **_SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+class HandAssetCache:
+    """손 이미지별 / 크기별 RGBA 배열과 형식별 인코딩 결과"""
+
+    def __init__(self, image_dir=IMAGE_DIR, sizes=DEFAULT_SIZES, formats=DEFAULT_FORMATS, cache_dir=CACHE_DIR):
+        self.image_dir = image_dir
+        self.sizes = [tuple(size) for size in sizes]
+        # WebP 인코더가 없는 Pillow에서는 PNG만 사용
+        self.formats = [fmt for fmt in formats if fmt != "webp" or features.check("webp")]
+        if not self.formats:
+            self.formats = ["png"]
+        if len(self.formats) < len(formats):
+            print("경고: 이 Pillow에서는 WebP를 지원하지 않아 PNG를 사용합니다.")
+        self.cache_dir = cache_dir
+        self._arrays = {}       # (name, size) -> RGBA 배열
+        self._encoded = {}      # (name, size, fmt) -> bytes
+        self._paths = {}        # (name, size, fmt) -> 캐시 파일 경로
+
+    @property
+    def names(self):
+        return sorted({name for name, _ in self._arrays})
+
+    def load(self):
+        """모든 손 이미지를 크기 / 형식별로 준비. 하나라도 실패하면 False (나머지는 사용 가능)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        success = True
+        for name, filename in HAND_IMAGES.items():
+            try:
+                # 투명 배경을 유지하도록 RGBA로 로드
+                source = Image.open(os.path.join(self.image_dir, filename)).convert("RGBA")
+            except OSError as e:
+                print(f"손 이미지 로드 중 오류 ({filename}): {e}")
+                success = False
+                continue
+            for size in self.sizes:
+                rgba = np.array(source.resize(size))
+                self._arrays[(name, size)] = rgba
+                for fmt in self.formats:
+                    self._add_encoded(name, size, fmt, encode_image(rgba, fmt))
+        return success
+
+    def _add_encoded(self, name, size, fmt, data):
+        key = (name, size, fmt)
+        self._encoded[key] = data
+        # 내용 해시를 파일 이름에 넣어, 이미지가 바뀌면 다른 파일로 저장 (같은 내용이면 다시 쓰지 않음)
+        digest = hashlib.sha1(data).hexdigest()[:10]
+        path = os.path.join(self.cache_dir, f"{name}_{size[0]}x{size[1]}_{digest}.{fmt}")
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._paths[key] = path
+
+    def _key(self, name, size, fmt):
+        return name, tuple(size) if size is not None else self.sizes[0], fmt or self.formats[0]
+
+    def __contains__(self, name):
+        return (name, self.sizes[0]) in self._arrays
+
+    def array(self, name, size=None):
+        """RGBA 배열 (없으면 None)"""
+        name, size, _ = self._key(name, size, None)
+        return self._arrays.get((name, size))
+
+    def encoded(self, name, size=None, fmt=None):
+        """인코딩된 바이트 (없으면 None)"""
+        return self._encoded.get(self._key(name, size, fmt))
+
+    def path(self, name, size=None, fmt=None):
+        """인코딩된 캐시 파일 경로 (없으면 None)"""
+        return self._paths.get(self._key(name, size, fmt))
+
+    def total_bytes(self):
+        return sum(len(data) for data in self._encoded.values())
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+수집 데이터셋 매니페스트 (SQLite)
+
+collected_data 폴더를 매번 스캔하지 않도록 저장된 샘플(인덱스, 클래스, 박스, 신뢰도, 파일 경로)을
+SQLite 파일에 기록합니다. 다음 파일 인덱스와 클래스별 개수는 인덱스 조회로 구하며,
+매니페스트 파일이 없으면 폴더를 한 번 스캔하여 다시 만듭니다.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    idx        INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL UNIQUE,
+    class_id   INTEGER,
+    x_center   REAL,
+    y_center   REAL,
+    width      REAL,
+    height     REAL,
+    conf       REAL,
+    created    REAL,
+    img_path   TEXT,
+    label_path TEXT,
+    bbox_path  TEXT
+);
+CREATE INDEX IF NOT EXISTS samples_class ON samples (class_id);
+"""
+
+NAME_PATTERN = re.compile(r'img_(\d{5,})')
+
+
+# 라벨 파일의 첫 줄 (class_id, x_center, y_center, width, height), 읽을 수 없으면 None
+def read_yolo_label(path):
+    try:
+        with open(path) as f:
+            parts = f.readline().split()
+        if len(parts) < 5:
+            return None
+        return (int(parts[0]), *map(float, parts[1:5]))
+    except (OSError, ValueError):
+        return None
+
+
+class DatasetManifest:
+    """collected_data 샘플 목록 (여러 스레드에서 사용 가능)"""
+
+    def __init__(self, db_path, img_dir, txt_dir, bbox_dir):
+        self.db_path = db_path
+        self.img_dir = img_dir
+        self.txt_dir = txt_dir
+        self.bbox_dir = bbox_dir
+        self._lock = threading.Lock()
+
+        exists = os.path.exists(db_path)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if not exists:
+            self.rebuild()
+
+    def paths(self, name):
+        """샘플 이름의 (원본 이미지, 라벨, 박스 미리보기) 경로"""
+        return (os.path.join(self.img_dir, name + ".jpg"),
+                os.path.join(self.txt_dir, name + ".txt"),
+                os.path.join(self.bbox_dir, name + ".jpg"))
+
+    def rebuild(self):
+        """폴더를 스캔하여 매니페스트를 다시 작성 (원본 이미지 또는 라벨이 있는 샘플). 기록된 샘플 수 반환"""
+        names = set()
+        for directory, ext in ((self.img_dir, ".jpg"), (self.txt_dir, ".txt")):
+            if os.path.isdir(directory):
+                names.update(os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith(ext))
+
+        rows = []
+        for name in names:
+            match = NAME_PATTERN.fullmatch(name)
+            if not match:
+                continue
+            img_path, label_path, bbox_path = self.paths(name)
+            label = read_yolo_label(label_path) or (None,) * 5
+            created = os.path.getmtime(img_path) if os.path.exists(img_path) else None
+            rows.append((int(match.group(1)), name, *label, None, created, img_path, label_path, bbox_path))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM samples")
+            self._conn.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def add(self, index, name, class_id, yolo_bbox, conf=None):
+        """저장한 샘플 기록"""
+        img_path, label_path, bbox_path = self.paths(name)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (index, name, class_id, *map(float, yolo_bbox), conf, time.time(),
+                                img_path, label_path, bbox_path))
+
+    def remove(self, names):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM samples WHERE name = ?", [(name,) for name in names])
+
+    def last_index(self):
+        """가장 큰 샘플 인덱스, 샘플이 없으면 -1"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(idx) FROM samples").fetchone()
+        return -1 if row[0] is None else row[0]
+
+    def class_counts(self):
+        """{class_id: 샘플 수}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT class_id, COUNT(*) FROM samples GROUP BY class_id").fetchall()
+        return dict(rows)
+
+    def missing_previews(self):
+        """박스 미리보기가 삭제된 샘플 이름 목록 (미리보기 폴더만 한 번 스캔)"""
+        present = set(os.listdir(self.bbox_dir)) if os.path.isdir(self.bbox_dir) else set()
+        with self._lock:
+            names = [name for (name,) in self._conn.execute("SELECT name FROM samples")]
+        return [name for name in names if name + ".jpg" not in present]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
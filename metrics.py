@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+검출 결과 평가 지표
+
+YOLO 라벨 파일(정답)과 (N, 6) 검출 배열을 비교하여 클래스별 precision / recall / AP와
+혼동 행렬을 계산합니다. AP는 ultralytics와 같은 101점 보간 방식이며,
+mAP50-95는 IoU 0.5~0.95 (0.05 간격) 임계값 평균입니다.
+폴더 평가(test.py / sweep.py)가 함께 쓰는 이미지 목록 / 배치 디코딩 함수와 평가 설정도 여기에 있습니다.
+"""
+import glob
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import cv2
+import numpy as np
+
+from detector import X1, Y1, X2, Y2, CONF, CLS
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+CONFUSION_IOU = 0.5
+
+# 폴더 평가 설정
+EVAL_BATCH_SIZE = 16      # 한 번에 추론할 이미지 수
+EVAL_WORKERS = 4          # 이미지 디코딩 스레드 수
+EVAL_CONF = 0.2           # precision / recall / 혼동 행렬 기준 신뢰도
+EVAL_MIN_CONF = 0.001     # mAP 계산용 예측 신뢰도 하한
+EVAL_PROGRESS_EVERY = 500 # 진행 상황 출력 간격 (이미지 수)
+
+# numpy 2.0에서 trapz가 trapezoid로 이름이 바뀜
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+def read_yolo_labels(path, img_width, img_height):
+    """
+    YOLO 라벨 파일을 (M, 5) [cls, x1, y1, x2, y2] 픽셀 좌표 배열로 읽기
+
+    Returns:
+        라벨 배열, 파일이 없으면 None (라벨 없는 이미지와 구분)
+    """
+    if not os.path.exists(path):
+        return None
+    rows = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5:
+                rows.append([float(v) for v in parts[:5]])
+    if not rows:
+        return np.zeros((0, 5), dtype=np.float32)
+    labels = np.array(rows, dtype=np.float32)
+    cls, xc, yc, w, h = labels.T
+    return np.stack([cls,
+                     (xc - w / 2) * img_width, (yc - h / 2) * img_height,
+                     (xc + w / 2) * img_width, (yc + h / 2) * img_height], axis=1)
+
+
+def find_label_path(image_path):
+    """이미지 옆의 .txt 또는 images/ → labels/ 폴더 구조의 라벨 경로 (없으면 None)"""
+    stem = os.path.splitext(image_path)[0]
+    candidates = [stem + ".txt"]
+    parts = stem.split(os.sep)
+    if "images" in parts:
+        i = len(parts) - 1 - parts[::-1].index("images")
+        candidates.append(os.sep.join(parts[:i] + ["labels"] + parts[i + 1:]) + ".txt")
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def list_images(folder_path):
+    """폴더 내 이미지 경로 목록 (하위 폴더 포함하지 않음)"""
+    image_files = []
+    for ext in ("*.jpg", "*.jpeg", "*.png"):
+        image_files.extend(glob.glob(os.path.join(folder_path, ext)))
+    return sorted(image_files)
+
+
+def iter_image_batches(image_files, batch_size=EVAL_BATCH_SIZE, workers=EVAL_WORKERS):
+    """
+    스레드 풀에서 이미지를 미리 디코딩하며 [(경로, 이미지), ...] 배치 생성
+
+    메모리 사용량을 제한하기 위해 최대 2배치 분량만 미리 읽습니다. 읽을 수 없는 이미지는 None.
+    """
+    prefetch = max(batch_size * 2, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        paths = iter(image_files)
+        for path in islice(paths, prefetch):
+            pending.append((path, pool.submit(cv2.imread, path)))
+        batch = []
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(cv2.imread, next_path)))
+            batch.append((path, future.result()))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def box_iou(a, b):
+    """(N, 4)와 (M, 4) 박스 사이의 (N, M) IoU 행렬"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_predictions(dets, labels, iou_thresholds=IOU_THRESHOLDS):
+    """
+    IoU 임계값별로 검출이 정답과 일치하는지 (N, T) bool 배열 반환
+
+    같은 클래스끼리만 비교하며, 정답 하나에는 IoU가 가장 큰 검출 하나만 일치합니다.
+    """
+    correct = np.zeros((len(dets), len(iou_thresholds)), dtype=bool)
+    if len(dets) == 0 or len(labels) == 0:
+        return correct
+    iou = box_iou(labels[:, 1:5], dets[:, [X1, Y1, X2, Y2]])
+    iou = iou * (labels[:, :1] == dets[None, :, CLS])
+    for t, threshold in enumerate(iou_thresholds):
+        label_idx, det_idx = np.nonzero(iou >= threshold)
+        if len(label_idx) == 0:
+            continue
+        order = np.argsort(-iou[label_idx, det_idx])
+        label_idx, det_idx = label_idx[order], det_idx[order]
+        # 검출 하나당 정답 하나, 정답 하나당 검출 하나
+        _, first = np.unique(det_idx, return_index=True)
+        label_idx, det_idx = label_idx[first], det_idx[first]
+        _, first = np.unique(label_idx, return_index=True)
+        correct[det_idx[first], t] = True
+    return correct
+
+
+def average_precision(recall, precision):
+    """precision-recall 곡선의 101점 보간 AP"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(_trapezoid(np.interp(x, mrec, mpre), x))
+
+
+class DetectionEvaluator:
+    """
+    이미지별 (검출, 정답)을 누적하여 클래스별 지표와 혼동 행렬 계산
+
+    precision / recall / 혼동 행렬은 conf 임계값 이상 검출 기준이고,
+    AP는 모든 검출(낮은 임계값으로 예측하는 것을 권장)을 사용합니다.
+    """
+
+    def __init__(self, names, conf=0.25, confusion_iou=CONFUSION_IOU):
+        self.names = dict(names)
+        self.num_classes = max(self.names) + 1 if self.names else 0
+        self.conf = conf
+        self.confusion_iou = confusion_iou
+        # 혼동 행렬 [예측, 정답], 마지막 행/열은 배경 (미검출 / 오검출)
+        self.confusion = np.zeros((self.num_classes + 1, self.num_classes + 1), dtype=np.int64)
+        self._correct = []
+        self._conf = []
+        self._pred_cls = []
+        self._target_cls = []
+        self.images = 0
+
+    def add(self, dets, labels):
+        """이미지 하나의 (N, 6) 검출 배열과 (M, 5) 정답 배열 추가"""
+        self.images += 1
+        labels = np.asarray(labels, dtype=np.float32).reshape(-1, 5)
+        self._correct.append(match_predictions(dets, labels))
+        self._conf.append(dets[:, CONF])
+        self._pred_cls.append(dets[:, CLS].astype(np.int64))
+        self._target_cls.append(labels[:, 0].astype(np.int64))
+        self._update_confusion(dets[dets[:, CONF] >= self.conf], labels)
+
+    def _update_confusion(self, dets, labels):
+        background = self.num_classes
+        matched_dets = set()
+        if len(dets) and len(labels):
+            iou = box_iou(labels[:, 1:5], dets[:, [X1, Y1, X2, Y2]])
+            label_idx, det_idx = np.nonzero(iou > self.confusion_iou)
+            order = np.argsort(-iou[label_idx, det_idx])
+            used_labels = set()
+            for li, di in zip(label_idx[order], det_idx[order]):
+                if li in used_labels or di in matched_dets:
+                    continue
+                used_labels.add(li)
+                matched_dets.add(di)
+                self.confusion[int(dets[di, CLS]), int(labels[li, 0])] += 1
+            unmatched_labels = [i for i in range(len(labels)) if i not in used_labels]
+        else:
+            unmatched_labels = range(len(labels))
+        for li in unmatched_labels:
+            self.confusion[background, int(labels[li, 0])] += 1
+        for di in range(len(dets)):
+            if di not in matched_dets:
+                self.confusion[int(dets[di, CLS]), background] += 1
+
+    def summary(self):
+        """
+        클래스별 / 전체 지표 딕셔너리
+
+        {"classes": {name: {labels, precision, recall, ap50, ap50_95}}, "precision", "recall", "map50", "map50_95"}
+        """
+        correct = np.concatenate(self._correct) if self._correct else np.zeros((0, len(IOU_THRESHOLDS)), bool)
+        conf = np.concatenate(self._conf) if self._conf else np.zeros(0)
+        pred_cls = np.concatenate(self._pred_cls) if self._pred_cls else np.zeros(0, np.int64)
+        target_cls = np.concatenate(self._target_cls) if self._target_cls else np.zeros(0, np.int64)
+
+        order = np.argsort(-conf)
+        correct, conf, pred_cls = correct[order], conf[order], pred_cls[order]
+
+        classes = {}
+        for class_id, name in sorted(self.names.items()):
+            n_labels = int((target_cls == class_id).sum())
+            mask = pred_cls == class_id
+            tp = np.cumsum(correct[mask], axis=0)
+            fp = np.cumsum(~correct[mask], axis=0)
+            ap = np.zeros(len(IOU_THRESHOLDS))
+            if n_labels and mask.any():
+                recall_curve = tp / n_labels
+                precision_curve = tp / (tp + fp)
+                ap = np.array([average_precision(recall_curve[:, t], precision_curve[:, t])
+                               for t in range(len(IOU_THRESHOLDS))])
+
+            # 운영 임계값(conf) 기준 precision / recall (IoU 0.5)
+            at_conf = correct[mask & (conf >= self.conf), 0]
+            tp_conf = int(at_conf.sum())
+            precision = tp_conf / len(at_conf) if len(at_conf) else 0.0
+            recall = tp_conf / n_labels if n_labels else 0.0
+            classes[name] = {
+                "labels": n_labels,
+                "predictions": int(len(at_conf)),
+                "precision": precision,
+                "recall": recall,
+                "ap50": float(ap[0]),
+                "ap50_95": float(ap.mean()),
+            }
+
+        # 정답이 있는 클래스만 평균
+        present = [c for c in classes.values() if c["labels"]]
+        mean = lambda key: float(np.mean([c[key] for c in present])) if present else 0.0
+        return {
+            "images": self.images,
+            "conf": self.conf,
+            "classes": classes,
+            "precision": mean("precision"),
+            "recall": mean("recall"),
+            "map50": mean("ap50"),
+            "map50_95": mean("ap50_95"),
+            "confusion_matrix": self.confusion.tolist(),
+        }
+
+    def sweep(self, conf_thresholds):
+        """
+        신뢰도 임계값별 precision / recall / F1 (IoU 0.5, 전체 클래스 합산)과 게임 판정 정확도
+
+        게임 판정 정확도: 라벨의 손이 하나인 이미지에서 임계값 이상 검출이 정확히 하나이고 클래스가 같거나,
+        손이 없는 이미지에서 검출이 없는 비율 (app.py / demo.py의 판정 조건)
+        """
+        correct = np.concatenate(self._correct)[:, 0] if self._correct else np.zeros(0, bool)
+        conf = np.concatenate(self._conf) if self._conf else np.zeros(0)
+        n_labels = sum(len(t) for t in self._target_cls)
+        game_images = [(c, p, t) for c, p, t in zip(self._conf, self._pred_cls, self._target_cls) if len(t) <= 1]
+
+        rows = []
+        for threshold in conf_thresholds:
+            keep = conf >= threshold
+            tp = int(correct[keep].sum())
+            fp = int(keep.sum()) - tp
+            precision = tp / (tp + fp) if tp + fp else 0.0
+            recall = tp / n_labels if n_labels else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+            game_correct = 0
+            for image_conf, image_cls, target in game_images:
+                predicted = image_cls[image_conf >= threshold]
+                if len(target) == 0:
+                    game_correct += len(predicted) == 0
+                else:
+                    game_correct += len(predicted) == 1 and predicted[0] == target[0]
+            rows.append({
+                "conf": float(threshold),
+                "tp": tp,
+                "fp": fp,
+                "fn": n_labels - tp,
+                "precision": precision,
+                "recall": recall,
+                "f1": f1,
+                "game_accuracy": game_correct / len(game_images) if game_images else 0.0,
+            })
+        return rows
+
+    def format_confusion(self):
+        """혼동 행렬 표 (행: 예측, 열: 정답)"""
+        labels = [self.names.get(i, str(i)) for i in range(self.num_classes)] + ["background"]
+        width = max(len(label) for label in labels) + 2
+        lines = ["예측 \\ 정답".ljust(width) + "".join(label.rjust(width) for label in labels)]
+        for label, row in zip(labels, self.confusion):
+            lines.append(label.ljust(width) + "".join(str(v).rjust(width) for v in row))
+        return "\n".join(lines)
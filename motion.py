@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+움직임 감지 기반 추론 생략 (motion gating)
+
+손을 가만히 들고 있는 동안에는 화면이 거의 변하지 않으므로 YOLO 추론을 다시 할 필요가 없습니다.
+프레임을 작은 썸네일로 줄여 마지막으로 추론한 프레임과의 평균 밝기 차이를 비교하고,
+차이가 임계값 이하이면 마지막 검출 결과를 재사용합니다.
+"""
+import threading
+import time
+
+import cv2
+
+# 기본 설정
+MOTION_THRESHOLD = 5.0      # 썸네일 픽셀당 평균 차이 (0~255), 이보다 크면 다시 추론
+MAX_STALENESS = 1.0         # 화면이 정지해 있어도 이 시간(초)이 지나면 다시 추론
+THUMBNAIL_SIZE = (32, 24)   # 비교용 썸네일 크기 (w, h)
+
+
+class MotionStats:
+    """여러 MotionGate가 공유하는 추론 / 생략 횟수"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inferred = 0
+        self.skipped = 0
+
+    def add(self, inferred):
+        with self._lock:
+            if inferred:
+                self.inferred += 1
+            else:
+                self.skipped += 1
+
+    @property
+    def skip_ratio(self):
+        total = self.inferred + self.skipped
+        return self.skipped / total if total else 0.0
+
+
+class MotionGate:
+    """
+    프레임별로 추론이 필요한지 판단하고 마지막 검출 결과를 보관
+
+    사용법:
+        if gate.should_infer(frame):
+            gate.remember(detector.predict(frame))
+        dets = gate.last_result
+    """
+
+    def __init__(self, threshold=MOTION_THRESHOLD, max_staleness=MAX_STALENESS, stats=None):
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.stats = stats
+        self.last_result = None
+        self.last_motion = 0.0
+        self.inferred = 0
+        self.skipped = 0
+        self._reference = None
+        self._reference_time = 0.0
+
+    def _thumbnail(self, frame):
+        return cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+    def should_infer(self, frame, now=None):
+        """추론이 필요하면 True (이 프레임을 새 기준 프레임으로 기록), 결과를 재사용하면 False"""
+        now = time.monotonic() if now is None else now
+        thumbnail = self._thumbnail(frame)
+
+        if self._reference is None or self.last_result is None or self._reference.shape != thumbnail.shape:
+            infer = True
+        else:
+            self.last_motion = cv2.norm(thumbnail, self._reference, cv2.NORM_L1) / thumbnail.size
+            infer = self.last_motion > self.threshold or now - self._reference_time >= self.max_staleness
+
+        if infer:
+            self._reference = thumbnail
+            self._reference_time = now
+            self.inferred += 1
+        else:
+            self.skipped += 1
+        if self.stats is not None:
+            self.stats.add(infer)
+        return infer
+
+    def remember(self, result):
+        """방금 추론한 결과 저장 (다음 정지 프레임에서 재사용)"""
+        self.last_result = result
+        return result
+
+    def reset(self):
+        self.last_result = None
+        self._reference = None
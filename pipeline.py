@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+캡처 / 추론 / 렌더링 단계를 스레드로 연결하기 위한 파이프라인 유틸
+
+- LatestFrameSlot: 가장 최신 프레임 하나만 보관 (카메라 캡처용)
+- StageQueue: 크기가 제한된 큐 + 가득 찼을 때의 드롭 정책
+- StageTimer: 단계별 소요 시간 기록 및 요약 (NULL_TIMER는 기록하지 않는 대체 객체)
+- FrameBuffers: 미리 할당해 두고 돌려 쓰는 프레임 버퍼 (+ AllocationStats 할당 횟수 집계)
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# 큐가 가득 찼을 때의 드롭 정책
+DROP_OLDEST = "drop_oldest"  # 가장 오래된 항목을 버리고 새 항목 추가 (지연 최소화)
+DROP_NEWEST = "drop_newest"  # 새 항목을 버림
+BLOCK = "block"              # 자리가 날 때까지 대기 (프레임 손실 없음)
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class LatestFrameSlot:
+    """가장 최근에 넣은 항목 하나만 보관하는 슬롯 (이전 항목은 덮어씀)"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._read_seq = 0
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._seq != self._read_seq:
+                # 아직 읽히지 않은 항목을 덮어씀
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """새 항목이 들어올 때까지 대기. 시간 초과 또는 종료 시 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != self._read_seq or self._closed, timeout):
+                return None
+            if self._seq == self._read_seq:
+                return None
+            self._read_seq = self._seq
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageQueue:
+    """크기가 제한된 단계 간 큐"""
+
+    def __init__(self, maxsize=2, drop_policy=DROP_OLDEST):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"알 수 없는 드롭 정책: {drop_policy} (사용 가능: {', '.join(DROP_POLICIES)})")
+        self.maxsize = max(int(maxsize), 1)
+        self.drop_policy = drop_policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """항목 추가. 드롭 정책에 따라 버려진 경우 False"""
+        with self._cond:
+            if self.drop_policy == BLOCK:
+                self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed)
+            elif len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                self._items.popleft()
+            if self._closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """항목 꺼내기. 시간 초과 또는 종료 시 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageTimer:
+    """단계별 소요 시간(초)을 최근 window개까지 기록 (window=None이면 전부 기록)"""
+
+    def __init__(self, window=300):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            samples.append(seconds)
+            self._counts[stage] += 1
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._started = time.perf_counter()
+
+    def summary(self):
+        """단계별 {count, fps, mean_ms, p50_ms, p95_ms, p99_ms, max_ms} 딕셔너리"""
+        with self._lock:
+            elapsed = max(time.perf_counter() - self._started, 1e-9)
+            snapshot = {stage: (np.array(samples), self._counts[stage]) for stage, samples in self._samples.items()}
+
+        summary = {}
+        for stage, (samples, count) in snapshot.items():
+            ms = samples * 1000.0
+            summary[stage] = {
+                "count": count,
+                "fps": count / elapsed,
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+            }
+        return summary
+
+    def format_summary(self):
+        lines = []
+        for stage, s in self.summary().items():
+            lines.append(f"  {stage:<10} {s['fps']:6.1f} fps | 평균 {s['mean_ms']:7.2f} ms | "
+                         f"p50 {s['p50_ms']:7.2f} ms | p95 {s['p95_ms']:7.2f} ms | 최대 {s['max_ms']:7.2f} ms")
+        return "\n".join(lines)
+
+
+class NullTimer:
+    """아무것도 기록하지 않는 StageTimer 대체 객체 (계측을 끈 상태의 기본값)"""
+
+    def record(self, stage, seconds):
+        pass
+
+    def measure(self, stage):
+        return nullcontext()
+
+
+NULL_TIMER = NullTimer()
+
+
+class AllocationStats:
+    """여러 FrameBuffers가 공유하는 프레임 처리 횟수 / 전체 프레임 크기 버퍼 할당 횟수 (디버그용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.allocations = 0
+
+    def add_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def add_allocation(self):
+        with self._lock:
+            self.allocations += 1
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.allocations = 0
+
+    @property
+    def per_call(self):
+        return self.allocations / self.calls if self.calls else 0.0
+
+
+class FrameBuffers:
+    """
+    프레임 크기의 버퍼 count개를 돌려 가며 재사용 (프레임 크기가 바뀔 때만 새로 할당)
+
+    반환한 버퍼는 count번 뒤에 다시 덮어쓰므로, 호출한 쪽이 그 전에 결과 사용(인코딩 등)을 끝내야 합니다.
+
+    사용법:
+        buffers = FrameBuffers(count=2)
+        frame = cv2.flip(image, 1, dst=buffers.next(image.shape))
+    """
+
+    def __init__(self, count=2, stats=None):
+        self._buffers = [None] * max(int(count), 1)
+        self._next = 0
+        self.stats = stats
+        self.allocations = 0
+
+    def next(self, shape, dtype=np.uint8):
+        index = self._next
+        self._next = (index + 1) % len(self._buffers)
+        buffer = self._buffers[index]
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = self._buffers[index] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+            if self.stats is not None:
+                self.stats.add_allocation()
+        return buffer
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+검출 결과 후처리 공용 모듈
+
+app.py / demo.py / dataset.py / test.py가 따로 갖고 있던 클래스 이름 매핑(label_map)과
+손 개수에 따른 분기(손 없음 / 하나 / 여러 개), YOLO 라벨 좌표 변환을 한곳에 모았습니다.
+검출 결과는 detector.py의 (N, 6) float32 배열 [x1, y1, x2, y2, conf, cls]이며, 배치 결과는
+stack_detections로 하나의 연속 배열로 합친 뒤 numpy 연산으로 한 번에 처리합니다.
+클래스 ID → 손 모양 / 데이터셋 클래스 ID 변환은 모델 클래스 목록별로 한 번만 만든 조회 테이블을 사용합니다.
+
+사용법:
+    table = move_table(detector.names)
+    outcome = classify(dets)                     # NO_HAND / ONE_HAND / MULTIPLE_HANDS
+    move = table.move(dets[0, CLS])              # "rock" / "paper" / "scissors" / "justhand"
+    stacked, image_index = stack_detections(dets_list)
+    counts = np.bincount(table.dataset_class(stacked[:, CLS]), minlength=len(CLASS_MAP))
+    yolo = convert_bbox_to_yolo(stacked[:, :4], w, h)
+"""
+import threading
+
+import numpy as np
+
+from detector import X1, Y1, X2, Y2, CONF, CLS
+
+# 모델 클래스 이름 → 손 모양 (없는 이름은 소문자로 변환하여 사용)
+LABEL_MAP = {
+    "Rock": "rock",
+    "Paper": "paper",
+    "Scissors": "scissors",
+    "rock": "rock",
+    "paper": "paper",
+    "scissors": "scissors",
+    "justhand": "justhand",
+    "0": "rock",
+    "1": "paper",
+    "2": "scissors",
+    "3": "justhand"
+}
+
+# 손 모양 → 데이터셋 클래스 ID
+CLASS_MAP = {'paper': 0, 'rock': 1, 'scissors': 2, 'justhand': 3}
+DATASET_NAMES = {class_id: name for name, class_id in CLASS_MAP.items()}   # 라벨 파일 클래스 ID → 이름
+DEFAULT_CLASS_ID = 0        # 매핑되지 않은 손 모양의 데이터셋 클래스 ID (paper)
+
+# 프레임별 손 인식 결과
+NO_HAND = "no_hand"
+ONE_HAND = "one_hand"
+MULTIPLE_HANDS = "multiple_hands"
+OUTCOMES = (NO_HAND, ONE_HAND, MULTIPLE_HANDS)
+
+
+def to_move(class_name):
+    """모델 클래스 이름을 손 모양으로 변환"""
+    return LABEL_MAP.get(class_name, class_name.lower())
+
+
+class MoveTable:
+    """모델 클래스 ID → 클래스 이름 / 손 모양 / 데이터셋 클래스 ID 조회 테이블 (배열 인덱싱으로 한 번에 변환)"""
+
+    def __init__(self, names, class_map=CLASS_MAP, default_class_id=DEFAULT_CLASS_ID):
+        # 마지막 칸은 모델에 없는 클래스 ID용 ("unknown")
+        size = max(names, default=-1) + 1
+        self.names = np.array([names.get(i, "unknown") for i in range(size)] + ["unknown"], dtype=object)
+        self.moves = np.array([to_move(name) for name in self.names], dtype=object)
+        self.class_ids = np.array([class_map.get(move, default_class_id) for move in self.moves], dtype=np.int64)
+        self.known = np.array([move in class_map for move in self.moves], dtype=bool)
+
+    def _index(self, class_ids):
+        index = np.asarray(class_ids).astype(np.int64)
+        return np.where((index >= 0) & (index < len(self.names) - 1), index, len(self.names) - 1)
+
+    def name(self, class_ids):
+        """클래스 ID(스칼라 또는 배열)의 모델 클래스 이름"""
+        return self.names[self._index(class_ids)]
+
+    def move(self, class_ids):
+        """클래스 ID(스칼라 또는 배열)의 손 모양"""
+        return self.moves[self._index(class_ids)]
+
+    def dataset_class(self, class_ids):
+        """클래스 ID(스칼라 또는 배열)의 데이터셋 클래스 ID"""
+        return self.class_ids[self._index(class_ids)]
+
+    def to_dataset(self, dets):
+        """클래스 열을 데이터셋 클래스 ID(라벨 파일과 같은 CLASS_MAP ID)로 바꾼 검출 배열 (매핑되지 않는 클래스는 제외)"""
+        index = self._index(dets[:, CLS])
+        keep = self.known[index]
+        out = dets[keep]
+        out[:, CLS] = self.class_ids[index[keep]]
+        return out
+
+
+# 모델 클래스 목록별 조회 테이블 캐시 (모델을 교체해도 같은 클래스 목록이면 재사용)
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def move_table(names):
+    """클래스 목록 {class_id: name}의 MoveTable (캐시)"""
+    key = tuple(sorted(names.items()))
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.setdefault(key, MoveTable(names))
+    return table
+
+
+def classify(dets):
+    """검출 배열 하나의 손 인식 결과 (NO_HAND / ONE_HAND / MULTIPLE_HANDS)"""
+    n = len(dets)
+    return NO_HAND if n == 0 else ONE_HAND if n == 1 else MULTIPLE_HANDS
+
+
+def stack_detections(dets_list):
+    """
+    이미지별 검출 배열 목록을 하나의 연속 배열로 합침
+
+    Returns:
+        stacked: (M, 6) float32 검출 배열
+        image_index: (M,) 각 검출이 속한 이미지 번호
+    """
+    counts = np.fromiter((len(dets) for dets in dets_list), dtype=np.int64, count=len(dets_list))
+    if not counts.sum():
+        return np.zeros((0, 6), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    stacked = np.ascontiguousarray(np.concatenate(dets_list, axis=0), dtype=np.float32)
+    return stacked, np.repeat(np.arange(len(dets_list)), counts)
+
+
+def hand_counts(dets_list, conf=None):
+    """이미지별 검출 수 (conf를 지정하면 그 이상인 검출만)"""
+    if conf is None:
+        return np.fromiter((len(dets) for dets in dets_list), dtype=np.int64, count=len(dets_list))
+    stacked, image_index = stack_detections(dets_list)
+    return np.bincount(image_index[stacked[:, CONF] >= conf], minlength=len(dets_list))
+
+
+def classify_batch(dets_list):
+    """이미지별 손 인식 결과 배열 (OUTCOMES의 인덱스: 0 손 없음 / 1 하나 / 2 여러 개)"""
+    return np.minimum(hand_counts(dets_list), 2)
+
+
+# 바운딩 박스 좌표를 YOLO 포맷으로 변환
+def convert_bbox_to_yolo(bbox, img_width, img_height):
+    """
+    (xmin, ymin, xmax, ymax) 박스를 정규화된 (x_center, y_center, width, height)로 변환
+
+    bbox가 박스 하나면 튜플, (N, 4) 배열(또는 검출 배열)이면 (N, 4) 배열 반환
+    """
+    boxes = np.asarray(bbox, dtype=np.float64)
+    single = boxes.ndim == 1
+    boxes = boxes.reshape(-1, boxes.shape[-1])
+    scale = np.array([img_width, img_height], dtype=np.float64)
+    yolo = np.empty((len(boxes), 4), dtype=np.float64)
+    yolo[:, :2] = (boxes[:, [X1, Y1]] + boxes[:, [X2, Y2]]) / 2 / scale
+    yolo[:, 2:] = (boxes[:, [X2, Y2]] - boxes[:, [X1, Y1]]) / scale
+    return tuple(yolo[0].tolist()) if single else yolo
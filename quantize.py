@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+INT8 양자화 모델 내보내기 및 비교 리포트
+
+학습된 .pt 모델을 ONNX로 내보낸 뒤, collect_data로 수집한 실제 프레임(collected_data/images)으로
+보정(calibration)하여 정적 INT8 ONNX 모델을 만듭니다.
+이후 test_img/ 이미지로 FP32 모델과 지연 시간, 모델 크기, 클래스별 일치율을 비교합니다.
+
+사용법:
+    python quantize.py models/best4.pt
+    python quantize.py models/best4.pt --calib-dir collected_data/images --num-calib 300 --test-dir test_img
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import time
+
+import cv2
+import numpy as np
+
+from detector import create_detector, make_blob, ONNXRUNTIME, CLS, X1, Y1, X2, Y2
+
+IMAGE_EXTS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def list_images(folder):
+    files = []
+    for ext in IMAGE_EXTS:
+        files.extend(glob.glob(os.path.join(folder, ext)))
+    return sorted(files)
+
+
+# .pt 모델을 배치 1, 고정 입력 크기의 FP32 ONNX로 내보내기 (이미 있으면 재사용)
+def export_fp32_onnx(model_path, imgsz=640):
+    stem, ext = os.path.splitext(model_path)
+    if ext == ".onnx":
+        return model_path
+
+    onnx_path = stem + ".onnx"
+    if os.path.exists(onnx_path):
+        print(f"기존 FP32 ONNX 모델 사용: {onnx_path}")
+        return onnx_path
+
+    from ultralytics import YOLO
+    print(f"FP32 ONNX로 내보내는 중: {model_path}")
+    return YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+
+
+class FrameCalibrationReader:
+    """수집된 프레임을 검출기와 같은 전처리로 변환하여 보정 데이터로 제공"""
+
+    def __init__(self, image_files, input_name, input_size):
+        self.image_files = image_files
+        self.input_name = input_name
+        self.input_size = input_size
+        self._index = 0
+
+    def get_next(self):
+        while self._index < len(self.image_files):
+            path = self.image_files[self._index]
+            self._index += 1
+            img = cv2.imread(path)
+            if img is None:
+                print(f"이미지를 읽을 수 없음: {path}")
+                continue
+            blob, _ = make_blob([img], self.input_size)
+            return {self.input_name: blob}
+        return None
+
+    def rewind(self):
+        self._index = 0
+
+
+# 검출 헤드의 박스 디코딩 연산(Conv 제외)은 FP32로 유지 - 좌표 정밀도 보존
+def find_head_nodes(onnx_model):
+    pattern = re.compile(r"^/model\.(\d+)/")
+    indices = [int(m.group(1)) for node in onnx_model.graph.node for m in [pattern.match(node.name)] if m]
+    if not indices:
+        return []
+    head_prefix = f"/model.{max(indices)}/"
+    return [node.name for node in onnx_model.graph.node
+            if node.name.startswith(head_prefix) and node.op_type != "Conv"]
+
+
+def quantize_model(fp32_path, int8_path, calib_files, per_channel=True, method="minmax", exclude_head=True):
+    """
+    FP32 ONNX 모델을 정적 INT8 (QDQ) 모델로 양자화
+
+    Args:
+        fp32_path: FP32 ONNX 모델 경로
+        int8_path: 저장할 INT8 모델 경로
+        calib_files: 보정용 이미지 경로 목록
+        per_channel: 가중치 채널별 양자화 여부
+        method: 보정 방법 (minmax / entropy / percentile)
+        exclude_head: 검출 헤드의 디코딩 연산을 FP32로 유지할지 여부
+    """
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                          quant_pre_process, quantize_static)
+
+    session = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    _, _, height, width = model_input.shape
+    if not isinstance(height, int) or not isinstance(width, int):
+        height = width = 640
+    del session
+
+    # 양자화 전처리 (그래프 최적화 + 모양 추론)
+    prepared_path = os.path.splitext(int8_path)[0] + "_prep.onnx"
+    try:
+        quant_pre_process(fp32_path, prepared_path, skip_symbolic_shape=True)
+    except Exception as e:
+        print(f"양자화 전처리 생략: {e}")
+        prepared_path = fp32_path
+
+    fp32_model = onnx.load(prepared_path)
+    nodes_to_exclude = find_head_nodes(fp32_model) if exclude_head else []
+    if nodes_to_exclude:
+        print(f"FP32로 유지할 헤드 연산: {len(nodes_to_exclude)}개")
+
+    methods = {
+        "minmax": CalibrationMethod.MinMax,
+        "entropy": CalibrationMethod.Entropy,
+        "percentile": CalibrationMethod.Percentile,
+    }
+    reader = FrameCalibrationReader(calib_files, model_input.name, (height, width))
+    print(f"보정 이미지 {len(calib_files)}장으로 INT8 양자화 중 ({method})...")
+    quantize_static(
+        prepared_path,
+        int8_path,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=per_channel,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        nodes_to_exclude=nodes_to_exclude,
+        calibrate_method=methods[method],
+    )
+    if prepared_path != fp32_path:
+        os.remove(prepared_path)
+
+    # 클래스 이름 등 Ultralytics 메타데이터 복사 (검출기가 사용)
+    int8_model = onnx.load(int8_path)
+    existing = {prop.key for prop in int8_model.metadata_props}
+    for prop in onnx.load(fp32_path).metadata_props:
+        if prop.key not in existing:
+            new_prop = int8_model.metadata_props.add()
+            new_prop.key, new_prop.value = prop.key, prop.value
+    onnx.save(int8_model, int8_path)
+    print(f"INT8 모델 저장됨: {int8_path}")
+    return int8_path
+
+
+def _box_iou(a, b):
+    w = max(0.0, min(a[X2], b[X2]) - max(a[X1], b[X1]))
+    h = max(0.0, min(a[Y2], b[Y2]) - max(a[Y1], b[Y1]))
+    inter = w * h
+    union = (a[X2] - a[X1]) * (a[Y2] - a[Y1]) + (b[X2] - b[X1]) * (b[Y2] - b[Y1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def measure_model(detector, images, repeat=3, warmup=3):
+    """이미지별 추론 시간과 최고 신뢰도 검출 결과 측정"""
+    for _ in range(warmup):
+        detector.predict(images[0])
+
+    latencies = []
+    top_detections = []
+    for r in range(repeat):
+        for img in images:
+            start = time.perf_counter()
+            dets = detector.predict(img)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            if r == 0:
+                top_detections.append(dets[0] if len(dets) else None)
+
+    latencies = np.array(latencies)
+    return {
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }, top_detections
+
+
+def compare_models(fp32_path, int8_path, test_files, conf=0.25, iou=0.7, repeat=3):
+    """FP32 / INT8 모델의 지연 시간, 크기, 클래스별 일치율 비교 리포트 생성"""
+    images = [img for img in (cv2.imread(f) for f in test_files) if img is not None]
+    if not images:
+        raise FileNotFoundError("비교에 사용할 테스트 이미지가 없습니다.")
+
+    fp32 = create_detector(fp32_path, backend=ONNXRUNTIME, conf=conf, iou=iou)
+    int8 = create_detector(int8_path, backend=ONNXRUNTIME, conf=conf, iou=iou)
+    fp32_latency, fp32_top = measure_model(fp32, images, repeat)
+    int8_latency, int8_top = measure_model(int8, images, repeat)
+
+    # FP32 최고 신뢰도 클래스 기준 클래스별 일치율 ("none"은 검출 없음)
+    per_class = {}
+    ious = []
+    for ref, quant in zip(fp32_top, int8_top):
+        ref_name = fp32.class_name(ref[CLS]) if ref is not None else "none"
+        quant_name = int8.class_name(quant[CLS]) if quant is not None else "none"
+        stats = per_class.setdefault(ref_name, {"images": 0, "agree": 0})
+        stats["images"] += 1
+        if ref_name == quant_name:
+            stats["agree"] += 1
+            if ref is not None:
+                ious.append(_box_iou(ref, quant))
+    for stats in per_class.values():
+        stats["agreement"] = stats["agree"] / stats["images"]
+
+    total_agree = sum(s["agree"] for s in per_class.values())
+    return {
+        "test_images": len(images),
+        "fp32": {"path": fp32_path, "size_mb": os.path.getsize(fp32_path) / 1e6, "latency": fp32_latency},
+        "int8": {"path": int8_path, "size_mb": os.path.getsize(int8_path) / 1e6, "latency": int8_latency},
+        "speedup": fp32_latency["mean_ms"] / int8_latency["mean_ms"],
+        "agreement": total_agree / len(images),
+        "mean_box_iou": float(np.mean(ious)) if ious else None,
+        "per_class": per_class,
+    }
+
+
+def print_report(report):
+    print("\n===== FP32 / INT8 비교 리포트 =====")
+    print(f"테스트 이미지: {report['test_images']}장")
+    for key in ("fp32", "int8"):
+        r = report[key]
+        lat = r["latency"]
+        print(f"{key.upper():<5} {r['size_mb']:7.2f} MB | 평균 {lat['mean_ms']:7.2f} ms | "
+              f"p50 {lat['p50_ms']:7.2f} ms | p95 {lat['p95_ms']:7.2f} ms")
+    print(f"속도 향상: {report['speedup']:.2f}배")
+    print(f"전체 클래스 일치율: {report['agreement'] * 100:.1f}%")
+    if report["mean_box_iou"] is not None:
+        print(f"일치한 검출의 평균 박스 IoU: {report['mean_box_iou']:.3f}")
+    print("\n클래스별 일치율 (FP32 기준):")
+    for name, stats in sorted(report["per_class"].items()):
+        print(f"  {name:<10} {stats['agree']:4d}/{stats['images']:<4d} ({stats['agreement'] * 100:.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 양자화 ONNX 모델 생성 및 FP32 비교")
+    parser.add_argument("model", help="학습된 모델 경로 (.pt 또는 FP32 .onnx)")
+    parser.add_argument("--calib-dir", default="collected_data/images", help="보정용 이미지 폴더")
+    parser.add_argument("--num-calib", type=int, default=200, help="보정에 사용할 최대 이미지 수")
+    parser.add_argument("--test-dir", default="test_img", help="비교용 테스트 이미지 폴더")
+    parser.add_argument("--imgsz", type=int, default=640, help="내보낼 모델 입력 크기")
+    parser.add_argument("--output", help="INT8 모델 저장 경로 (기본: <모델>_int8.onnx)")
+    parser.add_argument("--report", help="리포트 JSON 저장 경로 (기본: <모델>_int8_report.json)")
+    parser.add_argument("--method", choices=("minmax", "entropy", "percentile"), default="minmax", help="보정 방법")
+    parser.add_argument("--no-per-channel", action="store_true", help="가중치를 텐서 단위로 양자화")
+    parser.add_argument("--quantize-head", action="store_true", help="검출 헤드 디코딩 연산도 INT8로 양자화")
+    parser.add_argument("--repeat", type=int, default=3, help="지연 시간 측정 반복 횟수")
+    args = parser.parse_args()
+
+    stem = os.path.splitext(args.model)[0]
+    int8_path = args.output or stem + "_int8.onnx"
+    report_path = args.report or stem + "_int8_report.json"
+
+    calib_files = list_images(args.calib_dir)
+    if not calib_files:
+        print(f"보정용 이미지를 찾을 수 없음: {args.calib_dir}")
+        return
+    if len(calib_files) > args.num_calib:
+        # 수집 순서에 치우치지 않도록 고르게 샘플링
+        calib_files = sorted(random.Random(0).sample(calib_files, args.num_calib))
+
+    fp32_path = export_fp32_onnx(args.model, args.imgsz)
+    quantize_model(fp32_path, int8_path, calib_files,
+                   per_channel=not args.no_per_channel, method=args.method,
+                   exclude_head=not args.quantize_head)
+
+    test_files = list_images(args.test_dir)
+    if not test_files:
+        print(f"테스트 이미지를 찾을 수 없어 비교를 건너뜁니다: {args.test_dir}")
+        return
+    report = compare_models(fp32_path, int8_path, test_files, repeat=args.repeat)
+    if args.model.endswith(".pt") and os.path.exists(args.model):
+        report["pt_size_mb"] = os.path.getsize(args.model) / 1e6
+    report["calibration_images"] = len(calib_files)
+    print_report(report)
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n리포트 저장됨: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+모델 레지스트리 (핫 스왑 / 되돌리기)
+
+models/ 폴더의 모델을 이름(파일 이름에서 확장자를 뺀 것)별로 찾아 메타데이터(백엔드별 파일,
+클래스, 입력 크기, 체크섬)를 제공합니다. 새 모델은 백그라운드 스레드에서 로드와 워밍업을 마친 뒤
+현재 모델과 한 번에 교체하므로, 교체하는 동안에도 기존 모델로 계속 추론합니다.
+이전 모델은 메모리에 남겨 두어 바로 되돌릴 수 있습니다.
+
+사용법:
+    registry = ModelRegistry(conf=0.5, iou=0.45)
+    registry.load("models/best4.pt", background=False)   # 시작 시 (완료될 때까지 대기)
+    registry.load("best5")                                # 실행 중 교체 (Future 반환)
+    registry.rollback()
+    dets = registry.current.predict(frame)
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from detector import create_detector, find_model_files, read_metadata_yaml, AUTO, OPENVINO, ONNXRUNTIME, PYTORCH
+
+MODELS_DIR = "models"
+HISTORY_SIZE = 2                    # 되돌리기용으로 메모리에 남겨 둘 이전 모델 수
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+OPENVINO_SUFFIX = "_openvino_model"
+
+# 모델 파일 체크섬 캐시 {(경로, 수정 시각, 크기): sha256}
+_checksums = {}
+_checksum_lock = threading.Lock()
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """파일(또는 OpenVINO 폴더 내 파일 전체)의 sha256. 수정되지 않은 파일은 다시 계산하지 않음"""
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(path, f) for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)))
+    stats = tuple((f, os.path.getmtime(f), os.path.getsize(f)) for f in files)
+    with _checksum_lock:
+        if stats in _checksums:
+            return _checksums[stats]
+
+    digest = hashlib.sha256()
+    for f in files:
+        with open(f, "rb") as fp:
+            for chunk in iter(lambda: fp.read(chunk_size), b""):
+                digest.update(chunk)
+    checksum = digest.hexdigest()
+    with _checksum_lock:
+        _checksums[stats] = checksum
+    return checksum
+
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+class ModelInfo:
+    """모델 하나(같은 이름의 .pt / .onnx / OpenVINO 파일 묶음)의 메타데이터"""
+
+    def __init__(self, name, path, files):
+        self.name = name
+        self.path = path            # create_detector에 넘길 경로
+        self.files = files          # {backend: path}
+        self.classes = None         # {class_id: name}, 로드 전에는 OpenVINO metadata.yaml에서만 확인 가능
+        self.imgsz = None
+        self.backend = None         # 로드된 백엔드 이름
+        self.loaded_at = None
+        self._checksum = None
+
+        openvino_dir = files.get(OPENVINO)
+        if openvino_dir and os.path.isdir(openvino_dir):
+            metadata = read_metadata_yaml(os.path.join(openvino_dir, "metadata.yaml"))
+            if metadata.get("names"):
+                self.classes = {int(k): v for k, v in metadata["names"].items()}
+            self.imgsz = metadata.get("imgsz")
+
+    @property
+    def checksum(self):
+        """대표 파일(.pt가 있으면 .pt)의 sha256 (처음 접근할 때 계산)"""
+        if self._checksum is None:
+            self._checksum = file_checksum(self.path)
+        return self._checksum
+
+    @property
+    def size_mb(self):
+        return sum(_path_size(p) for p in set(self.files.values())) / 1e6
+
+    def update_from_detector(self, detector):
+        self.classes = dict(detector.names)
+        self.backend = detector.backend_name
+        backend = detector.backend
+        self.imgsz = getattr(backend, "input_size", None) or getattr(backend, "imgsz", None) or self.imgsz
+        self.loaded_at = time.time()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "path": self.path,
+            "files": self.files,
+            "classes": self.classes,
+            "imgsz": list(self.imgsz) if isinstance(self.imgsz, (list, tuple)) else self.imgsz,
+            "backend": self.backend,
+            "size_mb": self.size_mb,
+            "checksum": self.checksum,
+        }
+
+
+def discover_models(models_dir=MODELS_DIR):
+    """models 폴더의 모델 목록 {이름: ModelInfo} (.pt, .onnx, *_openvino_model 폴더를 이름별로 묶음)"""
+    if not os.path.isdir(models_dir):
+        return {}
+    stems = set()
+    for entry in os.listdir(models_dir):
+        path = os.path.join(models_dir, entry)
+        stem, ext = os.path.splitext(entry)
+        if os.path.isdir(path) and entry.endswith(OPENVINO_SUFFIX):
+            stems.add(entry[:-len(OPENVINO_SUFFIX)])
+        elif ext in (".pt", ".onnx"):
+            stems.add(stem)
+
+    models = {}
+    for stem in sorted(stems):
+        files = find_model_files(os.path.join(models_dir, stem + ".pt"))
+        # OpenVINO 후보의 .onnx 대체 경로는 ONNX Runtime 파일과 중복이므로 제외
+        if files.get(OPENVINO, "").endswith(".onnx"):
+            del files[OPENVINO]
+        if not files:
+            continue
+        path = files.get(PYTORCH) or files.get(ONNXRUNTIME) or files.get(OPENVINO)
+        models[stem] = ModelInfo(stem, path, files)
+    return models
+
+
+class ModelRegistry:
+    """현재 추론에 사용하는 모델을 관리하고 백그라운드 로드 후 교체"""
+
+    def __init__(self, models_dir=MODELS_DIR, backend=AUTO, conf=0.25, iou=0.7, history_size=HISTORY_SIZE,
+                 warmup=True):
+        self.models_dir = models_dir
+        self.backend = backend
+        self.conf = conf
+        self.iou = iou
+        self.warmup = warmup
+        self.current = None         # 현재 Detector (읽기는 잠금 없이 가능)
+        self.current_info = None
+        self._history = deque(maxlen=history_size)   # [(ModelInfo, Detector), ...]
+        self._lock = threading.Lock()
+        self._loading = None        # 로드 중인 모델 이름
+        self.last_error = None
+        self.swaps = 0
+
+    def models(self):
+        return discover_models(self.models_dir)
+
+    def resolve(self, name_or_path):
+        """모델 이름 또는 경로를 ModelInfo로 변환"""
+        models = self.models()
+        if name_or_path in models:
+            return models[name_or_path]
+        stem = os.path.splitext(os.path.basename(name_or_path.rstrip("/\\")))[0]
+        if stem.endswith(OPENVINO_SUFFIX):
+            stem = stem[:-len(OPENVINO_SUFFIX)]
+        files = find_model_files(name_or_path)
+        if not files and not os.path.exists(name_or_path):
+            raise FileNotFoundError(f"모델을 찾을 수 없습니다: {name_or_path}")
+        return ModelInfo(stem, name_or_path, files)
+
+    @property
+    def loading(self):
+        return self._loading
+
+    @property
+    def history(self):
+        """되돌릴 수 있는 이전 모델 이름 목록 (최근 것이 마지막)"""
+        with self._lock:
+            return [info.name for info, _ in self._history]
+
+    def _load(self, info):
+        detector = create_detector(info.path, backend=self.backend, conf=self.conf, iou=self.iou)
+        if self.warmup:
+            # 첫 실제 요청이 모델 초기화 비용을 내지 않도록 교체 전에 워밍업
+            detector.predict(np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8))
+        info.update_from_detector(detector)
+        return detector
+
+    def _swap(self, info, detector):
+        with self._lock:
+            first = self.current is None
+            if not first:
+                self._history.append((self.current_info, self.current))
+            self.current_info, self.current = info, detector
+            self.swaps += 1
+        print(f"모델 {'로드' if first else '교체'} 완료: {info.name} ({info.backend})")
+
+    def load(self, name_or_path, background=True):
+        """
+        모델을 로드하여 현재 모델과 교체
+
+        background=True이면 별도 스레드에서 로드 / 워밍업 후 교체하고 Future를 반환합니다.
+        (교체 전까지는 기존 모델로 계속 추론) 이미 다른 모델을 로드 중이면 RuntimeError.
+        """
+        info = self.resolve(name_or_path)
+        with self._lock:
+            if self._loading is not None:
+                raise RuntimeError(f"이미 모델을 로드하는 중입니다: {self._loading}")
+            self._loading = info.name
+
+        future = Future()
+
+        def run():
+            try:
+                detector = self._load(info)
+                self._swap(info, detector)
+                self.last_error = None
+                future.set_result(info)
+            except Exception as e:
+                self.last_error = e
+                print(f"모델 로드 실패 ({info.name}): {e}")
+                future.set_exception(e)
+            finally:
+                self._loading = None
+
+        if background:
+            threading.Thread(target=run, name=f"model-load-{info.name}", daemon=True).start()
+        else:
+            run()
+            future.result()
+        return future
+
+    def rollback(self):
+        """직전 모델로 되돌리기 (되돌린 모델의 ModelInfo, 되돌릴 모델이 없으면 None)"""
+        with self._lock:
+            if not self._history:
+                return None
+            info, detector = self._history.pop()
+            self.current_info, self.current = info, detector
+            self.swaps += 1
+        print(f"모델 되돌리기 완료: {info.name} ({info.backend})")
+        return info
+
+    def status(self):
+        """현재 / 로드 중 / 되돌리기 가능 모델 요약 문자열"""
+        lines = []
+        if self.current_info is not None:
+            info = self.current_info
+            lines.append(f"현재 모델: {info.name} ({info.backend}, {info.path}, sha256 {info.checksum[:12]})")
+        else:
+            lines.append("현재 모델: 없음")
+        if self._loading:
+            lines.append(f"로드 중: {self._loading}")
+        if self.last_error is not None:
+            lines.append(f"마지막 로드 오류: {self.last_error}")
+        history = self.history
+        if history:
+            lines.append(f"되돌리기 가능: {' → '.join(reversed(history))}")
+        return "\n".join(lines)
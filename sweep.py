@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+신뢰도 / NMS IoU 임계값 탐색
+
+라벨이 있는 이미지 폴더를 NMS IoU 값마다 한 번씩만 낮은 신뢰도로 추론하고,
+각 신뢰도 임계값의 결과는 신뢰도로 필터링하여 precision / recall / F1과
+게임 판정 정확도(손 하나 + 클래스 일치) 표를 만듭니다.
+app.py / demo.py의 conf, iou 값을 데이터로 고르는 데 사용합니다.
+
+사용법:
+    python sweep.py models/best4.pt collected_data/images
+    python sweep.py models/best4.pt collected_data/images --iou 0.45 0.6 0.7 --output sweep.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from detector import create_detector
+from metrics import (DetectionEvaluator, find_label_path, read_yolo_labels, list_images, iter_image_batches,
+                     EVAL_BATCH_SIZE, EVAL_WORKERS, EVAL_MIN_CONF)
+from postprocess import move_table, DATASET_NAMES
+
+DEFAULT_CONFS = [round(c, 2) for c in np.arange(0.1, 0.95, 0.05)]
+DEFAULT_IOUS = [0.45, 0.7]
+
+
+def sweep(detector, image_files, conf_thresholds=DEFAULT_CONFS, iou_thresholds=DEFAULT_IOUS,
+          batch_size=EVAL_BATCH_SIZE, workers=EVAL_WORKERS):
+    """
+    NMS IoU 값별 {"iou", "seconds", "map50", "rows": [신뢰도별 지표]} 목록
+
+    이미지는 NMS IoU 값마다 스레드 풀에서 다시 디코딩합니다 (큰 폴더도 메모리에 모두 올리지 않음).
+    """
+    results = []
+    for iou in iou_thresholds:
+        start = time.perf_counter()
+        evaluator = DetectionEvaluator(DATASET_NAMES)
+        table = move_table(detector.names)
+        for batch in iter_image_batches(image_files, batch_size, workers):
+            readable = [(path, img) for path, img in batch if img is not None]
+            if not readable:
+                continue
+            dets_list = detector.predict_batch([img for _, img in readable], conf=EVAL_MIN_CONF, iou=iou)
+            for (path, img), dets in zip(readable, dets_list):
+                evaluator.add(table.to_dataset(dets), read_yolo_labels(find_label_path(path), img.shape[1], img.shape[0]))
+        results.append({
+            "iou": iou,
+            "seconds": time.perf_counter() - start,
+            "map50": evaluator.summary()["map50"],
+            "rows": evaluator.sweep(conf_thresholds),
+        })
+    return results
+
+
+def print_sweep(results):
+    best = None
+    for result in results:
+        print(f"\n===== NMS IoU {result['iou']} (mAP50 {result['map50']:.3f}, {result['seconds']:.1f}초) =====")
+        print(f"{'conf':>6}{'TP':>7}{'FP':>7}{'FN':>7}{'Precision':>11}{'Recall':>9}{'F1':>8}{'게임 정확도':>12}")
+        for row in result["rows"]:
+            print(f"{row['conf']:>6.2f}{row['tp']:>7}{row['fp']:>7}{row['fn']:>7}{row['precision']:>11.3f}"
+                  f"{row['recall']:>9.3f}{row['f1']:>8.3f}{row['game_accuracy']:>12.3f}")
+            key = (row["game_accuracy"], row["f1"])
+            if best is None or key > best[0]:
+                best = (key, result["iou"], row)
+    if best is not None:
+        _, iou, row = best
+        print(f"\n추천: conf={row['conf']:.2f}, iou={iou} "
+              f"(게임 정확도 {row['game_accuracy']:.3f}, F1 {row['f1']:.3f})")
+        return {"conf": row["conf"], "iou": iou}
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="신뢰도 / NMS IoU 임계값별 precision / recall 표")
+    parser.add_argument("model", help="모델 경로")
+    parser.add_argument("folder", help="라벨이 있는 이미지 폴더 (이미지 옆 .txt 또는 images/ → labels/)")
+    parser.add_argument("--conf", type=float, nargs="+", default=DEFAULT_CONFS, help="탐색할 신뢰도 임계값")
+    parser.add_argument("--iou", type=float, nargs="+", default=DEFAULT_IOUS, help="탐색할 NMS IoU 임계값")
+    parser.add_argument("--batch-size", type=int, default=EVAL_BATCH_SIZE, help="배치 크기")
+    parser.add_argument("--workers", type=int, default=EVAL_WORKERS, help="이미지 디코딩 스레드 수")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    detector = create_detector(args.model)
+    image_files = [path for path in list_images(args.folder) if find_label_path(path)]
+    if not image_files:
+        print(f"라벨이 있는 이미지를 찾을 수 없음: {args.folder}")
+        return
+    print(f"라벨이 있는 이미지 {len(image_files)}개로 탐색 (신뢰도 {len(args.conf)}개 x NMS IoU {len(args.iou)}개)")
+
+    results = sweep(detector, image_files, sorted(args.conf), args.iou, args.batch_size, args.workers)
+    recommended = print_sweep(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "backend": detector.backend_name, "folder": args.folder,
+                       "images": len(image_files), "recommended": recommended, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"결과 저장됨: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
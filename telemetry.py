@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+실행 중 지표 수집과 Prometheus 텍스트 형식 엔드포인트
+
+카운터 / 히스토그램 / 콜백 게이지를 MetricsRegistry에 등록하고, start_http_server로 별도 포트에
+/metrics 엔드포인트를 띄웁니다. 지표를 끈 상태에서는 NULL_METRIC(아무것도 하지 않는 객체)과
+pipeline.NULL_TIMER를 사용하므로 프레임 경로에 잠금이나 기록 비용이 없습니다.
+
+사용법:
+    metrics = MetricsRegistry()
+    frames = metrics.counter("rps_frames_total", "처리한 프레임 수", labels=("outcome",))
+    frames.inc("one_hand")
+    timer = HistogramTimer(metrics.histogram("rps_stage_seconds", "단계별 소요 시간", labels=("stage",)))
+    with timer.measure("predict"):
+        ...
+    start_http_server(metrics, port=9100)     # http://localhost:9100/metrics
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 기본 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터 (레이블 값 조합별)"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    """누적 구간 히스토그램 (레이블 값 조합별 구간 개수 / 합계 / 개수)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label_values -> [구간별 개수..., +Inf 개수], 합계
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        for label_values, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                labels = _format_labels(self.labels, label_values, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CallbackGauge:
+    """수집할 때마다 함수를 호출하여 값을 읽는 게이지 (기존 통계 객체 노출용)"""
+
+    def __init__(self, name, help_text, fn, labels=(), kind="gauge"):
+        """fn은 숫자 하나 또는 {레이블 값 튜플: 숫자}를 반환"""
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.kind = kind
+        self._fn = fn
+
+    def samples(self):
+        value = self._fn()
+        if value is None:
+            return
+        items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        for label_values, v in items:
+            if not isinstance(label_values, tuple):
+                label_values = (label_values,)
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(v)}"
+
+
+class NullMetric:
+    """지표를 끈 상태의 Counter / Histogram 대체 객체"""
+
+    def inc(self, *label_values, amount=1):
+        pass
+
+    def observe(self, value, *label_values):
+        pass
+
+
+NULL_METRIC = NullMetric()
+
+
+class MetricsRegistry:
+    """등록된 지표를 Prometheus 텍스트 형식으로 출력"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, fn, labels=(), kind="gauge"):
+        return self._register(CallbackGauge(name, help_text, fn, labels, kind))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # 콜백 하나가 실패해도 나머지 지표는 출력
+                lines.append(f"# {metric.name} 수집 실패: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class HistogramTimer:
+    """StageTimer와 같은 record / measure 인터페이스로 단계별 시간을 히스토그램에 기록"""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def record(self, stage, seconds):
+        self.histogram.observe(seconds, stage)
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram.observe(time.perf_counter() - start, stage)
+
+
+def start_http_server(registry, port=9100, host="0.0.0.0"):
+    """백그라운드 스레드에서 /metrics 엔드포인트 실행, 서버 객체 반환 (shutdown()으로 종료)"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 수집 요청마다 콘솔에 로그를 남기지 않음
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"지표 엔드포인트: http://{host}:{port}/metrics")
+    return server
@@ -1,8 +1,12 @@
 import cv2
 import os
-import glob
+import json
+import time
 import numpy as np
-from ultralytics import YOLO
+from detector import create_detector, draw_detections, CONF, CLS
+from postprocess import move_table, stack_detections, hand_counts, DATASET_NAMES
+from metrics import (DetectionEvaluator, find_label_path, read_yolo_labels, list_images, iter_image_batches,
+                     EVAL_BATCH_SIZE, EVAL_WORKERS, EVAL_CONF, EVAL_MIN_CONF, EVAL_PROGRESS_EVERY)
 
 def test_model_with_image(model_path, image_path):
     """
@@ -14,7 +18,7 @@ def test_model_with_image(model_path, image_path):
     """
     # 모델 로드
     try:
-        model = YOLO(model_path)
+        detector = create_detector(model_path)
         print(f"모델 로드 성공: {model_path}")
     except Exception as e:
         print(f"모델 로드 실패: {e}")
@@ -33,22 +37,23 @@ def test_model_with_image(model_path, image_path):
     # 이미지 크기 출력
     print(f"이미지 크기: {img.shape}")
     
+    # 가장 낮은 임계값으로 한 번만 예측하고, 높은 임계값 결과는 신뢰도로 필터링
+    # (NMS는 신뢰도가 높은 박스가 낮은 박스를 제거하므로 임계값별로 다시 예측한 결과와 같음)
+    conf_thresholds = [0.5, 0.3, 0.2, 0.1]
+    all_dets = detector.predict(img, conf=min(conf_thresholds))
+    
     # 다양한 신뢰도 임계값으로 예측 테스트
-    for conf_threshold in [0.5, 0.3, 0.2, 0.1]:
+    for conf_threshold in conf_thresholds:
         print(f"\n신뢰도 임계값: {conf_threshold}")
-        results = model.predict(img, conf=conf_threshold)
+        dets = all_dets[all_dets[:, CONF] >= conf_threshold]
         
         # 결과 분석
-        if len(results[0].boxes) > 0:
-            print(f"감지된 객체 수: {len(results[0].boxes)}")
+        if len(dets) > 0:
+            print(f"감지된 객체 수: {len(dets)}")
             
-            for i, box in enumerate(results[0].boxes):
-                label_id = int(box.cls[0])
-                conf = float(box.conf[0])
-                class_name = results[0].names.get(label_id, "unknown")
-                
-                # 바운딩 박스 좌표 (xyxy 형식)
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
+            for i, (x1, y1, x2, y2, conf, cls) in enumerate(dets):
+                label_id = int(cls)
+                class_name = detector.class_name(label_id)
                 
                 print(f"객체 {i+1}: 클래스 {label_id} ({class_name}), 신뢰도: {conf:.4f}")
                 print(f"  바운딩 박스: ({int(x1)}, {int(y1)}) - ({int(x2)}, {int(y2)})")
@@ -56,71 +61,131 @@ def test_model_with_image(model_path, image_path):
             print("감지된 객체 없음")
         
         # 결과 시각화 및 저장
-        result_img = results[0].plot(line_width=2, font_size=1)
+        result_img = draw_detections(img.copy(), dets, detector.names, line_width=2)
         output_path = f"test_result_{conf_threshold:.1f}.jpg"
         cv2.imwrite(output_path, result_img)
         print(f"결과 이미지 저장됨: {output_path}")
 
-def test_model_with_folder(model_path, folder_path):
+def test_model_with_folder(model_path, folder_path, batch_size=EVAL_BATCH_SIZE, workers=EVAL_WORKERS,
+                           conf=EVAL_CONF, save_plots=False, report_path=None):
     """
-    폴더 내 모든 이미지로 YOLO 모델 테스트
+    폴더 내 모든 이미지로 YOLO 모델 테스트 (병렬 디코딩 + 배치 추론)
+    
+    이미지 옆(또는 images/ → labels/ 폴더)에 YOLO 라벨 파일이 있으면
+    클래스별 precision / recall / mAP와 혼동 행렬을 계산합니다.
     
     Args:
         model_path: YOLO 모델 경로
         folder_path: 테스트 이미지 폴더 경로
+        batch_size: 한 번에 추론할 이미지 수
+        workers: 이미지 디코딩 스레드 수
+        conf: precision / recall / 혼동 행렬 기준 신뢰도
+        save_plots: 결과 이미지(test_results/)를 저장할지 여부
+        report_path: 평가 결과 JSON 저장 경로 (None이면 저장하지 않음)
     """
     # 모델 로드
     try:
-        model = YOLO(model_path)
+        detector = create_detector(model_path)
         print(f"모델 로드 성공: {model_path}")
     except Exception as e:
         print(f"모델 로드 실패: {e}")
         return
     
     # 이미지 파일 목록 가져오기
-    image_files = glob.glob(os.path.join(folder_path, "*.jpg")) + \
-                 glob.glob(os.path.join(folder_path, "*.jpeg")) + \
-                 glob.glob(os.path.join(folder_path, "*.png"))
+    image_files = list_images(folder_path)
     
     if not image_files:
         print(f"이미지를 찾을 수 없음: {folder_path}")
         return
     
-    print(f"총 {len(image_files)}개 이미지 테스트")
+    print(f"총 {len(image_files)}개 이미지 테스트 (배치 {batch_size}, 디코딩 스레드 {workers})")
     
     # 결과 저장 폴더 생성
     results_folder = "test_results"
-    os.makedirs(results_folder, exist_ok=True)
-    
-    # 각 이미지 테스트
-    for i, img_path in enumerate(image_files):
-        print(f"\n[{i+1}/{len(image_files)}] 이미지 테스트: {os.path.basename(img_path)}")
-        
-        img = cv2.imread(img_path)
-        if img is None:
-            print(f"이미지를 읽을 수 없음: {img_path}")
+    if save_plots:
+        os.makedirs(results_folder, exist_ok=True)
+    
+    # 라벨 파일은 데이터셋 클래스 ID(CLASS_MAP)이므로 예측 클래스도 같은 ID로 바꿔서 평가
+    evaluator = DetectionEvaluator(DATASET_NAMES, conf=conf)
+    table = move_table(detector.names)
+    detected = {}      # 클래스별 검출 수 (conf 이상)
+    no_detection = 0
+    unreadable = 0
+    unlabeled = 0
+    done = 0
+    start = time.perf_counter()
+    
+    for batch in iter_image_batches(image_files, batch_size, workers):
+        readable = [(path, img) for path, img in batch if img is not None]
+        unreadable += len(batch) - len(readable)
+        for path, img in batch:
+            if img is None:
+                print(f"이미지를 읽을 수 없음: {path}")
+        if not readable:
             continue
         
-        # 예측
-        results = model.predict(img, conf=0.2)
+        # 배치 예측 (라벨이 있는 배치만 mAP 계산을 위해 낮은 신뢰도까지 예측 후 conf로 필터링)
+        label_paths = [find_label_path(path) for path, _ in readable]
+        batch_conf = min(conf, EVAL_MIN_CONF) if any(label_paths) else conf
+        results = detector.predict_batch([img for _, img in readable], conf=batch_conf)
         
-        # 결과 분석
-        if len(results[0].boxes) > 0:
-            print(f"감지된 객체 수: {len(results[0].boxes)}")
+        # 배치 전체 검출을 하나의 배열로 합쳐 클래스별 / 이미지별 개수를 한 번에 집계
+        stacked, _ = stack_detections(results)
+        class_names, counts = np.unique(table.name(stacked[stacked[:, CONF] >= conf, CLS]), return_counts=True)
+        for name, n in zip(class_names, counts):
+            detected[name] = detected.get(name, 0) + int(n)
+        no_detection += int(np.count_nonzero(hand_counts(results, conf) == 0))
+        
+        for (path, img), label_path, dets in zip(readable, label_paths, results):
+            # 정답 라벨이 있으면 평가에 추가
+            labels = read_yolo_labels(label_path, img.shape[1], img.shape[0]) if label_path else None
+            if labels is None:
+                unlabeled += 1
+            else:
+                evaluator.add(table.to_dataset(dets), labels)
             
-            for j, box in enumerate(results[0].boxes):
-                label_id = int(box.cls[0])
-                conf = float(box.conf[0])
-                class_name = results[0].names.get(label_id, "unknown")
-                print(f"객체 {j+1}: 클래스 {label_id} ({class_name}), 신뢰도: {conf:.4f}")
-        else:
-            print("감지된 객체 없음")
+            # 결과 시각화 및 저장 (선택)
+            if save_plots:
+                result_img = draw_detections(img, dets[dets[:, CONF] >= conf], detector.names, line_width=2)
+                cv2.imwrite(os.path.join(results_folder, f"result_{os.path.basename(path)}"), result_img)
         
-        # 결과 시각화 및 저장
-        result_img = results[0].plot(line_width=2, font_size=1)
-        output_path = os.path.join(results_folder, f"result_{os.path.basename(img_path)}")
-        cv2.imwrite(output_path, result_img)
-        print(f"결과 이미지 저장됨: {output_path}")
+        done += len(batch)
+        if done // EVAL_PROGRESS_EVERY != (done - len(batch)) // EVAL_PROGRESS_EVERY:
+            elapsed = time.perf_counter() - start
+            print(f"  [{done}/{len(image_files)}] {done / elapsed:.1f} 이미지/초")
+    
+    elapsed = time.perf_counter() - start
+    print(f"\n처리 완료: {done}개 이미지, {elapsed:.1f}초 ({done / max(elapsed, 1e-9):.1f} 이미지/초)")
+    if unreadable:
+        print(f"읽을 수 없는 이미지: {unreadable}개")
+    print(f"신뢰도 {conf} 이상 검출: " + (", ".join(f"{k} {v}개" for k, v in sorted(detected.items())) or "없음")
+          + f" | 검출 없음 {no_detection}개")
+    
+    report = {"model": model_path, "backend": detector.backend_name, "folder": folder_path,
+              "images": done, "seconds": elapsed, "detected": detected, "no_detection": no_detection}
+    
+    # 라벨이 있는 이미지 평가 결과
+    if evaluator.images:
+        summary = evaluator.summary()
+        report["metrics"] = summary
+        print(f"\n===== 평가 결과 (라벨 있는 이미지 {evaluator.images}개, 라벨 없음 {unlabeled}개) =====")
+        print(f"{'클래스':<10}{'라벨':>8}{'검출':>8}{'Precision':>11}{'Recall':>9}{'mAP50':>9}{'mAP50-95':>10}")
+        for name, c in summary["classes"].items():
+            print(f"{name:<10}{c['labels']:>8}{c['predictions']:>8}{c['precision']:>11.3f}{c['recall']:>9.3f}"
+                  f"{c['ap50']:>9.3f}{c['ap50_95']:>10.3f}")
+        print(f"{'전체':<10}{'':>16}{summary['precision']:>11.3f}{summary['recall']:>9.3f}"
+              f"{summary['map50']:>9.3f}{summary['map50_95']:>10.3f}")
+        print(f"\n혼동 행렬 (신뢰도 {conf} 이상, IoU {evaluator.confusion_iou})")
+        print(evaluator.format_confusion())
+    else:
+        print("라벨 파일이 없어 정확도 평가를 건너뜁니다.")
+    
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"평가 결과 저장됨: {report_path}")
+    return report
 
 def test_model_classes(model_path):
     """
@@ -130,12 +195,13 @@ def test_model_classes(model_path):
         model_path: YOLO 모델 경로
     """
     try:
-        model = YOLO(model_path)
+        detector = create_detector(model_path)
         print(f"모델 로드 성공: {model_path}")
         
         # 클래스 정보 출력
+        print(f"\n백엔드: {detector.backend_name}")
         print("\n클래스 정보:")
-        for class_id, class_name in model.names.items():
+        for class_id, class_name in detector.names.items():
             print(f"클래스 ID {class_id}: {class_name}")
     except Exception as e:
         print(f"모델 로드 실패: {e}")
@@ -156,7 +222,9 @@ if __name__ == "__main__":
     # 3. 폴더 내 이미지 테스트 (선택 사항)
     test_folder = input("\n테스트할 이미지 폴더 경로를 입력하세요 (건너뛰려면 Enter): ").strip()
     if test_folder:
+        save_plots = input("결과 이미지를 저장할까요? (y/N): ").strip().lower() == "y"
         print(f"\n===== 폴더 내 이미지 테스트: {test_folder} =====")
-        test_model_with_folder(model_path, test_folder)
+        test_model_with_folder(model_path, test_folder, save_plots=save_plots,
+                               report_path=os.path.join("test_results", "eval_report.json"))
     
     print("\n테스트 완료!")
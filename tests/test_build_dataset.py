@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""build_dataset 박스 변환 / 층화 분할 / 증분 빌드 테스트"""
+import os
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+
+import build_dataset
+from build_dataset import _warp, build, stratified_split
+from postprocess import convert_bbox_to_yolo
+
+
+def test_convert_bbox_to_yolo_single_and_batch():
+    assert convert_bbox_to_yolo([10, 20, 30, 60], 100, 200) == pytest.approx((0.2, 0.2, 0.2, 0.2))
+    yolo = convert_bbox_to_yolo(np.array([[0, 0, 100, 200], [50, 100, 100, 200]]), 100, 200)
+    assert yolo.shape == (2, 4)
+    np.testing.assert_allclose(yolo, [[0.5, 0.5, 1.0, 1.0], [0.75, 0.75, 0.5, 0.5]])
+
+
+def test_warp_identity_keeps_boxes():
+    img = np.zeros((100, 100, 3), dtype=np.uint8)
+    boxes = np.array([[0.25, 0.5, 0.1, 0.2]])
+    _, classes, out = _warp(img, np.array([1]), boxes, angle=0)
+    assert classes.tolist() == [1]
+    np.testing.assert_allclose(out, boxes)
+
+
+def test_warp_rotates_box_with_image():
+    # 90도 회전(반시계 방향): (x, y) → (y, 100 - x), 박스 너비 / 높이가 바뀜
+    img = np.zeros((100, 100, 3), dtype=np.uint8)
+    _, _, out = _warp(img, np.array([0]), np.array([[0.25, 0.5, 0.1, 0.2]]), angle=90)
+    np.testing.assert_allclose(out, [[0.5, 0.75, 0.2, 0.1]], atol=1e-9)
+
+
+def test_warp_drops_box_moved_out_of_image():
+    img = np.zeros((100, 100, 3), dtype=np.uint8)
+    boxes = np.array([[0.1, 0.5, 0.1, 0.1], [0.9, 0.5, 0.1, 0.1]])
+    _, classes, out = _warp(img, np.array([0, 2]), boxes, angle=0, shift=(0.5, 0.0))
+    # 오른쪽 박스는 이미지 밖으로 나가 제외
+    assert classes.tolist() == [0]
+    np.testing.assert_allclose(out, [[0.6, 0.5, 0.1, 0.1]])
+
+
+def test_stratified_split_keeps_class_ratios_and_is_deterministic():
+    samples = {f"a{i:02d}": 0 for i in range(10)}
+    samples.update({f"b{i:02d}": 1 for i in range(5)})
+    assignment = stratified_split(samples, (0.6, 0.2, 0.2), seed=1)
+
+    counts = {}
+    for key, split in assignment.items():
+        counts[samples[key], split] = counts.get((samples[key], split), 0) + 1
+    assert counts == {(0, "train"): 6, (0, "valid"): 2, (0, "test"): 2,
+                      (1, "train"): 3, (1, "valid"): 1, (1, "test"): 1}
+    # 입력 순서와 관계없이 같은 분할
+    assert stratified_split(dict(reversed(list(samples.items()))), (0.6, 0.2, 0.2), seed=1) == assignment
+
+
+def make_source(root, count):
+    images, labels = os.path.join(root, "images"), os.path.join(root, "labels")
+    os.makedirs(images)
+    os.makedirs(labels)
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        cv2.imwrite(os.path.join(images, f"{i}.jpg"), rng.integers(0, 255, (32, 32, 3), dtype=np.uint8))
+        with open(os.path.join(labels, f"{i}.txt"), "w") as f:
+            f.write(f"{i % 2} 0.5 0.5 0.4 0.4\n")
+    return root
+
+
+def test_rebuild_writes_nothing_and_prunes_removed_samples(tmp_path):
+    source = make_source(str(tmp_path / "src"), 10)
+    output = str(tmp_path / "out")
+
+    first = build([(source, None)], output, augment=1, workers=0)
+    assert first["samples"] == 10
+    assert first["written"] > 0
+    assert os.path.exists(os.path.join(output, "data.yaml"))
+
+    # 바뀐 것이 없으면 해시 / 저장 / 이동 / 삭제 모두 0
+    second = build([(source, None)], output, augment=1, workers=0)
+    assert (second["hashed"], second["written"], second["moved"], second["removed"]) == (0, 0, 0, 0)
+
+    # 소스에서 지운 샘플의 출력은 삭제
+    os.remove(os.path.join(source, "images", "0.jpg"))
+    third = build([(source, None)], output, augment=1, workers=0)
+    assert third["samples"] == 9
+    assert third["removed"] >= 1
+    outputs = sum(len(os.listdir(os.path.join(output, split, "images"))) for split in ("train", "valid", "test"))
+    train = sum(third["split_counts"]["train"].values())
+    assert outputs == 9 + train   # 원본 + train 증강 1장씩
+
+
+def test_build_closes_zip_sources(tmp_path):
+    folder = make_source(str(tmp_path / "src"), 4)
+    archive = str(tmp_path / "src.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        for root, _, names in os.walk(folder):
+            for name in names:
+                path = os.path.join(root, name)
+                zf.write(path, os.path.relpath(path, folder))
+
+    summary = build([(archive, None)], str(tmp_path / "out"), augment=0, workers=0)
+    assert summary["samples"] == 4
+    assert build_dataset._zip_files == {}
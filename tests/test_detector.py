@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""detector ONNX 메타데이터 읽기 테스트"""
+import pytest
+
+from detector import read_onnx_metadata
+
+onnx = pytest.importorskip("onnx")
+
+
+def save_model(path, metadata):
+    from onnx import TensorProto, helper
+    graph = helper.make_graph([helper.make_node("Identity", ["images"], ["output0"])], "g",
+                              [helper.make_tensor_value_info("images", TensorProto.FLOAT, [1, 3, 32, 32])],
+                              [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, 3, 32, 32])])
+    model = helper.make_model(graph)
+    helper.set_model_props(model, metadata)
+    onnx.save(model, path)
+    return path
+
+
+def test_read_onnx_metadata_parses_ultralytics_values(tmp_path):
+    path = save_model(str(tmp_path / "m.onnx"), {"names": "{0: 'Rock', 1: 'Paper', 2: 'Scissors'}",
+                                                 "imgsz": "[320, 320]", "end2end": "True"})
+    metadata = read_onnx_metadata(path)
+    assert metadata["names"] == {0: "Rock", 1: "Paper", 2: "Scissors"}
+    assert metadata["imgsz"] == "[320, 320]"
+    assert metadata["end2end"] is True
+
+
+def test_read_onnx_metadata_without_metadata(tmp_path):
+    assert read_onnx_metadata(save_model(str(tmp_path / "m.onnx"), {})) == {"end2end": False}
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""metrics.DetectionEvaluator / postprocess.MoveTable 평가 클래스 매핑 테스트"""
+import numpy as np
+import pytest
+
+from metrics import DetectionEvaluator, average_precision
+from postprocess import CLASS_MAP, DATASET_NAMES, move_table
+
+
+def det(x1, y1, x2, y2, conf, cls):
+    return np.array([[x1, y1, x2, y2, conf, cls]], dtype=np.float32)
+
+
+def label(cls, x1, y1, x2, y2):
+    return np.array([[cls, x1, y1, x2, y2]], dtype=np.float32)
+
+
+def test_perfect_prediction_scores_one():
+    evaluator = DetectionEvaluator(DATASET_NAMES, conf=0.25)
+    evaluator.add(det(10, 10, 50, 50, 0.9, CLASS_MAP["rock"]), label(CLASS_MAP["rock"], 10, 10, 50, 50))
+    summary = evaluator.summary()
+    rock = summary["classes"]["rock"]
+    assert rock["precision"] == 1.0
+    assert rock["recall"] == 1.0
+    # ultralytics와 같은 101점 보간에서 완벽한 곡선의 AP는 0.995
+    assert rock["ap50"] == pytest.approx(0.995)
+    assert summary["map50_95"] == pytest.approx(0.995)
+
+
+def test_missed_label_and_false_positive():
+    evaluator = DetectionEvaluator(DATASET_NAMES, conf=0.25)
+    evaluator.add(det(100, 100, 150, 150, 0.9, CLASS_MAP["paper"]), label(CLASS_MAP["paper"], 0, 0, 40, 40))
+    paper = evaluator.summary()["classes"]["paper"]
+    assert paper["precision"] == 0.0
+    assert paper["recall"] == 0.0
+    background = len(DATASET_NAMES)
+    assert evaluator.confusion[background, CLASS_MAP["paper"]] == 1   # 미검출
+    assert evaluator.confusion[CLASS_MAP["paper"], background] == 1   # 오검출
+
+
+def test_model_class_order_is_remapped_to_dataset_ids():
+    # Rock / Paper / Scissors 순서의 모델: 모델 ID 0(Rock)은 라벨 파일의 rock(1)
+    table = move_table({0: "Rock", 1: "Paper", 2: "Scissors"})
+    evaluator = DetectionEvaluator(DATASET_NAMES, conf=0.25)
+    evaluator.add(table.to_dataset(det(10, 10, 50, 50, 0.9, 0)), label(CLASS_MAP["rock"], 10, 10, 50, 50))
+    summary = evaluator.summary()
+    assert summary["classes"]["rock"]["precision"] == 1.0
+    assert summary["classes"]["rock"]["recall"] == 1.0
+    assert summary["classes"]["paper"]["labels"] == 0
+    assert evaluator.confusion[CLASS_MAP["rock"], CLASS_MAP["rock"]] == 1
+    assert list(summary["classes"]) == ["paper", "rock", "scissors", "justhand"]
+
+
+def test_unknown_model_classes_are_dropped():
+    table = move_table({0: "rock", 1: "dog"})
+    dets = np.concatenate([det(0, 0, 10, 10, 0.9, 1), det(0, 0, 10, 10, 0.8, 0), det(0, 0, 10, 10, 0.7, 7)])
+    mapped = table.to_dataset(dets)
+    assert mapped[:, 5].tolist() == [CLASS_MAP["rock"]]
+    assert dets[1, 5] == 0   # 원본 배열은 바뀌지 않음
+
+
+def test_average_precision_matches_ultralytics_interpolation():
+    assert average_precision(np.array([0.5, 1.0]), np.array([1.0, 1.0])) == pytest.approx(0.995)
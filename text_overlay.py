@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+한글 텍스트 오버레이 모듈
+
+폰트는 (경로, 크기)별로 한 번만 로드하고, 문자열은 RGBA 스프라이트로 미리 렌더링해 둡니다.
+프레임에는 텍스트 영역(ROI)만 알파 블렌딩하므로 프레임 전체를 PIL로 변환하지 않습니다.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PIL import ImageFont, ImageDraw, Image
+
+# 폰트 파일 경로 (프로젝트 폴더에 폰트 파일 추가 필요)
+FONT_PATH = "./assets/font/NanumGothic.ttf"  # 또는 다른 한글 폰트 파일
+
+# 동적 문자열(신뢰도 값 등) 스프라이트 캐시 크기
+DYNAMIC_CACHE_SIZE = 256
+
+_lock = threading.Lock()
+_fonts = {}                      # (font_path, font_size) -> ImageFont 또는 None
+_fixed_sprites = {}              # 고정 문자열 스프라이트 (제거되지 않음)
+_dynamic_sprites = OrderedDict()  # 동적 문자열 스프라이트 (LRU)
+_warned_paths = set()
+
+
+class TextSprite:
+    """미리 렌더링된 텍스트 스프라이트 (블렌딩용으로 미리 곱해 둔 값 보관)"""
+
+    def __init__(self, rgba, offset):
+        alpha = rgba[:, :, 3:4].astype(np.uint16)
+        self.height, self.width = rgba.shape[:2]
+        self.offset = offset  # 그리기 위치 기준 좌상단 오프셋 (x, y)
+        self.premultiplied = rgba[:, :, :3].astype(np.uint16) * alpha
+        self.inv_alpha = 255 - alpha
+
+    def blend_into(self, img, position):
+        """img의 position 위치에 스프라이트를 제자리(in-place) 블렌딩"""
+        x = position[0] + self.offset[0]
+        y = position[1] + self.offset[1]
+        img_h, img_w = img.shape[:2]
+
+        # 프레임 밖으로 나가는 부분 잘라내기
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, img_w), min(y + self.height, img_h)
+        if x0 >= x1 or y0 >= y1:
+            return img
+
+        sx0, sy0 = x0 - x, y0 - y
+        sx1, sy1 = sx0 + (x1 - x0), sy0 + (y1 - y0)
+
+        roi = img[y0:y1, x0:x1]
+        blended = roi * self.inv_alpha[sy0:sy1, sx0:sx1] + self.premultiplied[sy0:sy1, sx0:sx1]
+        roi[...] = (blended + 127) // 255
+        return img
+
+
+def get_font(font_size, font_path=FONT_PATH):
+    """(폰트 경로, 크기)별로 폰트를 한 번만 로드. 폰트 파일이 없으면 None"""
+    key = (font_path, font_size)
+    font = _fonts.get(key)
+    if font is not None or key in _fonts:
+        return font
+
+    with _lock:
+        if key in _fonts:
+            return _fonts[key]
+        if os.path.exists(font_path):
+            font = ImageFont.truetype(font_path, font_size)
+        else:
+            font = None
+            if font_path not in _warned_paths:
+                _warned_paths.add(font_path)
+                print(f"경고: 폰트 파일을 찾을 수 없습니다: {font_path}")
+                print("영문으로 표시합니다.")
+        _fonts[key] = font
+    return font
+
+
+def _render_sprite(text, font, color):
+    # 글자 영역만큼의 RGBA 이미지에 텍스트 렌더링
+    left, top, right, bottom = font.getbbox(text)
+    width, height = max(right - left, 1), max(bottom - top, 1)
+    canvas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).text((-left, -top), text, font=font, fill=tuple(color) + (255,))
+    return TextSprite(np.array(canvas), (left, top))
+
+
+def get_sprite(text, font_size=30, color=(0, 255, 0), font_path=FONT_PATH):
+    """캐시된 스프라이트 반환. 고정 문자열이 아니면 LRU 캐시에 보관"""
+    key = (text, font_size, tuple(color), font_path)
+    sprite = _fixed_sprites.get(key)
+    if sprite is not None:
+        return sprite
+
+    with _lock:
+        sprite = _dynamic_sprites.get(key)
+        if sprite is not None:
+            _dynamic_sprites.move_to_end(key)
+            return sprite
+
+    font = get_font(font_size, font_path)
+    if font is None:
+        return None
+    sprite = _render_sprite(text, font, color)
+
+    with _lock:
+        _dynamic_sprites[key] = sprite
+        if len(_dynamic_sprites) > DYNAMIC_CACHE_SIZE:
+            _dynamic_sprites.popitem(last=False)
+    return sprite
+
+
+def preload_texts(items, font_path=FONT_PATH):
+    """
+    고정 상태 문자열을 미리 렌더링 (캐시에서 제거되지 않음)
+
+    Args:
+        items: (text, font_size, color) 튜플 목록
+        font_path: 폰트 파일 경로
+    """
+    for text, font_size, color in items:
+        font = get_font(font_size, font_path)
+        if font is None:
+            return False
+        key = (text, font_size, tuple(color), font_path)
+        if key not in _fixed_sprites:
+            _fixed_sprites[key] = _render_sprite(text, font, color)
+    return True
+
+
+# 한글 텍스트 출력 함수 - img에 직접 그린 뒤 같은 배열을 반환
+def put_korean_text(img, text, position, font_size=30, color=(0, 255, 0)):
+    sprite = get_sprite(text, font_size, color)
+    if sprite is None:
+        # 영문으로 대체
+        cv2.putText(img, text, position, cv2.FONT_HERSHEY_SIMPLEX, font_size/30, color, 2)
+        return img
+    return sprite.blend_into(img, position)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+ROI 추적 모드
+
+손이 하나 검출되면 다음 프레임부터는 이전 바운딩 박스 주변을 여유 있게 잘라낸 영역만
+더 작은 입력 크기(imgsz)로 추론합니다. 신뢰도가 떨어지거나, 손이 여러 개이거나,
+박스가 잘라낸 영역 경계에 닿으면 전체 프레임 검색으로 돌아갑니다.
+입력 크기가 고정된(정적) ONNX / OpenVINO 모델은 imgsz 지정을 무시하므로, 고정 크기가 ROI 입력 크기와
+다르면 추적을 사용하지 않고 전체 프레임을 추론합니다.
+"""
+import numpy as np
+
+from detector import X1, Y1, X2, Y2, CONF
+
+# 기본 설정
+ROI_PADDING = 0.6       # 박스 크기(긴 변) 대비 사방 여백 비율
+ROI_IMGSZ = 320         # 잘라낸 영역 추론 입력 크기
+MIN_TRACK_CONF = 0.6    # 추적을 유지할 최소 신뢰도
+EDGE_MARGIN = 4         # 박스가 잘라낸 영역 경계에서 이 픽셀 이내면 경계에 닿은 것으로 판단
+
+
+class RoiTracker:
+    """
+    마지막으로 검출된 손 주변만 추론하는 추적기
+
+    predict 함수는 predict(image, imgsz) 형태이며 (N, 6) 검출 배열을 반환해야 합니다.
+    imgsz가 None이면 검출기 기본 크기로 전체 프레임을 추론합니다.
+    """
+
+    def __init__(self, padding=ROI_PADDING, imgsz=ROI_IMGSZ, min_conf=MIN_TRACK_CONF, edge_margin=EDGE_MARGIN):
+        self.padding = padding
+        self.imgsz = imgsz
+        self.min_conf = min_conf
+        self.edge_margin = edge_margin
+        self.box = None
+        self._unusable = None   # 추적을 사용할 수 없다고 안내한 검출기
+        # 통계
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.fallbacks = 0
+
+    def region(self, frame_shape):
+        """이전 박스 주변의 정사각형 추론 영역 (x0, y0, x1, y1), 추적 중이 아니면 None"""
+        if self.box is None:
+            return None
+        frame_h, frame_w = frame_shape[:2]
+        x1, y1, x2, y2 = self.box
+        side = max(x2 - x1, y2 - y1) * (1 + 2 * self.padding)
+        side = int(min(side, frame_w, frame_h))
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+
+        # 프레임 밖으로 나가지 않도록 영역 이동
+        x0 = int(np.clip(cx - side / 2, 0, frame_w - side))
+        y0 = int(np.clip(cy - side / 2, 0, frame_h - side))
+        return x0, y0, x0 + side, y0 + side
+
+    def _touches_edge(self, box, region, frame_shape):
+        # 프레임 경계와 겹치는 영역 경계는 제외 (손이 실제로 프레임 끝에 있는 경우)
+        frame_h, frame_w = frame_shape[:2]
+        x0, y0, x1, y1 = region
+        m = self.edge_margin
+        return ((x0 > 0 and box[X1] <= x0 + m) or (y0 > 0 and box[Y1] <= y0 + m) or
+                (x1 < frame_w and box[X2] >= x1 - m) or (y1 < frame_h and box[Y2] >= y1 - m))
+
+    def usable(self, detector):
+        """검출기가 ROI 입력 크기로 추론할 수 있는지 (입력 크기가 고정되어 있고 imgsz와 다르면 False, 한 번만 안내)"""
+        input_size = detector.input_size
+        if input_size is None or tuple(input_size) == (self.imgsz, self.imgsz):
+            return True
+        if self._unusable is not detector:
+            self._unusable = detector
+            self.reset()
+            print(f"입력 크기가 {input_size[0]}x{input_size[1]}로 고정된 모델이라 ROI 추적({self.imgsz})을 사용하지 않습니다.")
+        return False
+
+    def detect(self, frame, predict):
+        """추적 영역 또는 전체 프레임을 추론하여 프레임 좌표의 (N, 6) 검출 배열 반환"""
+        region = self.region(frame.shape)
+        if region is not None:
+            x0, y0, x1, y1 = region
+            dets = predict(frame[y0:y1, x0:x1], self.imgsz).copy()
+            dets[:, [X1, X2]] += x0
+            dets[:, [Y1, Y2]] += y0
+
+            if len(dets) == 1 and dets[0, CONF] >= self.min_conf and not self._touches_edge(dets[0], region, frame.shape):
+                self.box = dets[0, :4].copy()
+                self.roi_frames += 1
+                return dets
+            # 추적 실패 - 전체 프레임 검색으로 전환
+            self.fallbacks += 1
+
+        dets = predict(frame, None)
+        self.full_frames += 1
+        self.box = dets[0, :4].copy() if len(dets) == 1 and dets[0, CONF] >= self.min_conf else None
+        return dets
+
+    def reset(self):
+        self.box = None
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+공유 메모리 프레임 링 버퍼 + 추론 워커 프로세스 풀
+
+프레임을 피클링해서 프로세스 간에 복사하지 않고, 미리 할당한 공유 메모리 슬롯(기본 640x480x3)에
+한 번 복사한 뒤 슬롯 번호만 워커 프로세스에 전달합니다. 워커는 슬롯을 그대로 numpy 배열로 보고 추론하며,
+결과는 작은 (N, 6) 검출 배열로 돌려받습니다. 여러 워커가 동시에 추론하므로 GIL에 묶이지 않습니다.
+
+사용법:
+    pool = InferenceWorkerPool("models/best4.pt", num_workers=2, conf=0.5, iou=0.45)
+    future = pool.submit(frame)        # 슬롯이 빌 때까지 대기 (백프레셔)
+    dets = future.result()
+    pool.close()
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FRAME_SHAPE = (480, 640, 3)   # 슬롯 크기 (h, w, c) - 이보다 작은 프레임도 넣을 수 있음
+SLOTS_PER_WORKER = 2          # 워커당 슬롯 수 (추론 중 1 + 대기 1)
+START_TIMEOUT = 120.0         # 워커 모델 로드 대기 시간 (초)
+CHECK_INTERVAL = 0.5          # 워커 프로세스 생존 확인 간격 (초)
+
+# 결과 메시지 종류
+_READY = "ready"
+_RESULT = "result"
+_ERROR = "error"
+
+
+class SharedFrameRing:
+    """같은 크기의 프레임 슬롯 num_slots개를 담은 공유 메모리 블록"""
+
+    def __init__(self, num_slots, frame_shape=FRAME_SHAPE, dtype=np.uint8, name=None):
+        self.num_slots = num_slots
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * num_slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._array = np.ndarray((num_slots,) + self.frame_shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, index, shape=None):
+        """슬롯 index의 numpy 뷰 (shape를 지정하면 왼쪽 위 부분만)"""
+        view = self._array[index]
+        if shape is not None:
+            view = view[:shape[0], :shape[1]]
+        return view
+
+    def write(self, index, frame):
+        """프레임을 슬롯에 복사하고 (h, w) 반환"""
+        h, w = frame.shape[:2]
+        if h > self.frame_shape[0] or w > self.frame_shape[1] or frame.shape[2:] != self.frame_shape[2:]:
+            raise ValueError(f"프레임 크기 {frame.shape}가 슬롯 크기 {self.frame_shape}보다 큽니다.")
+        np.copyto(self._array[index, :h, :w], frame)
+        return h, w
+
+    def close(self):
+        self._array = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker_main(worker_id, shm_name, num_slots, frame_shape, model_path, detector_kwargs, tasks, results):
+    """워커 프로세스 - 모델을 로드하고 슬롯 번호로 받은 프레임을 추론"""
+    ring = None
+    try:
+        from detector import create_detector
+        detector = create_detector(model_path, **detector_kwargs)
+        ring = SharedFrameRing(num_slots, frame_shape, name=shm_name)
+        results.put((_READY, worker_id, dict(detector.names), detector.backend_name))
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, slot, h, w, imgsz = task
+            start = time.perf_counter()
+            try:
+                # 슬롯 뷰를 그대로 추론 (복사 없음), 결과를 보낸 뒤에야 부모가 슬롯을 재사용함
+                dets = detector.predict(ring.slot(slot, (h, w)), imgsz=imgsz)
+                results.put((_RESULT, task_id, dets, time.perf_counter() - start))
+            except Exception as e:
+                results.put((_ERROR, task_id, f"{type(e).__name__}: {e}", time.perf_counter() - start))
+    except Exception:
+        results.put((_ERROR, None, traceback.format_exc(), 0.0))
+    finally:
+        if ring is not None:
+            ring.close()
+
+
+class InferenceWorkerPool:
+    """공유 메모리 링 버퍼로 프레임을 전달하는 추론 워커 프로세스 풀"""
+
+    def __init__(self, model_path, num_workers=2, frame_shape=FRAME_SHAPE, slots_per_worker=SLOTS_PER_WORKER,
+                 num_threads=None, start_timeout=START_TIMEOUT, **detector_kwargs):
+        """
+        Args:
+            model_path: 모델 경로 (각 워커가 따로 로드)
+            num_workers: 워커 프로세스 수
+            frame_shape: 슬롯 크기 (h, w, c)
+            num_threads: 워커당 추론 스레드 수 (None이면 CPU 코어 수 / 워커 수)
+            detector_kwargs: create_detector 추가 인자 (conf, iou, backend, imgsz)
+        """
+        self.num_workers = max(int(num_workers), 1)
+        self.ring = SharedFrameRing(self.num_workers * max(int(slots_per_worker), 1), frame_shape)
+        self._free_slots = queue.Queue()
+        for i in range(self.ring.num_slots):
+            self._free_slots.put(i)
+
+        if num_threads is None:
+            num_threads = max((os.cpu_count() or 1) // self.num_workers, 1)
+        detector_kwargs["num_threads"] = num_threads
+
+        # spawn: 부모 프로세스의 스레드 / 런타임 상태를 물려받지 않도록
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._processes = [
+            ctx.Process(target=_worker_main, name=f"inference-worker-{i}",
+                        args=(i, self.ring.name, self.ring.num_slots, self.ring.frame_shape,
+                              model_path, detector_kwargs, self._tasks, self._results), daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._pending = {}          # task_id -> (slot, Future)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._closed = False
+        self.error = None           # 워커 프로세스가 죽어 풀을 쓸 수 없게 된 이유 (정상이면 None)
+        self.names = None
+        self.backend_name = None
+        # 통계
+        self.completed = 0
+        self.slot_wait_seconds = 0.0   # 빈 슬롯을 기다린 시간 (워커가 밀린 정도)
+        self.worker_seconds = 0.0
+
+        self._wait_ready(start_timeout)
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+
+    def _wait_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        ready = 0
+        while ready < self.num_workers:
+            try:
+                kind, worker_id, payload, extra = self._results.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                self.close()
+                raise TimeoutError(f"워커 프로세스가 {timeout}초 안에 준비되지 않았습니다.")
+            if kind == _ERROR:
+                self.close()
+                raise RuntimeError(f"워커 프로세스 시작 실패:\n{payload}")
+            ready += 1
+            self.names, self.backend_name = payload, extra
+        print(f"추론 워커 {self.num_workers}개 준비 완료 ({self.backend_name}, 공유 메모리 슬롯 {self.ring.num_slots}개)")
+
+    def _collect(self):
+        # 결과를 기다리는 동안에도 주기적으로 워커 생존 확인 (죽은 워커가 맡은 요청은 결과가 오지 않음)
+        last_check = time.monotonic()
+        while True:
+            try:
+                message = self._results.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                message = False
+            if message is None:
+                return
+            if message:
+                self._handle(message)
+            if time.monotonic() - last_check >= CHECK_INTERVAL:
+                last_check = time.monotonic()
+                self._check_workers()
+
+    def _check_workers(self):
+        """
+        종료된 워커가 있으면 풀을 사용할 수 없는 상태(error)로 바꾸고 처리 중인 요청을 모두 실패 처리
+
+        작업은 공유 대기열로 전달되므로 죽은 워커가 어떤 요청을 맡았는지 알 수 없습니다.
+        """
+        if self._closed or self.error is not None:
+            return
+        dead = [process for process in self._processes if process.exitcode is not None]
+        if not dead:
+            return
+        self.error = "추론 워커 프로세스가 종료되었습니다: " + ", ".join(
+            f"{process.name} (exitcode {process.exitcode})" for process in dead)
+        print(self.error)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for slot, future in pending.values():
+            # 빈 슬롯을 기다리던 submit이 깨어나 오류를 받도록 슬롯 반환
+            self._free_slots.put(slot)
+            future.set_exception(RuntimeError(self.error))
+
+    def _handle(self, message):
+        kind, task_id, payload, seconds = message
+        with self._lock:
+            entry = self._pending.pop(task_id, None)
+            self.worker_seconds += seconds
+            if kind == _RESULT:
+                self.completed += 1
+        if entry is None:
+            if kind == _ERROR:
+                print(f"워커 프로세스 오류:\n{payload}")
+            return
+        slot, future = entry
+        self._free_slots.put(slot)
+        if kind == _RESULT:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def submit(self, frame, imgsz=None, timeout=None):
+        """프레임을 빈 슬롯에 복사하고 워커에 추론 요청. 결과를 받을 Future 반환"""
+        self._raise_if_unusable()
+        start = time.perf_counter()
+        slot = self._free_slots.get(timeout=timeout)
+        self.slot_wait_seconds += time.perf_counter() - start
+        try:
+            h, w = self.ring.write(slot, frame)
+            future = Future()
+            with self._lock:
+                # 슬롯을 기다리는 동안 워커가 죽었으면 요청하지 않음 (결과를 받을 수 없음)
+                self._raise_if_unusable()
+                task_id = self._next_id
+                self._next_id += 1
+                self._pending[task_id] = (slot, future)
+        except Exception:
+            self._free_slots.put(slot)
+            raise
+        self._tasks.put((task_id, slot, h, w, imgsz))
+        return future
+
+    def _raise_if_unusable(self):
+        if self._closed:
+            raise RuntimeError("워커 풀이 종료되었습니다.")
+        if self.error is not None:
+            raise RuntimeError(self.error)
+
+    def predict(self, frame, imgsz=None, timeout=None):
+        """프레임 하나를 워커에서 추론하여 (N, 6) 검출 배열 반환"""
+        return self.submit(frame, imgsz).result(timeout)
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return len(self._pending)
+
+    def class_name(self, class_id):
+        return self.names.get(int(class_id), "unknown")
+
+    def format_stats(self):
+        mean_ms = self.worker_seconds / self.completed * 1000 if self.completed else 0.0
+        return (f"워커 추론 {self.completed}회 (평균 {mean_ms:.1f} ms) | 처리 중 {self.in_flight}개 | "
+                f"슬롯 대기 {self.slot_wait_seconds:.2f}초")
+
+    def close(self):
+        """워커 종료 후 공유 메모리 해제"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        collector = getattr(self, "_collector", None)
+        if collector is not None:
+            collector.join(timeout=1.0)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for _, future in pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("워커 풀이 종료되었습니다."))
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()